@@ -0,0 +1,135 @@
+"""
+Fixtures for the microbenchmark and query-plan suites
+
+Run from the backend directory:
+    python -m pytest benchmarks -q                          # quick mode
+    python -m pytest benchmarks -q --bench-mode thorough    # more sizes, more rounds
+    python -m pytest benchmarks -q --bench-json micro.json  # also write results as JSON
+    python -m pytest benchmarks/test_query_plans.py -q --update-plans  # rewrite plan snapshots
+
+Each benchmark reports ops/sec (best round) and the peak and retained
+memory allocated by a single call, as measured by tracemalloc.
+"""
+import json
+import os
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+import pytest
+
+# Settings are read once, on first use, so configure them before any src import
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("ENVIRONMENT", "benchmark")
+os.environ.setdefault("BETTER_AUTH_SECRET", "benchmark-secret-not-for-production-use")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+MODES = {
+    "quick": {
+        "rounds": 3,
+        "min_round_time": 0.05,
+        "list_size": [10, 100, 1000],
+        "payload_size": [0, 1000],
+    },
+    "thorough": {
+        "rounds": 10,
+        "min_round_time": 0.25,
+        "list_size": [10, 100, 1000, 10000],
+        "payload_size": [0, 100, 500, 1000],
+    },
+}
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("benchmarks")
+    group.addoption("--bench-mode", choices=sorted(MODES), default="quick", help="Benchmark sizes and rounds (default: quick)")
+    group.addoption("--bench-json", default=None, help="Write benchmark results to this JSON file")
+    group.addoption("--update-plans", action="store_true", help="Rewrite the committed query plan snapshots")
+    group.addoption("--plan-database-url", default=None, help="Scratch database to check query plans on; its tables are recreated (default: temporary SQLite file)")
+
+
+def pytest_configure(config):
+    config._bench_results = []
+
+
+def pytest_generate_tests(metafunc):
+    mode = MODES[metafunc.config.getoption("--bench-mode")]
+    for name in ("list_size", "payload_size"):
+        if name in metafunc.fixturenames:
+            metafunc.parametrize(name, mode[name])
+
+
+class Bench:
+    """
+    Minimal pytest-benchmark style timer
+    Calibrates the iteration count so each round runs for at least min_round_time,
+    then keeps the fastest round to reduce scheduler noise
+    """
+
+    def __init__(self, name: str, rounds: int, min_round_time: float, results: List[Dict[str, Any]]):
+        self.name = name
+        self.rounds = rounds
+        self.min_round_time = min_round_time
+        self.results = results
+
+    def __call__(self, fn: Callable, *args, **kwargs):
+        result = fn(*args, **kwargs)  # Warm-up, and the value returned to the test
+
+        iterations = 1
+        while True:
+            elapsed = self._run(fn, args, kwargs, iterations)
+            if elapsed >= self.min_round_time:
+                break
+            iterations *= 2
+
+        best = elapsed
+        for _ in range(self.rounds - 1):
+            best = min(best, self._run(fn, args, kwargs, iterations))
+
+        tracemalloc.start()
+        fn(*args, **kwargs)
+        retained, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        self.results.append({
+            "name": self.name,
+            "ops_per_sec": round(iterations / best, 2),
+            "mean_us": round(best / iterations * 1e6, 3),
+            "alloc_peak_kb": round(peak / 1024, 2),
+            "alloc_retained_kb": round(retained / 1024, 2),
+        })
+        return result
+
+    @staticmethod
+    def _run(fn: Callable, args, kwargs, iterations: int) -> float:
+        start = time.perf_counter()
+        for _ in range(iterations):
+            fn(*args, **kwargs)
+        return time.perf_counter() - start
+
+
+@pytest.fixture
+def bench(request) -> Bench:
+    mode = MODES[request.config.getoption("--bench-mode")]
+    return Bench(request.node.name, mode["rounds"], mode["min_round_time"], request.config._bench_results)
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    results = getattr(config, "_bench_results", [])
+    if not results:
+        return
+
+    terminalreporter.section("microbenchmarks")
+    width = max(len(result["name"]) for result in results)
+    terminalreporter.write_line(f"{'benchmark':<{width}}{'ops/sec':>14}{'mean us':>12}{'peak KB':>11}{'retained KB':>13}")
+    for result in results:
+        terminalreporter.write_line(
+            f"{result['name']:<{width}}{result['ops_per_sec']:>14}{result['mean_us']:>12}"
+            f"{result['alloc_peak_kb']:>11}{result['alloc_retained_kb']:>13}"
+        )
+
+    output = config.getoption("--bench-json")
+    if output:
+        with open(output, "w") as output_file:
+            json.dump({"mode": config.getoption("--bench-mode"), "benchmarks": results}, output_file, indent=2)
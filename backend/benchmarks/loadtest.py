@@ -0,0 +1,376 @@
+"""
+HTTP load test for the Todo API
+
+Boots the app from main.py under uvicorn against a freshly seeded SQLite database
+(or targets an already running server with --url), drives a weighted mix of
+signin / list / create / toggle / delete requests from concurrent virtual users,
+and reports throughput and p50/p95/p99 latency per endpoint.
+
+Results are written as JSON and can be compared against a committed baseline;
+the process exits non-zero when any endpoint regresses beyond the threshold.
+
+Usage (from the backend directory):
+    python -m benchmarks.loadtest --duration 30 --output results.json
+    python -m benchmarks.loadtest --baseline benchmarks/baseline.json --threshold 0.25
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Relative weights of each operation in the request mix
+DEFAULT_MIX = {
+    "signin": 5,
+    "list": 50,
+    "create": 20,
+    "toggle": 15,
+    "delete": 10,
+}
+
+BENCH_PASSWORD = "loadtest-password"
+SIGNIN_ATTEMPTS = 5
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """
+    Nearest-rank percentile of an already sorted list
+    """
+    if not sorted_values:
+        return 0.0
+    rank = math.ceil(pct / 100.0 * len(sorted_values))
+    return sorted_values[max(0, min(len(sorted_values), rank) - 1)]
+
+
+def seed_database(database_url: str, users: int, tasks_per_user: int, seed: int) -> List[Dict[str, Any]]:
+    """
+    Create the schema and insert benchmark users with their tasks
+    Must run before any other src module reads settings, so DATABASE_URL is set first
+    """
+    os.environ["DATABASE_URL"] = database_url
+    os.environ["ENVIRONMENT"] = "loadtest"  # Anything but development: no SQL echo
+    sys.path.insert(0, BACKEND_DIR)
+
+    from sqlmodel import SQLModel, Session
+    from src.database.database import engine
+    from src.models.auth import User
+    from src.models.task import Task
+    from src.utils.password_utils import hash_password
+
+    SQLModel.metadata.create_all(engine)
+
+    # One bcrypt hash shared by every user keeps seeding fast
+    hashed_password = hash_password(BENCH_PASSWORD)
+    rng = random.Random(seed)
+    accounts = []
+
+    with Session(engine) as session:
+        for i in range(users):
+            user = User(email=f"loadtest-{i}@example.com", name=f"Load Test {i}", hashed_password=hashed_password)
+            session.add(user)
+            session.flush()
+            for j in range(tasks_per_user):
+                session.add(Task(
+                    title=f"Seeded task {j}",
+                    description="x" * rng.randint(0, 400),
+                    completed=rng.random() < 0.4,
+                    user_id=user.id,
+                ))
+            accounts.append({"id": user.id, "email": user.email})
+        session.commit()
+
+    return accounts
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def run_server(database_url: str, workdir: str):
+    """
+    Run `uvicorn main:app` in a subprocess and yield its base URL once /ready answers
+    """
+    port = _free_port()
+    env = dict(os.environ)
+    env.update({
+        "DATABASE_URL": database_url,
+        "BETTER_AUTH_SECRET": "loadtest-secret-not-for-production-use",
+        "ENVIRONMENT": "loadtest",  # Anything but development: no SQL echo
+        "LOG_LEVEL": "WARNING",
+        "LOG_FILE": os.path.join(workdir, "app.log"),
+    })
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                if httpx.get(f"{base_url}/ready", timeout=1).status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            if process.poll() is not None or time.monotonic() > deadline:
+                raise RuntimeError("API server failed to start")
+            time.sleep(0.2)
+        yield base_url
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+class VirtualUser(threading.Thread):
+    """
+    One simulated client: signs in, then issues requests from the mix until the deadline
+    """
+
+    def __init__(self, base_url: str, account: Dict[str, Any], mix: Dict[str, int], deadline: float, seed: int, recorder: "Recorder"):
+        super().__init__(daemon=True)
+        self.base_url = base_url
+        self.account = account
+        self.operations = list(mix.keys())
+        self.weights = list(mix.values())
+        self.deadline = deadline
+        self.rng = random.Random(seed)
+        self.recorder = recorder
+        self.task_ids: List[str] = []
+        self.created_ids: List[str] = []
+        self.headers: Dict[str, str] = {}
+
+    def run(self):
+        with httpx.Client(base_url=self.base_url, timeout=30) as client:
+            self.signin(client)
+            self.list(client)
+            while time.monotonic() < self.deadline:
+                operation = self.rng.choices(self.operations, self.weights)[0]
+                getattr(self, operation)(client)
+
+    def _timed(self, name: str, send) -> Optional[httpx.Response]:
+        start = time.perf_counter()
+        try:
+            response = send()
+        except httpx.HTTPError:
+            self.recorder.record(name, time.perf_counter() - start, ok=False)
+            return None
+        self.recorder.record(name, time.perf_counter() - start, ok=response.is_success)
+        return response
+
+    @property
+    def tasks_path(self) -> str:
+        return f"/api/users/{self.account['id']}/tasks"
+
+    def signin(self, client: httpx.Client):
+        # Every later request needs the token, so honour Retry-After when signin is shed with a 503
+        for _ in range(SIGNIN_ATTEMPTS):
+            response = self._timed("signin", lambda: client.post(
+                "/api/auth/signin", json={"email": self.account["email"], "password": BENCH_PASSWORD}
+            ))
+            if response is None or response.status_code != 503:
+                break
+            time.sleep(float(response.headers.get("retry-after", 1)))
+        if response is not None and response.is_success:
+            self.headers = {"Authorization": f"Bearer {response.json()['token']}"}
+
+    def list(self, client: httpx.Client):
+        params = {"limit": 100}
+        choice = self.rng.random()
+        if choice < 0.3:
+            params["completed"] = "false"
+        elif choice < 0.4:
+            params["completed"] = "true"
+        response = self._timed("list", lambda: client.get(self.tasks_path, params=params, headers=self.headers))
+        if response is not None and response.is_success and "completed" not in params:
+            self.task_ids = [task["id"] for task in response.json()["tasks"]]
+
+    def create(self, client: httpx.Client):
+        payload = {"title": f"Load test task {self.rng.randint(0, 1_000_000)}", "description": "x" * self.rng.randint(0, 200)}
+        response = self._timed("create", lambda: client.post(self.tasks_path, json=payload, headers=self.headers))
+        if response is not None and response.is_success:
+            task_id = response.json()["task"]["id"]
+            self.created_ids.append(task_id)
+            self.task_ids.append(task_id)
+
+    def toggle(self, client: httpx.Client):
+        if not self.task_ids:
+            return self.list(client)
+        task_id = self.rng.choice(self.task_ids)
+        self._timed("toggle", lambda: client.patch(
+            f"{self.tasks_path}/{task_id}/complete", json={"completed": self.rng.random() < 0.5}, headers=self.headers
+        ))
+
+    def delete(self, client: httpx.Client):
+        # Only delete tasks this run created so the seeded dataset keeps its shape
+        if not self.created_ids:
+            return self.create(client)
+        task_id = self.created_ids.pop(self.rng.randrange(len(self.created_ids)))
+        self.task_ids = [existing for existing in self.task_ids if existing != task_id]
+        self._timed("delete", lambda: client.delete(f"{self.tasks_path}/{task_id}", headers=self.headers))
+
+
+class Recorder:
+    """
+    Thread-safe collection of per-endpoint latency samples
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    def record(self, name: str, seconds: float, ok: bool):
+        with self._lock:
+            self.samples[name].append(seconds)
+            if not ok:
+                self.errors[name] += 1
+
+    def summarize(self, elapsed: float) -> Dict[str, Any]:
+        endpoints = {}
+        total = 0
+        for name, values in sorted(self.samples.items()):
+            ordered = sorted(values)
+            total += len(ordered)
+            endpoints[name] = {
+                "requests": len(ordered),
+                "errors": self.errors.get(name, 0),
+                "throughput_rps": round(len(ordered) / elapsed, 2),
+                "p50_ms": round(percentile(ordered, 50) * 1000, 2),
+                "p95_ms": round(percentile(ordered, 95) * 1000, 2),
+                "p99_ms": round(percentile(ordered, 99) * 1000, 2),
+            }
+        return {
+            "total_requests": total,
+            "throughput_rps": round(total / elapsed, 2),
+            "endpoints": endpoints,
+        }
+
+
+def run_load(base_url: str, accounts: List[Dict[str, Any]], mix: Dict[str, int], concurrency: int, duration: float, seed: int) -> Dict[str, Any]:
+    recorder = Recorder()
+    deadline = time.monotonic() + duration
+    users = [
+        VirtualUser(base_url, accounts[i % len(accounts)], mix, deadline, seed + i, recorder)
+        for i in range(concurrency)
+    ]
+    start = time.monotonic()
+    for user in users:
+        user.start()
+    for user in users:
+        user.join()
+    return recorder.summarize(time.monotonic() - start)
+
+
+def compare_to_baseline(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """
+    Return a description of every endpoint whose p95 latency or throughput
+    regressed by more than `threshold` (a fraction) relative to the baseline
+    """
+    regressions = []
+    for name, base in baseline.get("summary", {}).get("endpoints", {}).items():
+        current = results["summary"]["endpoints"].get(name)
+        if current is None:
+            regressions.append(f"{name}: missing from current run")
+            continue
+        if base["p95_ms"] and current["p95_ms"] > base["p95_ms"] * (1 + threshold):
+            regressions.append(f"{name}: p95 {current['p95_ms']}ms vs baseline {base['p95_ms']}ms")
+        if base["throughput_rps"] and current["throughput_rps"] < base["throughput_rps"] * (1 - threshold):
+            regressions.append(f"{name}: throughput {current['throughput_rps']}rps vs baseline {base['throughput_rps']}rps")
+        if current["errors"] > base.get("errors", 0):
+            regressions.append(f"{name}: {current['errors']} errors vs baseline {base.get('errors', 0)}")
+    return regressions
+
+
+def print_report(results: Dict[str, Any]):
+    summary = results["summary"]
+    print(f"{'endpoint':<10}{'requests':>10}{'errors':>8}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, stats in summary["endpoints"].items():
+        print(f"{name:<10}{stats['requests']:>10}{stats['errors']:>8}{stats['throughput_rps']:>10}"
+              f"{stats['p50_ms']:>10}{stats['p95_ms']:>10}{stats['p99_ms']:>10}")
+    print(f"total: {summary['total_requests']} requests, {summary['throughput_rps']} rps")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Load test the Todo API")
+    parser.add_argument("--url", help="Target an already running server instead of booting one (it must be seeded with loadtest users)")
+    parser.add_argument("--database-url", help="Database to seed and serve from (default: temporary SQLite file)")
+    parser.add_argument("--users", type=int, default=20, help="Number of seeded accounts")
+    parser.add_argument("--tasks-per-user", type=int, default=100, help="Seeded tasks per account")
+    parser.add_argument("--concurrency", type=int, default=10, help="Concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds to generate load for")
+    parser.add_argument("--seed", type=int, default=1234, help="Random seed for data and request mix")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    parser.add_argument("--baseline", help="Compare against this JSON results file")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed regression as a fraction (default 0.25)")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    config = {
+        "users": args.users,
+        "tasks_per_user": args.tasks_per_user,
+        "concurrency": args.concurrency,
+        "duration": args.duration,
+        "seed": args.seed,
+        "mix": DEFAULT_MIX,
+    }
+
+    with tempfile.TemporaryDirectory() as workdir:
+        if args.url:
+            accounts = [{"id": i + 1, "email": f"loadtest-{i}@example.com"} for i in range(args.users)]
+            summary = run_load(args.url, accounts, DEFAULT_MIX, args.concurrency, args.duration, args.seed)
+        else:
+            database_url = args.database_url or f"sqlite:///{os.path.join(workdir, 'loadtest.db')}"
+            accounts = seed_database(database_url, args.users, args.tasks_per_user, args.seed)
+            with run_server(database_url, workdir) as base_url:
+                summary = run_load(base_url, accounts, DEFAULT_MIX, args.concurrency, args.duration, args.seed)
+
+    results = {
+        "config": config,
+        "environment": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "summary": summary,
+    }
+    print_report(results)
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = compare_to_baseline(results, baseline, args.threshold)
+        if regressions:
+            print("Regressions beyond threshold:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print("No regressions beyond threshold")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,472 @@
+"""
+Replay captured production traffic against a local build
+
+Reads the capture files written by TrafficCaptureMiddleware (TRAFFIC_CAPTURE_ENABLED),
+seeds a fresh database with one synthetic user per captured user bucket, sized
+from the list totals seen in the capture, boots the app under uvicorn and re-issues
+every captured request at its original offset (or --speed times faster). Ids,
+bodies and credentials are synthesized to match the captured shapes and sizes.
+
+Latency is reported per route template and, like the load test, results can be
+written as JSON and diffed against an earlier replay; the process exits non-zero
+when any route's p95 regresses beyond the threshold.
+
+Usage (from the backend directory):
+    python -m benchmarks.replay traffic.*.jsonl --output replay.json
+    python -m benchmarks.replay traffic.*.jsonl --speed 4 --baseline replay.json --threshold 0.25
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import httpx
+
+from .loadtest import BACKEND_DIR, BENCH_PASSWORD, SIGNIN_ATTEMPTS, Recorder, compare_to_baseline, percentile, run_server
+
+TASK_ROUTE = "/api/users/{user_id}/tasks"
+# Parallel signins while preparing accounts; matches the default auth admission budget
+SIGNIN_CONCURRENCY = 3
+_PLACEHOLDER = re.compile(r"\{([^}]+)\}")
+# Route of captured requests that matched no route (capture.UNMATCHED_ROUTE); their path was not recorded
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def load_capture(paths: Sequence[str]) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """
+    Header and request records of one or more capture files, merged in time order
+    Pass every worker's file (traffic.<pid>.jsonl) to replay the whole server's traffic.
+    Format 2 records carry Unix timestamps and merge as they are; format 1 files
+    hold per-session offsets, so their sessions are chained after one another.
+    """
+    header: Dict[str, Any] = {}
+    records: List[Dict[str, Any]] = []
+    for path in paths:
+        version = None
+        session_offset = 0.0
+        last_offset = 0.0
+        with open(path, encoding="utf-8") as capture:
+            for line in capture:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if "capture" in record:
+                    header = header or record
+                    version = record["capture"]
+                    session_offset = last_offset
+                    continue
+                if version == 1:
+                    record["t"] += session_offset
+                    last_offset = max(last_offset, record["t"])
+                records.append(record)
+    records.sort(key=lambda record: record["t"])
+    return header, records
+
+
+def build_profile(records: List[Dict[str, Any]], default_tasks: int, max_tasks: int) -> Dict[str, Any]:
+    """
+    Dataset shape implied by the capture: tasks per user bucket and the completed share
+    A bucket's task count is the largest unfiltered list total it returned
+    """
+    totals: Dict[int, int] = {}
+    completed_totals: Dict[int, int] = {}
+    for record in records:
+        if record.get("r") != TASK_ROUTE or record.get("m") != "GET" or "n" not in record or "u" not in record:
+            continue
+        query = record.get("q", {})
+        if query.get("include_archived") in ("true", "1"):
+            continue
+        if "completed" not in query:
+            totals[record["u"]] = max(totals.get(record["u"], 0), record["n"])
+        elif query["completed"] in ("true", "1"):
+            completed_totals[record["u"]] = max(completed_totals.get(record["u"], 0), record["n"])
+
+    shares = [completed_totals[bucket] / totals[bucket] for bucket in completed_totals if totals.get(bucket)]
+    buckets = sorted({record["u"] for record in records if "u" in record})
+    return {
+        "tasks": {bucket: min(max_tasks, totals.get(bucket, default_tasks)) for bucket in buckets},
+        "completed_share": sum(shares) / len(shares) if shares else 0.4,
+    }
+
+
+def seed_profile(database_url: str, profile: Dict[str, Any], extra_users: int, seed: int) -> Dict[Any, "ReplayAccount"]:
+    """
+    Create the schema and one account per bucket (plus `extra_users` for traffic
+    without a user, such as signins) with tasks matching the profile
+    Must run before any other src module reads settings, so DATABASE_URL is set first
+    """
+    os.environ["DATABASE_URL"] = database_url
+    os.environ["ENVIRONMENT"] = "loadtest"  # Anything but development: no SQL echo
+    sys.path.insert(0, BACKEND_DIR)
+
+    from sqlmodel import SQLModel, Session
+    from src.database.database import engine
+    from src.models.auth import User
+    from src.models.task import Task
+    from src.utils.password_utils import hash_password
+
+    SQLModel.metadata.create_all(engine)
+
+    # One bcrypt hash shared by every user keeps seeding fast
+    hashed_password = hash_password(BENCH_PASSWORD)
+    rng = random.Random(seed)
+    keys = list(profile["tasks"]) + [f"extra-{i}" for i in range(extra_users)]
+    accounts = {}
+
+    with Session(engine) as session:
+        for i, key in enumerate(keys):
+            user = User(email=f"replay-{i}@example.com", name=f"Replay {i}", hashed_password=hashed_password)
+            session.add(user)
+            session.flush()
+            tasks = [
+                Task(
+                    title=f"Seeded task {j}",
+                    description="x" * rng.randint(0, 400),
+                    completed=rng.random() < profile["completed_share"],
+                    user_id=user.id,
+                )
+                for j in range(profile["tasks"].get(key, 0))
+            ]
+            session.add_all(tasks)
+            session.flush()
+            accounts[key] = ReplayAccount(user.id, user.email, [task.id for task in tasks])
+        session.commit()
+
+    return accounts
+
+
+class ReplayAccount:
+    """
+    A seeded user standing in for one captured user bucket, with the task ids it can address
+    """
+
+    def __init__(self, user_id: int, email: str, task_ids: List[int]):
+        self.id = user_id
+        self.email = email
+        self.task_ids = task_ids
+        self.created_ids: List[int] = []
+        self.headers: Dict[str, str] = {}
+        self.lock = threading.Lock()
+
+    def authorize(self, client: httpx.Client):
+        """
+        Sign in once, untimed, before replaying the account's requests
+        """
+        with self.lock:
+            if self.headers:
+                return
+            for _ in range(SIGNIN_ATTEMPTS):
+                response = client.post("/api/auth/signin", json={"email": self.email, "password": BENCH_PASSWORD})
+                if response.status_code != 503:
+                    break
+                time.sleep(float(response.headers.get("retry-after", 1)))
+            if response.is_success:
+                self.headers = {"Authorization": f"Bearer {response.json()['token']}"}
+
+    def pick_task(self, rng: random.Random) -> Optional[int]:
+        with self.lock:
+            return rng.choice(self.task_ids) if self.task_ids else None
+
+    def pick_tasks(self, rng: random.Random, count: int) -> List[int]:
+        with self.lock:
+            return rng.sample(self.task_ids, min(count, len(self.task_ids)))
+
+    def take_task(self, rng: random.Random) -> Optional[int]:
+        """
+        A task to delete: one created during the replay if any, so the seeded dataset keeps its shape
+        """
+        with self.lock:
+            if self.created_ids:
+                task_id = self.created_ids.pop(rng.randrange(len(self.created_ids)))
+            elif self.task_ids:
+                task_id = rng.choice(self.task_ids)
+            else:
+                return None
+            self.task_ids.remove(task_id)
+            return task_id
+
+    def add_task(self, task_id: int):
+        with self.lock:
+            self.task_ids.append(task_id)
+            self.created_ids.append(task_id)
+
+
+def _padded(payload: Dict[str, Any], size: int) -> Dict[str, Any]:
+    """
+    Pad the payload's description so its JSON body is about `size` bytes
+    """
+    base = len(json.dumps({**payload, "description": ""}))
+    return {**payload, "description": "x" * max(0, min(1000, size - base))}
+
+
+class Replayer:
+    """
+    Turns each captured record into a concrete request and times it
+    A request counts as an error when its status class differs from the captured one
+    """
+
+    def __init__(self, base_url: str, accounts: Dict[Any, ReplayAccount], seed: int, recorder: Recorder):
+        self.base_url = base_url
+        self.accounts = accounts
+        self.extra_accounts = [account for key, account in accounts.items() if isinstance(key, str)] or list(accounts.values())
+        self.seed = seed
+        self.recorder = recorder
+        self.skipped: Dict[str, int] = defaultdict(int)
+        self._local = threading.local()
+        self._counter = 0
+        self._lock = threading.Lock()
+
+    def _client(self) -> httpx.Client:
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = httpx.Client(base_url=self.base_url, timeout=60)
+        return client
+
+    def _rng(self) -> random.Random:
+        with self._lock:
+            self._counter += 1
+            return random.Random(self.seed * 1_000_003 + self._counter)
+
+    def replay(self, record: Dict[str, Any]):
+        name = f"{record['m']} {record['r']}"
+        client = self._client()
+        rng = self._rng()
+        if "u" in record:
+            account = self.accounts[record["u"]]
+        else:
+            account = rng.choice(self.extra_accounts)
+
+        request = self._build(record, account, rng)
+        if request is None:
+            with self._lock:
+                self.skipped[name] += 1
+            return
+        path, params, payload, headers = request
+        if headers is None:
+            account.authorize(client)
+            headers = account.headers
+
+        start = time.perf_counter()
+        try:
+            response = client.request(record["m"], path, params=params, json=payload, headers=headers)
+        except httpx.HTTPError:
+            self.recorder.record(name, time.perf_counter() - start, ok=False)
+            return
+        self.recorder.record(name, time.perf_counter() - start, ok=response.status_code // 100 == record["s"] // 100)
+
+        if record["m"] == "POST" and record["r"] == TASK_ROUTE and response.is_success:
+            account.add_task(response.json()["task"]["id"])
+
+    def _build(self, record: Dict[str, Any], account: ReplayAccount, rng: random.Random):
+        """
+        (path, params, json, headers) for a record, or None if it cannot be replayed
+        headers is None for requests that need the account's bearer token
+        """
+        method, route, size = record["m"], record["r"], record.get("qb", 0)
+        if route == UNMATCHED_ROUTE:
+            return None
+        params = {key: value for key, value in record.get("q", {}).items() if value is not None and key != "ids"}
+
+        if route == "/api/auth/signin":
+            return route, params, {"email": account.email, "password": BENCH_PASSWORD}, {}
+        if route == "/api/auth/signup":
+            suffix = f"{self.seed}-{rng.getrandbits(48):x}"
+            return route, params, {"email": f"replay-signup-{suffix}@example.com", "name": "Replay", "password": BENCH_PASSWORD}, {}
+
+        values = {"user_id": account.id}
+        if "{task_id}" in route:
+            task_id = account.take_task(rng) if method == "DELETE" else account.pick_task(rng)
+            if task_id is None:
+                return None
+            values["task_id"] = task_id
+        try:
+            path = _PLACEHOLDER.sub(lambda match: str(values[match.group(1)]), route)
+        except KeyError:
+            return None
+
+        if "ids" in record.get("q", {}):
+            params["ids"] = ",".join(str(task_id) for task_id in account.pick_tasks(rng, record["q"]["ids"])) or "0"
+
+        payload = None
+        if method == "POST" and route == TASK_ROUTE:
+            payload = _padded({"title": f"Replayed task {rng.randint(0, 1_000_000)}"}, size)
+        elif method == "PUT":
+            payload = _padded({"title": f"Replayed edit {rng.randint(0, 1_000_000)}"}, size)
+        elif method == "PATCH" and route.endswith("/complete"):
+            payload = {"completed": rng.random() < 0.5}
+        elif method == "PATCH" and route.endswith("/move"):
+            payload = {"after_id": account.pick_task(rng)}
+
+        headers = None if route.startswith("/api/users/") or route == "/api/auth/logout" else {}
+        return path, params, payload, headers
+
+
+def run_replay(base_url: str, accounts: Dict[Any, ReplayAccount], records: List[Dict[str, Any]], speed: float, workers: int, seed: int) -> Dict[str, Any]:
+    """
+    Issue every record at its captured offset divided by `speed`
+    """
+    recorder = Recorder()
+    replayer = Replayer(base_url, accounts, seed, recorder)
+    first = records[0]["t"] if records else 0.0
+    lag = []
+
+    # Sign every account in up front, so the first requests are not held behind bcrypt
+    with ThreadPoolExecutor(max_workers=SIGNIN_CONCURRENCY) as pool:
+        for account in accounts.values():
+            pool.submit(account.authorize, replayer._client())
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for record in records:
+            due = start + (record["t"] - first) / speed
+            delay = due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                lag.append(-delay)
+            pool.submit(replayer.replay, record)
+
+    summary = recorder.summarize(time.monotonic() - start)
+    summary["skipped"] = dict(replayer.skipped)
+    # Dispatch falling behind schedule means the replay machine, not the app, set the pace
+    summary["max_dispatch_lag_ms"] = round(max(lag, default=0.0) * 1000, 2)
+    return summary
+
+
+def summarize_capture(records: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Server-side latency distribution recorded in the capture itself, for reference
+    """
+    durations: Dict[str, List[float]] = defaultdict(list)
+    for record in records:
+        durations[f"{record['m']} {record['r']}"].append(record["d"])
+    return {
+        name: {
+            "requests": len(values),
+            "p50_ms": percentile(sorted(values), 50),
+            "p95_ms": percentile(sorted(values), 95),
+            "p99_ms": percentile(sorted(values), 99),
+        }
+        for name, values in sorted(durations.items())
+    }
+
+
+def print_report(results: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None):
+    """
+    Per-route latency percentiles, with the change against the baseline run when one is given
+    """
+    endpoints = results["summary"]["endpoints"]
+    base_endpoints = baseline["summary"]["endpoints"] if baseline else {}
+    width = max([len(name) for name in endpoints] + [8]) + 2
+
+    def cell(name: str, key: str) -> str:
+        value = endpoints[name][key]
+        base = base_endpoints.get(name, {}).get(key)
+        if not base:
+            return f"{value:>10}"
+        return f"{value:>10}{(value - base) / base:>+8.0%}"
+
+    print(f"{'route':<{width}}{'requests':>10}{'errors':>8}" + "".join(
+        f"{label:>18}" if baseline else f"{label:>10}" for label in ("p50 ms", "p95 ms", "p99 ms")
+    ))
+    for name, stats in endpoints.items():
+        print(f"{name:<{width}}{stats['requests']:>10}{stats['errors']:>8}"
+              f"{cell(name, 'p50_ms')}{cell(name, 'p95_ms')}{cell(name, 'p99_ms')}")
+    summary = results["summary"]
+    print(f"total: {summary['total_requests']} requests, {summary['throughput_rps']} rps, "
+          f"max dispatch lag {summary['max_dispatch_lag_ms']} ms")
+    if summary["skipped"]:
+        print(f"skipped (no matching synthetic data): {summary['skipped']}")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Replay captured traffic against a local build of the Todo API")
+    parser.add_argument("capture", nargs="+", help="Capture files written with TRAFFIC_CAPTURE_ENABLED (one per worker)")
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay speed-up factor (default 1x: original timing)")
+    parser.add_argument("--database-url", help="Database to seed and serve from (default: temporary SQLite file)")
+    parser.add_argument("--default-tasks", type=int, default=50, help="Tasks for users whose list size was never captured")
+    parser.add_argument("--max-tasks-per-user", type=int, default=5000, help="Cap on seeded tasks per user")
+    parser.add_argument("--extra-users", type=int, default=10, help="Accounts for captured requests without a user (e.g. signin)")
+    parser.add_argument("--max-requests", type=int, help="Replay only the first N captured requests")
+    parser.add_argument("--workers", type=int, default=64, help="Maximum requests in flight")
+    parser.add_argument("--seed", type=int, default=1234, help="Random seed for data and synthesized requests")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    parser.add_argument("--baseline", help="Diff against this JSON results file from an earlier replay")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed regression as a fraction (default 0.25)")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    header, records = load_capture(args.capture)
+    if args.max_requests:
+        records = records[:args.max_requests]
+    if not records:
+        print(f"{' '.join(args.capture)} hold no requests")
+        return 1
+
+    profile = build_profile(records, args.default_tasks, args.max_tasks_per_user)
+    config = {
+        "capture": ", ".join(os.path.basename(path) for path in args.capture),
+        "captured_requests": len(records),
+        "captured_seconds": round(records[-1]["t"] - records[0]["t"], 3),
+        "capture_sample_ratio": header.get("sample_ratio"),
+        "speed": args.speed,
+        "users": len(profile["tasks"]),
+        "seeded_tasks": sum(profile["tasks"].values()),
+        "completed_share": round(profile["completed_share"], 3),
+        "seed": args.seed,
+    }
+
+    with tempfile.TemporaryDirectory() as workdir:
+        database_url = args.database_url or f"sqlite:///{os.path.join(workdir, 'replay.db')}"
+        accounts = seed_profile(database_url, profile, args.extra_users, args.seed)
+        # The server under test must not capture the replayed traffic
+        os.environ["TRAFFIC_CAPTURE_ENABLED"] = "false"
+        with run_server(database_url, workdir) as base_url:
+            summary = run_replay(base_url, accounts, records, args.speed, args.workers, args.seed)
+
+    results = {
+        "config": config,
+        "environment": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "captured": summarize_capture(records),
+        "summary": summary,
+    }
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+    print_report(results, baseline)
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=2)
+
+    if baseline is not None:
+        # Throughput follows the captured schedule, so only latency and errors are compared
+        regressions = [
+            regression for regression in compare_to_baseline(results, baseline, args.threshold)
+            if "throughput" not in regression
+        ]
+        if regressions:
+            print("Regressions beyond threshold:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print("No regressions beyond threshold")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""
+SQLite write throughput with and without the tuned engine profile
+
+Runs concurrent writer threads doing the TaskService create + toggle pattern
+against a temporary SQLite file, once with SQLITE_TUNED engines (WAL,
+synchronous=NORMAL, single writer connection) and once with a plain engine,
+and reports writes/sec and failed writes for each.
+
+Usage (from the backend directory):
+    python -m benchmarks.sqlite_writes --threads 8 --writes 200
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Optional, List
+
+os.environ.setdefault("ENVIRONMENT", "benchmark")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.exc import OperationalError  # noqa: E402
+from sqlmodel import SQLModel  # noqa: E402
+
+from src.database.database import RoutingSession, build_engines  # noqa: E402
+from src.models.task import TaskCreate  # noqa: E402
+from src.services.task_service import TaskService  # noqa: E402
+
+
+def run(database_url: str, tuned: bool, threads: int, writes_per_thread: int) -> Dict[str, Any]:
+    read_engine, write_engine = build_engines(database_url, sqlite_tuned=tuned)
+    SQLModel.metadata.create_all(write_engine)
+
+    failures = []
+    lock = threading.Lock()
+
+    def writer(worker: int):
+        for i in range(writes_per_thread):
+            try:
+                with RoutingSession(read_bind=read_engine, write_bind=write_engine) as session:
+                    task = TaskService.create_task(session, TaskCreate(title=f"w{worker}-{i}", user_id=worker))
+                    TaskService.toggle_task_completion(session, worker, task.id, True)
+            except OperationalError as e:
+                with lock:
+                    failures.append(str(e.orig))
+
+    workers = [threading.Thread(target=writer, args=(n,)) for n in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+
+    read_engine.dispose()
+    write_engine.dispose()
+
+    # Each iteration is two committed writes: the insert and the toggle
+    attempted = threads * writes_per_thread * 2
+    return {
+        "profile": "tuned" if tuned else "default",
+        "writes_per_sec": round((attempted - 2 * len(failures)) / elapsed, 1),
+        "failed_iterations": len(failures),
+        "elapsed_s": round(elapsed, 2),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare SQLite write throughput with and without the tuned profile")
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--writes", type=int, default=200, help="Create + toggle iterations per thread")
+    args = parser.parse_args(argv)
+
+    results = []
+    for tuned in (False, True):
+        with tempfile.TemporaryDirectory() as workdir:
+            database_url = f"sqlite:///{os.path.join(workdir, 'writes.db')}"
+            results.append(run(database_url, tuned, args.threads, args.writes))
+
+    print(f"{'profile':<10}{'writes/sec':>12}{'failed':>8}{'elapsed s':>11}")
+    for result in results:
+        print(f"{result['profile']:<10}{result['writes_per_sec']:>12}{result['failed_iterations']:>8}{result['elapsed_s']:>11}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
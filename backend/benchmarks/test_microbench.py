@@ -0,0 +1,142 @@
+"""
+Per-operation cost of the API's building blocks: JWT, bcrypt, task
+serialization and TaskService queries against in-memory SQLite
+"""
+import pytest
+from sqlalchemy.pool import StaticPool
+from sqlmodel import SQLModel, Session, create_engine
+
+from src.api.tasks import field_columns, format_task, format_task_fields
+from src.models.task import Task, TaskCreate
+from src.services.task_service import TaskService
+from src.utils.jwt_utils import create_access_token, verify_token
+from src.utils.password_utils import hash_password, verify_password
+
+BENCH_USER_ID = 1
+
+
+def make_task(index: int, payload_size: int) -> Task:
+    return Task(
+        id=index + 1,
+        user_id=BENCH_USER_ID,
+        title=f"Benchmark task {index}",
+        description="x" * payload_size,
+        completed=index % 3 == 0,
+    )
+
+
+@pytest.fixture
+def seeded_session(list_size, payload_size):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add_all(make_task(i, payload_size) for i in range(list_size))
+        # A second user's rows make the user_id filter do real work
+        session.add_all(Task(user_id=BENCH_USER_ID + 1, title=f"Other {i}", description="y" * payload_size) for i in range(list_size))
+        session.commit()
+        yield session
+    engine.dispose()
+
+
+# JWT
+
+def test_create_access_token(bench, payload_size):
+    data = {"user_id": "42", "email": "bench@example.com", "name": "n" * payload_size}
+    token = bench(create_access_token, data)
+    assert token.count(".") == 2
+
+
+def test_verify_token(bench, payload_size):
+    token = create_access_token({"user_id": "42", "email": "bench@example.com", "name": "n" * payload_size})
+    payload = bench(verify_token, token)
+    assert payload["user_id"] == "42"
+
+
+# bcrypt
+
+def test_hash_password(bench):
+    hashed = bench(hash_password, "benchmark-password")
+    assert hashed.startswith("$2")
+
+
+def test_verify_password(bench):
+    hashed = hash_password("benchmark-password")
+    assert bench(verify_password, "benchmark-password", hashed)
+
+
+# Serialization
+
+def test_format_task_list(bench, list_size, payload_size):
+    tasks = [make_task(i, payload_size) for i in range(list_size)]
+    formatted = bench(lambda: [format_task(task) for task in tasks])
+    assert len(formatted) == list_size
+
+
+# TaskService
+
+def test_get_all_tasks(bench, seeded_session, list_size):
+    tasks = bench(TaskService.get_all_tasks, seeded_session, BENCH_USER_ID)
+    assert len(tasks) == list_size
+
+
+def test_get_all_tasks_filtered(bench, seeded_session, list_size):
+    tasks = bench(TaskService.get_all_tasks, seeded_session, BENCH_USER_ID, False)
+    assert all(not task.completed for task in tasks)
+
+
+def test_get_all_tasks_formatted(bench, seeded_session, list_size):
+    def list_and_format():
+        return [format_task(task) for task in TaskService.get_all_tasks(seeded_session, BENCH_USER_ID)]
+
+    assert len(bench(list_and_format)) == list_size
+
+
+def test_get_all_task_rows_formatted(bench, seeded_session, list_size):
+    def list_and_format():
+        return [format_task(row) for row in TaskService.get_all_task_rows(seeded_session, BENCH_USER_ID)]
+
+    assert len(bench(list_and_format)) == list_size
+
+
+@pytest.mark.parametrize("read_path", ["orm", "core", "compact"])
+def test_list_read_path_10k(bench, read_path):
+    """
+    Fixed 10k-row list in every mode: hydrated Task objects vs Core row tuples
+    vs a sparse fieldset (fields=id,title,completed)
+    """
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add_all(make_task(i, 200) for i in range(10000))
+        session.commit()
+
+    def orm_path():
+        # A fresh session per call, as in a request, so the identity map starts empty
+        with Session(engine) as session:
+            return [format_task(task) for task in TaskService.get_all_tasks(session, BENCH_USER_ID)]
+
+    def core_path():
+        with Session(engine) as session:
+            return [format_task(row) for row in TaskService.get_all_task_rows(session, BENCH_USER_ID)]
+
+    def compact_path():
+        fields = ("id", "title", "completed")
+        with Session(engine) as session:
+            rows = TaskService.get_all_task_rows(session, BENCH_USER_ID, columns=field_columns(fields))
+            return [format_task_fields(row, fields) for row in rows]
+
+    paths = {"orm": orm_path, "core": core_path, "compact": compact_path}
+    formatted = bench(paths[read_path])
+    assert len(formatted) == 10000
+    engine.dispose()
+
+
+def test_get_task_by_id(bench, seeded_session, list_size):
+    task = bench(TaskService.get_task_by_id, seeded_session, BENCH_USER_ID, list_size // 2 + 1)
+    assert task.user_id == BENCH_USER_ID
+
+
+def test_create_task(bench, seeded_session, payload_size):
+    task_create = TaskCreate(title="Created in benchmark", description="z" * payload_size, user_id=BENCH_USER_ID)
+    task = bench(TaskService.create_task, seeded_session, task_create)
+    assert task.id is not None
@@ -0,0 +1,269 @@
+"""
+Query-plan regression suite for TaskService and AuthService
+
+Every service call below runs against a seeded, ANALYZEd database while the SQL
+it sends is captured. Each statement is then EXPLAINed (EXPLAIN QUERY PLAN on
+SQLite, EXPLAIN (FORMAT JSON) with seq scans and sorts disabled on PostgreSQL) and
+the suite fails if a plan scans a whole table or index, or sorts, on tasks,
+archived_tasks or users. Plans are also compared with the snapshots committed in
+benchmarks/query_plans/<dialect>.json, so any plan change shows up in review;
+rewrite them with --update-plans.
+"""
+import json
+import os
+import re
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event
+from sqlmodel import SQLModel, Session, create_engine
+
+from src.models.auth import User, UserCreate
+from src.models.task import ArchivedTask, Task, TaskCreate, TaskUpdate
+from src.services.auth_service import AuthService
+from src.services.task_service import TaskService
+from src.utils.ordering import evenly_spaced_keys
+from src.utils.password_utils import hash_password
+
+SNAPSHOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "query_plans")
+
+# Tables whose per-user queries must stay index-bound as data grows
+HOT_TABLES = {"tasks", "archived_tasks", "users"}
+
+# Scenario name -> reason, for statements that may scan or sort on purpose
+ALLOWED_FULL_SCANS: Dict[str, str] = {}
+
+USERS = 3
+TASKS_PER_USER = 300
+ARCHIVED_PER_USER = 50
+PASSWORD = "plan-test-password"
+
+_STATEMENT_KINDS = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+_SQLITE_SCAN = re.compile(r"^SCAN (\w+)")
+
+
+def expect_http_error(fn: Callable, *args, **kwargs):
+    with pytest.raises(HTTPException):
+        fn(*args, **kwargs)
+
+
+# (scenario, call) in execution order; ids come from the seeded dataset `d`
+SCENARIOS = [
+    ("get_all_tasks", lambda s, d: TaskService.get_all_tasks(s, d["user"])),
+    ("get_all_tasks_completed", lambda s, d: TaskService.get_all_tasks(s, d["user"], completed=True)),
+    ("get_all_task_rows", lambda s, d: TaskService.get_all_task_rows(s, d["user"])),
+    ("get_all_task_rows_completed", lambda s, d: TaskService.get_all_task_rows(s, d["user"], completed=False)),
+    ("get_all_task_rows_fields", lambda s, d: TaskService.get_all_task_rows(s, d["user"], columns=["id", "title", "completed"])),
+    ("get_all_task_rows_ordered", lambda s, d: TaskService.get_all_task_rows(s, d["user"], ordered=True)),
+    ("get_all_task_rows_archived", lambda s, d: TaskService.get_all_task_rows(s, d["user"], completed=True, include_archived=True)),
+    ("get_all_task_rows_ordered_archived", lambda s, d: TaskService.get_all_task_rows(s, d["user"], ordered=True, include_archived=True)),
+    ("get_all_task_rows_page", lambda s, d: TaskService.get_all_task_rows(s, d["user"], ordered=True, limit=50, offset=100)),
+    ("count_task_rows", lambda s, d: TaskService.count_task_rows(s, d["user"], completed=False)),
+    ("count_task_rows_archived", lambda s, d: TaskService.count_task_rows(s, d["user"], include_archived=True)),
+    ("get_task_row_by_id", lambda s, d: TaskService.get_task_row_by_id(s, d["user"], d["tasks"][0])),
+    ("get_task_row_by_id_archived", lambda s, d: TaskService.get_task_row_by_id(s, d["user"], d["archived"][0], include_archived=True)),
+    ("get_task_rows_by_ids", lambda s, d: TaskService.get_task_rows_by_ids(s, d["user"], d["tasks"][:5] + d["archived"][:2], include_archived=True)),
+    ("get_task_by_id", lambda s, d: TaskService.get_task_by_id(s, d["user"], d["tasks"][1])),
+    ("create_task", lambda s, d: TaskService.create_task(s, TaskCreate(title="New task", user_id=d["user"]))),
+    ("update_task", lambda s, d: TaskService.update_task(s, d["user"], d["tasks"][2], TaskUpdate(title="Renamed"))),
+    ("update_task_version_mismatch", lambda s, d: expect_http_error(
+        TaskService.update_task, s, d["user"], d["tasks"][3], TaskUpdate(title="Stale"), expected_version=999)),
+    ("update_task_restores_archived", lambda s, d: TaskService.update_task(s, d["user"], d["archived"][1], TaskUpdate(title="Restored"))),
+    ("toggle_task_completion", lambda s, d: TaskService.toggle_task_completion(s, d["user"], d["tasks"][4], True)),
+    ("move_task_between", lambda s, d: TaskService.move_task(s, d["user"], d["tasks"][10], after_id=d["tasks"][20], before_id=d["tasks"][21])),
+    ("move_task_after", lambda s, d: TaskService.move_task(s, d["user"], d["tasks"][11], after_id=d["tasks"][30])),
+    ("move_task_before", lambda s, d: TaskService.move_task(s, d["user"], d["tasks"][12], before_id=d["tasks"][40])),
+    ("rebalance_task_positions", lambda s, d: TaskService.rebalance_task_positions(s, d["user"])),
+    ("set_completion_for_all", lambda s, d: TaskService.set_completion_for_all(s, d["other_user"], True)),
+    ("delete_task", lambda s, d: TaskService.delete_task(s, d["user"], d["tasks"][5])),
+    ("delete_task_archived", lambda s, d: TaskService.delete_task(s, d["user"], d["archived"][2])),
+    ("delete_tasks_by_status", lambda s, d: TaskService.delete_tasks_by_status(s, d["other_user"], True)),
+    ("authenticate_user", lambda s, d: AuthService.authenticate_user(d["email"], PASSWORD, s)),
+    ("signup_new_user", lambda s, d: AuthService.signup_new_user(UserCreate(email="new-user@example.com", password=PASSWORD), s)),
+    ("signup_existing_email", lambda s, d: AuthService.signup_new_user(UserCreate(email=d["email"], password=PASSWORD), s)),
+    ("signin_existing_user", lambda s, d: AuthService.signin_existing_user({"email": d["email"], "password": PASSWORD}, s)),
+]
+
+
+def seed(engine) -> Dict[str, Any]:
+    """
+    Several users with live, soft-deleted and archived tasks, then planner statistics
+    """
+    SQLModel.metadata.drop_all(engine)
+    SQLModel.metadata.create_all(engine)
+    hashed_password = hash_password(PASSWORD)
+    now = datetime.utcnow()
+    data: Dict[str, Any] = {}
+
+    with Session(engine) as session:
+        users = [User(email=f"plan-{i}@example.com", hashed_password=hashed_password) for i in range(USERS)]
+        session.add_all(users)
+        session.flush()
+
+        for index, user in enumerate(users):
+            tasks = [
+                Task(user_id=user.id, title=f"Task {j}", completed=j % 3 == 0, position=key,
+                     deleted_at=now if j % 10 == 9 else None)
+                for j, key in enumerate(evenly_spaced_keys(TASKS_PER_USER))
+            ]
+            session.add_all(tasks)
+            session.flush()
+            archived_ids = [100_000 * (index + 1) + j for j in range(ARCHIVED_PER_USER)]
+            session.add_all(
+                ArchivedTask(id=task_id, user_id=user.id, title=f"Archived {task_id}", completed=True,
+                             position=f"Z{task_id}", created_at=now, updated_at=now)
+                for task_id in archived_ids
+            )
+            if index == 0:
+                data.update(user=user.id, email=user.email, archived=archived_ids,
+                            tasks=[task.id for task in tasks if task.deleted_at is None])
+            elif index == 1:
+                data["other_user"] = user.id
+        session.commit()
+
+    with engine.begin() as connection:
+        connection.exec_driver_sql("ANALYZE")
+    return data
+
+
+def explain(connection, statement: str, parameters) -> List[str]:
+    """
+    The statement's plan as indented lines
+    """
+    if connection.dialect.name == "sqlite":
+        rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+        depth = {0: -1}
+        lines = []
+        for node_id, parent, _, detail in rows:
+            depth[node_id] = depth.get(parent, -1) + 1
+            lines.append("  " * depth[node_id] + detail)
+        return lines
+
+    # Make the planner pick an index (and avoid a sort) whenever one can be used at all,
+    # so small test tables don't hide a missing index behind a cheap seq scan
+    connection.exec_driver_sql("SET enable_seqscan = off")
+    connection.exec_driver_sql("SET enable_sort = off")
+    document = connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters).scalar()
+    plan = (json.loads(document) if isinstance(document, str) else document)[0]["Plan"]
+    lines = []
+
+    def walk(node: Dict[str, Any], level: int):
+        line = node["Node Type"]
+        if "Relation Name" in node:
+            line += f" on {node['Relation Name']}"
+        if "Index Name" in node:
+            line += f" using {node['Index Name']}"
+        if "Index Cond" in node:
+            line += f" ({node['Index Cond']})"
+        if "Sort Key" in node:
+            line += f" by {', '.join(node['Sort Key'])}"
+        lines.append("  " * level + line)
+        for child in node.get("Plans", []):
+            walk(child, level + 1)
+
+    walk(plan, 0)
+    return lines
+
+
+def plan_problems(dialect: str, plan: List[str]) -> List[str]:
+    """
+    Full table or index scans and sorts on the hot tables
+    """
+    problems = []
+    for line in (line.strip() for line in plan):
+        if dialect == "sqlite":
+            scan = _SQLITE_SCAN.match(line)
+            if scan and scan.group(1) in HOT_TABLES:
+                problems.append(f"full scan: {line}")
+            if line.startswith("USE TEMP B-TREE"):
+                problems.append(f"sort: {line}")
+        else:
+            relation = line.split(" on ", 1)[1].split()[0] if " on " in line else None
+            if line.startswith("Seq Scan") and relation in HOT_TABLES:
+                problems.append(f"full scan: {line}")
+            if line.startswith(("Index Scan", "Index Only Scan")) and relation in HOT_TABLES and "(" not in line:
+                problems.append(f"full index scan: {line}")
+            if line.startswith(("Sort", "Incremental Sort")):
+                problems.append(f"sort: {line}")
+    return problems
+
+
+def server_version(connection) -> str:
+    if connection.dialect.name == "sqlite":
+        return connection.exec_driver_sql("SELECT sqlite_version()").scalar()
+    return connection.exec_driver_sql("SHOW server_version").scalar()
+
+
+@pytest.fixture(scope="module")
+def plans(request, tmp_path_factory) -> Dict[str, Any]:
+    """
+    Run every scenario once, in order, and EXPLAIN each distinct statement it sent
+    """
+    database_url = request.config.getoption("--plan-database-url") or f"sqlite:///{tmp_path_factory.mktemp('plans') / 'plans.db'}"
+    engine = create_engine(database_url)
+    data = seed(engine)
+    captured: List[tuple] = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _capture(connection, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(_STATEMENT_KINDS):
+            captured.append((statement, parameters[0] if executemany else parameters))
+
+    scenarios = {}
+    for name, call in SCENARIOS:
+        captured.clear()
+        with Session(engine) as session:
+            call(session, data)
+        # First parameters seen for each distinct statement, in the order they were sent
+        statements: Dict[str, Any] = {}
+        for statement, parameters in captured:
+            statements.setdefault(statement, parameters)
+        scenarios[name] = [{"statement": statement, "parameters": parameters} for statement, parameters in statements.items()]
+
+    event.remove(engine, "before_cursor_execute", _capture)
+    dialect = engine.dialect.name
+    with engine.connect() as connection:
+        version = server_version(connection)
+        for entries in scenarios.values():
+            for entry in entries:
+                entry["plan"] = explain(connection, entry["statement"], entry.pop("parameters"))
+                entry["statement"] = " ".join(entry["statement"].split())
+    engine.dispose()
+
+    result = {"dialect": dialect, "version": version, "scenarios": scenarios}
+    if request.config.getoption("--update-plans"):
+        os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+        with open(os.path.join(SNAPSHOT_DIR, f"{dialect}.json"), "w") as snapshot_file:
+            json.dump(result, snapshot_file, indent=2)
+            snapshot_file.write("\n")
+    return result
+
+
+@pytest.mark.parametrize("scenario", [name for name, _ in SCENARIOS])
+def test_no_full_scans_or_sorts(plans, scenario):
+    if scenario in ALLOWED_FULL_SCANS:
+        pytest.skip(ALLOWED_FULL_SCANS[scenario])
+
+    failures = []
+    for entry in plans["scenarios"][scenario]:
+        for problem in plan_problems(plans["dialect"], entry["plan"]):
+            failures.append(f"{problem}\n    in: {entry['statement']}")
+    assert not failures, f"{scenario} plans regressed:\n  " + "\n  ".join(failures)
+
+
+@pytest.mark.parametrize("scenario", [name for name, _ in SCENARIOS])
+def test_plans_match_snapshot(plans, scenario):
+    path = os.path.join(SNAPSHOT_DIR, f"{plans['dialect']}.json")
+    if not os.path.exists(path):
+        pytest.skip(f"No committed {plans['dialect']} plan snapshot; create it with --update-plans")
+    with open(path) as snapshot_file:
+        snapshot = json.load(snapshot_file)
+    if snapshot["version"] != plans["version"]:
+        pytest.skip(f"Snapshot was taken on {plans['dialect']} {snapshot['version']}, this is {plans['version']}")
+
+    assert scenario in snapshot["scenarios"], f"{scenario} has no plan snapshot; review it and run with --update-plans"
+    assert plans["scenarios"][scenario] == snapshot["scenarios"][scenario], (
+        f"Query plans for {scenario} changed; review the diff and run with --update-plans"
+    )
@@ -0,0 +1,98 @@
+"""
+Cold start budget: importing main and serving the first request
+
+Each measurement runs in a fresh interpreter against a freshly initialised SQLite
+file, so nothing cached by other tests hides import or warm-up cost. Importing
+main must not read settings, build engines, install log handlers or load modules
+that are only needed by a request (bcrypt, PyJWT, the OpenTelemetry SDK); that
+work belongs to building the app, the lifespan and the first request.
+
+Budgets can be raised on slow machines:
+    STARTUP_IMPORT_BUDGET_MS=4000 STARTUP_FIRST_REQUEST_BUDGET_MS=3000 python -m pytest benchmarks/test_startup.py -q
+"""
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from src.utils.jwt_utils import create_access_token
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_BUDGET_MS = float(os.environ.get("STARTUP_IMPORT_BUDGET_MS", 2500))
+FIRST_REQUEST_BUDGET_MS = float(os.environ.get("STARTUP_FIRST_REQUEST_BUDGET_MS", 1500))
+
+# Modules only a request (or an enabled feature) should pull in
+DEFERRED_MODULES = ("bcrypt", "jwt", "opentelemetry.sdk")
+
+COLD_START_SCRIPT = f"""
+import json, logging, os, sys, time
+
+start = time.perf_counter()
+import main
+import_ms = (time.perf_counter() - start) * 1000
+
+from src.config.settings import get_settings
+from src.database import database
+state = {{
+    "settings_built": get_settings.cache_info().currsize != 0,
+    "engines_built": database._engines is not None,
+    "log_handlers": len(logging.getLogger().handlers),
+    "loaded_deferred_modules": [name for name in {DEFERRED_MODULES!r} if name in sys.modules],
+}}
+
+from fastapi.testclient import TestClient
+start = time.perf_counter()
+with TestClient(main.app) as client:
+    response = client.get("/api/users/1/tasks", headers={{"Authorization": "Bearer " + os.environ["STARTUP_TOKEN"]}})
+    first_request_ms = (time.perf_counter() - start) * 1000
+
+print("cold-start " + json.dumps({{"import_ms": import_ms, "first_request_ms": first_request_ms, "status": response.status_code, **state}}), flush=True)
+"""
+
+
+def _run(args, env):
+    return subprocess.run([sys.executable, *args], cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=120)
+
+
+@pytest.fixture(scope="module")
+def cold_start(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("startup")
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{directory / 'startup.db'}",
+        "LOG_FILE": str(directory / "app.log"),
+        "TASK_PURGE_ENABLED": "false",
+        "TRACING_ENABLED": "false",
+        "TRAFFIC_CAPTURE_ENABLED": "false",
+        "STARTUP_TOKEN": create_access_token({"user_id": "1", "email": "startup@example.com"}),
+    }
+
+    init = _run(["init_db.py"], env)
+    assert init.returncode == 0, init.stderr
+
+    result = _run(["-c", COLD_START_SCRIPT], env)
+    assert result.returncode == 0, result.stderr
+    # Application logs share stdout
+    line = next(line for line in result.stdout.splitlines() if line.startswith("cold-start "))
+    measurements = json.loads(line.split(" ", 1)[1])
+    print(f"\ncold start: import {measurements['import_ms']:.0f} ms, first request {measurements['first_request_ms']:.0f} ms")
+    return measurements
+
+
+def test_import_has_no_side_effects(cold_start):
+    assert not cold_start["settings_built"], "importing main read the settings"
+    assert not cold_start["engines_built"], "importing main built the database engines"
+    assert cold_start["log_handlers"] == 0, "importing main installed log handlers"
+    assert cold_start["loaded_deferred_modules"] == [], "importing main loaded request-time modules"
+
+
+def test_import_within_budget(cold_start):
+    assert cold_start["import_ms"] <= IMPORT_BUDGET_MS
+
+
+def test_first_request_within_budget(cold_start):
+    assert cold_start["status"] == 200
+    assert cold_start["first_request_ms"] <= FIRST_REQUEST_BUDGET_MS
@@ -4,8 +4,9 @@ Creates all tables defined in SQLModel models
 """
 from sqlmodel import SQLModel
 from src.database.database import engine
-from src.models.task import Task
+from src.models.task import Task, ArchivedTask
 from src.models.auth import User
+from src.models.idempotency import IdempotencyKey
 
 def init_db():
     """Initialize database by creating all tables"""
@@ -1,34 +1,234 @@
-from fastapi import FastAPI
+import asyncio
+import logging
+import threading
+from contextlib import asynccontextmanager, suppress
+from typing import Optional
+from fastapi import APIRouter, FastAPI, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from src.api import tasks, auth_routes
-
-app = FastAPI(title="Todo API", version="1.0.0")
-
-# Configure CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=[
-        "http://localhost:3000",
-        "http://127.0.0.1:3000",
-        "http://localhost:3001",
-        "http://127.0.0.1:3001",
-        "http://localhost:3002",
-        "http://127.0.0.1:3002"
-    ],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# Include the task API routes
-app.include_router(tasks.router, prefix="/api", tags=["tasks"])
-# Include the auth API routes
-app.include_router(auth_routes.router, prefix="/api", tags=["auth"])
-
-@app.get("/")
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from src.api import tasks, auth_routes, admin
+from src.config.settings import settings
+from src.database.maintenance import maintenance_loop, get_maintenance_status
+from src.database.warmup import warm_up_database, check_readiness
+from src.middleware.admission import AdmissionControlMiddleware, AdmissionLimiter
+from src.middleware.capture import TrafficCaptureMiddleware, TrafficCaptureWriter
+from src.middleware.compression import CompressionMiddleware
+from src.middleware.deadline import DeadlineMiddleware
+from src.middleware.tracing import TracingMiddleware
+from src.services.idempotency_service import IdempotencyService
+from src.utils.deadline import DeadlineExceeded
+from src.utils.logging import setup_logging, get_dropped_log_count
+from src.utils.tracing import setup_tracing, shutdown_tracing, get_tracing_stats
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Process-wide side effects live here rather than at import, so importing main stays
+    # cheap and each gunicorn worker sets up its own listener thread and exporter
+    # Route application logs through the background queue listener
+    setup_logging()
+    # Configure the span exporter (no-op unless TRACING_ENABLED)
+    setup_tracing()
+
+    # Build the engines, open pooled connections and compile hot queries before taking traffic
+    await run_in_threadpool(warm_up_database)
+
+    traffic_capture = app.state.traffic_capture
+    if traffic_capture is not None:
+        traffic_capture.start()
+
+    # Purge soft-deleted tasks and compact the table off the request path
+    maintenance = asyncio.create_task(maintenance_loop()) if settings.TASK_PURGE_ENABLED else None
+    yield
+    if maintenance is not None:
+        maintenance.cancel()
+        with suppress(asyncio.CancelledError):
+            await maintenance
+
+    # Flush spans still waiting in the exporter queue
+    shutdown_tracing()
+
+    if traffic_capture is not None:
+        traffic_capture.close()
+
+
+def pool_timeout_handler(request, exc):
+    """
+    Connection pool exhausted: shed the request rather than failing with a 500
+    """
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Server is busy - please retry shortly"},
+        headers={"Retry-After": str(settings.ADMISSION_RETRY_AFTER_SECONDS)},
+    )
+
+
+def deadline_exceeded_handler(request, exc):
+    """
+    The request ran out of time (or its client disconnected) during a database call
+    """
+    return JSONResponse(status_code=504, content={"detail": "Request took too long and was cancelled"})
+
+
+# Service endpoints outside /api
+router = APIRouter()
+
+
+@router.get("/")
 def read_root():
     return {"message": "Welcome to the Todo API"}
 
-@app.get("/health")
+@router.get("/health")
 def health_check():
-    return {"status": "healthy"}
\ No newline at end of file
+    return {"status": "healthy"}
+
+@router.get("/ready")
+def readiness_check():
+    """
+    Readiness probe for the load balancer: database reachable and warm-up complete
+    """
+    readiness = check_readiness()
+    return JSONResponse(status_code=200 if readiness["ready"] else 503, content=readiness)
+
+
+@router.get("/metrics")
+def metrics(request: Request):
+    """
+    Process-local performance counters
+    """
+    state = request.app.state
+    return {
+        "task_list_coalescing": tasks.task_list_flight.stats(),
+        "idempotency": IdempotencyService.stats(),
+        "admission": {name: limiter.stats() for name, limiter in state.admission_limiters.items()},
+        "tracing": get_tracing_stats(),
+        "traffic_capture": state.traffic_capture.stats() if state.traffic_capture is not None else None,
+        "dropped_log_records": get_dropped_log_count(),
+        "task_maintenance": get_maintenance_status(),
+    }
+
+
+def create_app() -> FastAPI:
+    """
+    Build the application: middleware, limiters and the capture writer are configured
+    from settings here, so nothing reads the environment until the app is first used
+    """
+    app = FastAPI(title="Todo API", version="1.0.0", lifespan=lifespan)
+
+    # Opt-in recording of request shapes for replay load tests
+    traffic_capture = app.state.traffic_capture = TrafficCaptureWriter(
+        settings.TRAFFIC_CAPTURE_FILE,
+        settings.TRAFFIC_CAPTURE_QUEUE_SIZE,
+        header={"sample_ratio": settings.TRAFFIC_CAPTURE_SAMPLE_RATIO, "user_buckets": settings.TRAFFIC_CAPTURE_USER_BUCKETS},
+    ) if settings.TRAFFIC_CAPTURE_ENABLED else None
+
+    # Per-route-class budgets for DB-bound requests; /health, /ready and /metrics are never limited
+    admission_queue_timeout = settings.ADMISSION_QUEUE_TIMEOUT_MS / 1000
+    admission_limiters = app.state.admission_limiters = {
+        "auth": AdmissionLimiter(settings.ADMISSION_AUTH_CONCURRENCY, settings.ADMISSION_QUEUE_SIZE, admission_queue_timeout),
+        "task_reads": AdmissionLimiter(settings.ADMISSION_TASK_READ_CONCURRENCY, settings.ADMISSION_QUEUE_SIZE, admission_queue_timeout),
+        "task_writes": AdmissionLimiter(settings.ADMISSION_TASK_WRITE_CONCURRENCY, settings.ADMISSION_QUEUE_SIZE, admission_queue_timeout),
+    }
+    # Every class reads through the read pool; beyond its size requests wait on pool_timeout instead of a fast 503
+    pool_capacity = settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW
+    admitted = sum(limiter.max_concurrency for limiter in admission_limiters.values())
+    if settings.ADMISSION_CONTROL_ENABLED and admitted > pool_capacity:
+        logger.warning("Admission budgets admit %d concurrent requests but the read pool holds %d connections", admitted, pool_capacity)
+
+    # Deadline per route class, enforced as database statement timeouts; innermost so queue time
+    # in admission control does not count against it
+    app.add_middleware(
+        DeadlineMiddleware,
+        timeouts={
+            "auth": settings.REQUEST_DEADLINE_AUTH_MS / 1000,
+            "task_reads": settings.REQUEST_DEADLINE_TASK_READ_MS / 1000,
+            "task_writes": settings.REQUEST_DEADLINE_TASK_WRITE_MS / 1000,
+        },
+    )
+
+    if settings.ADMISSION_CONTROL_ENABLED:
+        # Added first so it runs inside CORS: rejections still carry CORS headers
+        app.add_middleware(
+            AdmissionControlMiddleware,
+            limiters=admission_limiters,
+            retry_after=settings.ADMISSION_RETRY_AFTER_SECONDS,
+        )
+
+    # Configure CORS
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=[
+            "http://localhost:3000",
+            "http://127.0.0.1:3000",
+            "http://localhost:3001",
+            "http://127.0.0.1:3001",
+            "http://localhost:3002",
+            "http://127.0.0.1:3002"
+        ],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    if traffic_capture is not None:
+        # Inside compression, so recorded response sizes and list totals come from the uncompressed body
+        app.add_middleware(
+            TrafficCaptureMiddleware,
+            writer=traffic_capture,
+            salt=settings.TRAFFIC_CAPTURE_SALT or settings.BETTER_AUTH_SECRET,
+            sample_ratio=settings.TRAFFIC_CAPTURE_SAMPLE_RATIO,
+            user_buckets=settings.TRAFFIC_CAPTURE_USER_BUCKETS,
+        )
+
+    # Compress large responses; added after CORS so it wraps the CORS-processed response
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+        gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+        brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+        cache_max_bytes=settings.COMPRESSION_CACHE_MAX_BYTES,
+    )
+
+    # Outermost, so the request span covers every other middleware
+    app.add_middleware(TracingMiddleware)
+
+    # Include the task API routes
+    app.include_router(tasks.router, prefix="/api", tags=["tasks"])
+    # Include the auth API routes
+    app.include_router(auth_routes.router, prefix="/api", tags=["auth"])
+    # Include the admin routes (profiling, memory snapshots, bulk user provisioning)
+    app.include_router(admin.router, prefix="/api", tags=["admin"])
+
+    app.include_router(router)
+
+    app.add_exception_handler(PoolTimeoutError, pool_timeout_handler)
+    app.add_exception_handler(DeadlineExceeded, deadline_exceeded_handler)
+
+    return app
+
+
+_app: Optional[FastAPI] = None
+_app_lock = threading.Lock()
+
+
+def get_app() -> FastAPI:
+    """
+    The application served by `main:app`, created on first use
+    """
+    global _app
+    if _app is None:
+        with _app_lock:
+            if _app is None:
+                _app = create_app()
+    return _app
+
+
+def __getattr__(name: str):
+    # `main:app` (uvicorn, gunicorn, `from main import app`) builds the app on access, not at import
+    if name == "app":
+        return get_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,56 @@
+"""
+Bulk user provisioning from the command line
+
+Creates users directly in DATABASE_URL, the same way as POST /api/admin/users/bulk:
+passwords are hashed in parallel on every core and users are inserted in batches.
+Input is a CSV file with an email,password[,name] header or a JSON-lines file of
+{"email", "password", "name"} objects. One JSON result per user is printed as its
+batch commits, followed by a summary line. Exits 1 if any entry was invalid.
+
+Usage (from the backend directory):
+    python provision_users.py users.csv
+    python provision_users.py users.jsonl --batch-size 500 --workers 8
+    cat users.csv | python provision_users.py - --format csv
+"""
+import argparse
+import csv
+import json
+import sys
+from typing import List, TextIO
+
+from src.models.auth import AuthRequest
+from src.services.provisioning_service import ProvisioningService
+
+
+def read_users(source: TextIO, input_format: str) -> List[AuthRequest]:
+    if input_format == "csv":
+        rows = csv.DictReader(source)
+    else:
+        rows = (json.loads(line) for line in source if line.strip())
+    return [AuthRequest(email=row["email"], password=row["password"], name=row.get("name") or None) for row in rows]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Create many user accounts at once")
+    parser.add_argument("input", help="CSV or JSON-lines file of users ('-' for stdin)")
+    parser.add_argument("--format", choices=["csv", "jsonl"], default=None, help="Input format (default: from the file extension)")
+    parser.add_argument("--batch-size", type=int, default=None, help="Users per INSERT (default: PROVISIONING_BATCH_SIZE)")
+    parser.add_argument("--workers", type=int, default=None, help="Password hashing threads (default: one per CPU)")
+    args = parser.parse_args(argv)
+
+    input_format = args.format or ("csv" if args.input.endswith(".csv") else "jsonl")
+    if args.input == "-":
+        users = read_users(sys.stdin, input_format)
+    else:
+        with open(args.input, newline="", encoding="utf-8") as source:
+            users = read_users(source, input_format)
+
+    invalid = 0
+    for result in ProvisioningService.provision_users(users, batch_size=args.batch_size, workers=args.workers):
+        print(json.dumps(result), flush=True)
+        invalid = result.get("summary", {}).get("invalid", invalid)
+    return 1 if invalid else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
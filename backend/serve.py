@@ -0,0 +1,120 @@
+"""
+Production server entrypoint
+
+Runs main:app under gunicorn with uvicorn workers (uvloop + httptools):
+- one worker per CPU available to the container, honouring cgroup CPU quotas
+- the app is imported once in the master and shared copy-on-write by workers
+- workers are recycled after WORKER_MAX_REQUESTS (with jitter) to bound memory growth
+- SIGTERM drains in-flight requests for up to GRACEFUL_TIMEOUT seconds
+
+Usage (from the backend directory):
+    python serve.py
+"""
+import math
+import os
+
+from gunicorn.app.base import BaseApplication
+from uvicorn_worker import UvicornWorker
+
+from src.config.settings import settings
+
+
+def _cgroup_cpu_limit():
+    """
+    CPU limit imposed by the container's cgroup, or None when unlimited
+    """
+    # cgroup v2: "<quota> <period>" or "max <period>"
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as cpu_max:
+            quota, period = cpu_max.read().split()
+        if quota != "max":
+            return int(quota) / int(period)
+        return None
+    except (OSError, ValueError):
+        pass
+
+    # cgroup v1: quota of -1 means unlimited
+    try:
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as quota_file:
+            quota = int(quota_file.read())
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as period_file:
+            period = int(period_file.read())
+        if quota > 0 and period > 0:
+            return quota / period
+    except (OSError, ValueError):
+        pass
+
+    return None
+
+
+def available_cpus() -> int:
+    """
+    Number of CPUs this process may actually use
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+
+    limit = _cgroup_cpu_limit()
+    if limit is not None:
+        cpus = min(cpus, math.ceil(limit))
+
+    return max(1, cpus)
+
+
+class ProductionUvicornWorker(UvicornWorker):
+    """
+    Uvicorn worker pinned to uvloop/httptools with graceful connection draining
+    """
+    CONFIG_KWARGS = {
+        "loop": "uvloop",
+        "http": "httptools",
+        # Finish before gunicorn's own graceful timeout force-kills the worker
+        "timeout_graceful_shutdown": max(1, settings.GRACEFUL_TIMEOUT - 1),
+    }
+
+
+def post_fork(server, worker):
+    """
+    Reset state inherited from the master that must not be shared across processes
+    """
+    from src.database.database import dispose_engines
+
+    # Logging and tracing are set up by each worker's lifespan, so nothing to restart here.
+    # Never reuse connections opened by the master; each worker warms its own pool
+    dispose_engines(close=False)
+
+
+class TodoApplication(BaseApplication):
+    def __init__(self, options):
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        from main import app
+        return app
+
+
+def build_options():
+    return {
+        "bind": f"{settings.HOST}:{settings.PORT}",
+        "workers": settings.WORKERS or available_cpus(),
+        "worker_class": ProductionUvicornWorker,
+        "preload_app": True,
+        "max_requests": settings.WORKER_MAX_REQUESTS,
+        "max_requests_jitter": settings.WORKER_MAX_REQUESTS_JITTER,
+        "timeout": settings.WORKER_TIMEOUT,
+        "graceful_timeout": settings.GRACEFUL_TIMEOUT,
+        "keepalive": settings.KEEPALIVE,
+        "post_fork": post_fork,
+        "loglevel": settings.LOG_LEVEL.lower(),
+    }
+
+
+if __name__ == "__main__":
+    TodoApplication(build_options()).run()
@@ -0,0 +1,106 @@
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from typing import Any, Dict, Optional
+from ..config.settings import settings
+from ..models.auth import BulkProvisionRequest
+from ..services.provisioning_service import ProvisioningService
+from ..utils.profiling import (
+    collapsed_stacks,
+    diff_memory_snapshots,
+    get_memory_status,
+    profile_cpu,
+    stop_memory_tracing,
+    take_memory_snapshot,
+)
+from ..utils.tracing import TracedRoute
+from .deps import require_admin
+
+# Every route here needs the X-Admin-Token header; all of them 404 while ADMIN_API_TOKEN is unset
+router = APIRouter(route_class=TracedRoute, dependencies=[Depends(require_admin)])
+
+GROUP_BY_QUERY = Query("lineno", pattern="^(lineno|filename|traceback)$", description="Group allocations by line, file or full traceback")
+
+LIMIT_QUERY = Query(25, ge=1, le=500, description="Number of allocation sites to return")
+
+
+@router.get("/admin/profile/cpu")
+def cpu_profile(
+    seconds: float = Query(10, gt=0, description="How long to sample for (at most PROFILER_MAX_SECONDS)"),
+    interval_ms: Optional[int] = Query(None, ge=1, le=1000, description="Time between stack samples (default PROFILER_INTERVAL_MS)"),
+    format: str = Query("collapsed", pattern="^(collapsed|json)$", description="'collapsed' folded stacks or a 'json' summary"),
+    include_idle: bool = Query(False, description="Also count threads parked in selectors, queues and locks"),
+):
+    """
+    Sample the live process's stacks for `seconds` and return them as folded
+    stacks (pipe into flamegraph.pl or open in speedscope) or a JSON summary
+    """
+    # Limits come from settings here rather than in Query(), which would read them at import
+    if seconds > settings.PROFILER_MAX_SECONDS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"seconds must be at most {settings.PROFILER_MAX_SECONDS}"
+        )
+    if interval_ms is None:
+        interval_ms = settings.PROFILER_INTERVAL_MS
+
+    profile = profile_cpu(seconds, interval_ms / 1000, include_idle)
+    if format == "collapsed":
+        return PlainTextResponse(collapsed_stacks(profile["stacks"]))
+
+    profile["stacks"] = collapsed_stacks(profile["stacks"])
+    return profile
+
+
+@router.get("/admin/memory")
+def memory_status() -> Dict[str, Any]:
+    """
+    Whether tracemalloc is running, how much it tracks, and the stored snapshot ids
+    """
+    return get_memory_status()
+
+
+@router.post("/admin/memory/snapshots")
+def create_memory_snapshot(limit: int = LIMIT_QUERY, group_by: str = GROUP_BY_QUERY) -> Dict[str, Any]:
+    """
+    Take a tracemalloc snapshot (starting tracemalloc on first use) and return its top allocation sites
+    """
+    return take_memory_snapshot(limit, group_by)
+
+
+@router.get("/admin/memory/diff")
+def memory_diff(
+    base: int = Query(..., description="Snapshot id to compare against"),
+    target: Optional[int] = Query(None, description="Snapshot id to compare (default: take a new snapshot)"),
+    limit: int = LIMIT_QUERY,
+    group_by: str = GROUP_BY_QUERY,
+) -> Dict[str, Any]:
+    """
+    Allocation sites that grew the most between two snapshots
+    """
+    return diff_memory_snapshots(base, target, limit, group_by)
+
+
+@router.delete("/admin/memory")
+def stop_memory() -> Dict[str, Any]:
+    """
+    Stop tracemalloc and discard snapshots
+    """
+    return stop_memory_tracing()
+
+
+@router.post("/admin/users/bulk")
+def provision_users(request: BulkProvisionRequest):
+    """
+    Create many accounts at once, e.g. when onboarding an organisation
+    Streams newline-delimited JSON: one {"index", "email", "status", ...} line per
+    user as its batch commits, then a {"summary": {...}} line.
+    """
+    if len(request.users) > settings.PROVISIONING_MAX_USERS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.PROVISIONING_MAX_USERS} users per request"
+        )
+
+    results = ProvisioningService.provision_users(request.users)
+    return StreamingResponse((json.dumps(result) + "\n" for result in results), media_type="application/x-ndjson")
@@ -5,8 +5,9 @@ from ..models.auth import AuthRequest, AuthResponse
 from ..services.auth_service import AuthService
 from ..database.database import get_session
 from ..config.settings import settings
+from ..utils.tracing import TracedRoute
 
-router = APIRouter()
+router = APIRouter(route_class=TracedRoute)
 
 
 @router.post("/auth/signup")
@@ -1,7 +1,9 @@
-from fastapi import Depends, HTTPException, status
+import hmac
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from sqlmodel import Session
+from ..config.settings import settings
 from ..utils.jwt_utils import verify_token, decode_token_payload
 from ..database.database import get_session as get_database_session
 from datetime import datetime
@@ -76,4 +78,19 @@ def get_current_active_user(current_user: Dict[str, Any] = Depends(get_current_u
     # - Checking additional permissions
 
     # For now, we'll just return the user data
-    return current_user
\ No newline at end of file
+    return current_user
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """
+    Dependency guarding the admin endpoints with the shared ADMIN_API_TOKEN
+    The endpoints don't exist (404) until a token is configured
+    """
+    if not settings.ADMIN_API_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+
+    if not x_admin_token or not hmac.compare_digest(x_admin_token.encode(), settings.ADMIN_API_TOKEN.encode()):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid admin token"
+        )
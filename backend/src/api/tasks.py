@@ -1,17 +1,165 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException, Response, status, Query
 from pydantic import BaseModel
 from sqlmodel import Session
-from typing import List, Optional
+from typing import List, Optional, Tuple
+from ..config.settings import settings
+from ..database.database import RoutingSession
 from ..models.task import Task, TaskCreate, TaskCreateRequest, TaskUpdate
 from ..services.task_service import TaskService
+from ..services.idempotency_service import IdempotencyService
+from ..utils.idempotency import MAX_IDEMPOTENCY_KEY_LENGTH, request_fingerprint
+from ..utils.singleflight import SingleFlight
+from ..utils.tracing import TracedRoute
 from .deps import get_current_user, get_db_session
 
 
+class TaskMove(BaseModel):
+    after_id: Optional[int] = None  # Task that should come directly before the moved task
+    before_id: Optional[int] = None  # Task that should come directly after it
+
+
 class TaskCompletionToggle(BaseModel):
     completed: bool
+    version: Optional[int] = None  # Expected current version (alternative to If-Match)
+
+
+router = APIRouter(route_class=TracedRoute)
+
+# Concurrent identical list reads share one query and one serialized result
+task_list_flight = SingleFlight()
+
+
+def forget_task_lists(user_id: int):
+    """
+    Called after a write so list reads arriving later run their own query
+    instead of joining one that started before the write committed
+    """
+    task_list_flight.forget(lambda key: key[0] == user_id)
+
+
+def format_task(task: Task) -> dict:
+    """
+    Convert a task (or a row from TaskService.get_all_task_rows) into the
+    camelCase dict shape the frontend expects
+    """
+    return {
+        "id": str(task.id),
+        "userId": str(task.user_id),
+        "title": task.title,
+        "description": task.description,
+        "completed": task.completed,
+        "version": task.version,
+        "createdAt": task.created_at.isoformat() if task.created_at else None,
+        "updatedAt": task.updated_at.isoformat() if task.updated_at else None,
+    }
+
 
+# API field name -> (Task column, formatter) for sparse fieldsets (?fields=id,title,completed)
+TASK_FIELDS = {
+    "id": ("id", lambda task: str(task.id)),
+    "userId": ("user_id", lambda task: str(task.user_id)),
+    "title": ("title", lambda task: task.title),
+    "description": ("description", lambda task: task.description),
+    "completed": ("completed", lambda task: task.completed),
+    "version": ("version", lambda task: task.version),
+    "createdAt": ("created_at", lambda task: task.created_at.isoformat() if task.created_at else None),
+    "updatedAt": ("updated_at", lambda task: task.updated_at.isoformat() if task.updated_at else None),
+}
 
-router = APIRouter()
+
+def parse_fields(fields: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """
+    Validate a comma-separated fields= value; None means all fields
+    id is always returned, so clients can key what they get back
+    """
+    if fields is None:
+        return None
+
+    requested = tuple(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    unknown = [name for name in requested if name not in TASK_FIELDS]
+    if not requested or unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid fields: {', '.join(unknown) or '(empty)'}. Allowed: {', '.join(TASK_FIELDS)}"
+        )
+
+    return tuple(dict.fromkeys(("id", *requested)))
+
+
+def field_columns(fields: Optional[Tuple[str, ...]]) -> Optional[List[str]]:
+    return [TASK_FIELDS[name][0] for name in fields] if fields else None
+
+
+def format_task_fields(task, fields: Optional[Tuple[str, ...]]) -> dict:
+    """
+    Like format_task, but only for the requested fields
+    """
+    if fields is None:
+        return format_task(task)
+    return {name: TASK_FIELDS[name][1](task) for name in fields}
+
+
+def parse_if_match(if_match: Optional[str], body_version: Optional[int]) -> Optional[int]:
+    """
+    Expected task version from an If-Match header ("3", W/"3" or *) or the body's version field
+    The header wins when both are given; None means no precondition
+    """
+    if if_match is None:
+        return body_version
+
+    value = if_match.strip()
+    if value == "*":
+        return None
+    if value.startswith("W/"):
+        value = value[2:]
+    try:
+        return int(value.strip('"'))
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="If-Match must be a task version ETag, e.g. \"3\""
+        )
+
+
+def set_etag(response: Response, task):
+    """
+    Expose the task version as an ETag for use in If-Match
+    Accepts a task, a row or an already formatted task dict
+    """
+    version = task.get("version") if isinstance(task, dict) else getattr(task, "version", None)
+    if version is not None:
+        response.headers["ETag"] = f'"{version}"'
+
+
+def run_idempotent(session: Session, user_id: int, idempotency_key: Optional[str], fingerprint: str, response: Response, write):
+    """
+    Run a write at most once per (user, Idempotency-Key) within the TTL
+    `write(commit)` returns the response body; with a key it is called with
+    commit=False and committed together with the stored response. Retries get
+    the first response back, marked with Idempotent-Replayed: true.
+    Without a key the write simply runs.
+    """
+    if idempotency_key is None:
+        return write(commit=True)
+
+    if not idempotency_key.strip() or len(idempotency_key) > MAX_IDEMPOTENCY_KEY_LENGTH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Idempotency-Key must be 1-{MAX_IDEMPOTENCY_KEY_LENGTH} characters"
+        )
+
+    result, replayed = IdempotencyService.run(session, user_id, idempotency_key, fingerprint, lambda: write(commit=False))
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return result
+
+
+# Upper bound on ids accepted by the batch read endpoint
+MAX_BATCH_IDS = 100
+
+FIELDS_QUERY = Query(None, description="Comma-separated fields to return, e.g. id,title,completed")
+
+INCLUDE_ARCHIVED_QUERY = Query(False, description="Also return archived (old completed) tasks")
 
 
 @router.get("/users/{user_id}/tasks", response_model=dict)
@@ -20,6 +168,9 @@ def get_all_tasks(
     completed: Optional[bool] = Query(None, description="Filter by completion status"),
     limit: int = Query(50, ge=1, le=100, description="Maximum number of tasks to return"),
     offset: int = Query(0, ge=0, description="Number of tasks to skip"),
+    fields: Optional[str] = FIELDS_QUERY,
+    sort: Optional[str] = Query(None, pattern="^position$", description="'position' returns tasks in their manual order"),
+    include_archived: bool = INCLUDE_ARCHIVED_QUERY,
     current_user_data: dict = Depends(get_current_user),
     session: Session = Depends(get_db_session)
 ):
@@ -33,34 +184,33 @@ def get_all_tasks(
             detail="Access denied - you can only access your own tasks"
         )
 
-    tasks = TaskService.get_all_tasks(session, user_id, completed)
-
-    # Apply limit and offset
-    start_idx = offset
-    end_idx = start_idx + limit
-    paginated_tasks = tasks[start_idx:end_idx]
-
-    # Convert tasks to dict with proper formatting
-    formatted_tasks = []
-    for task in paginated_tasks:
-        task_dict = {
-            "id": str(task.id),
-            "userId": str(task.user_id),
-            "title": task.title,
-            "description": task.description,
-            "completed": task.completed,
-            "createdAt": task.created_at.isoformat() if task.created_at else None,
-            "updatedAt": task.updated_at.isoformat() if task.updated_at else None,
+    selected_fields = parse_fields(fields)
+
+    def load_page():
+        tasks = TaskService.get_all_task_rows(
+            session, user_id, completed, field_columns(selected_fields),
+            ordered=sort == "position", include_archived=include_archived,
+            limit=limit, offset=offset,
+        )
+
+        # A short, non-empty page (or an empty first page) is the last one, so the total is known
+        if len(tasks) < limit and (tasks or offset == 0):
+            total = offset + len(tasks)
+        else:
+            total = TaskService.count_task_rows(session, user_id, completed, include_archived)
+
+        # Convert tasks to dict with proper formatting
+        formatted_tasks = [format_task_fields(task, selected_fields) for task in tasks]
+
+        return {
+            "success": True,
+            "tasks": formatted_tasks,
+            "total": total,
+            "limit": limit,
+            "offset": offset
         }
-        formatted_tasks.append(task_dict)
 
-    return {
-        "success": True,
-        "tasks": formatted_tasks,
-        "total": len(tasks),
-        "limit": limit,
-        "offset": offset
-    }
+    return task_list_flight.do((user_id, completed, limit, offset, selected_fields, sort, include_archived), load_page)
 
 
 @router.post("/users/{user_id}/tasks", response_model=dict, status_code=status.HTTP_201_CREATED)
@@ -68,10 +218,14 @@ def create_task(
     user_id: int,
     task_request: TaskCreateRequest,
     current_user_data: dict = Depends(get_current_user),
-    session: Session = Depends(get_db_session)
+    session: Session = Depends(get_db_session),
+    idempotency_key: Optional[str] = Header(None),
+    response: Response = None
 ):
     """
     Create a new task for a user
+    Send an Idempotency-Key header to make retries safe: a retry returns the
+    task created by the first request instead of creating a duplicate
     """
     # Verify that the user_id in the URL matches the authenticated user's ID
     if str(current_user_data["user_id"]) != str(user_id):
@@ -88,22 +242,66 @@ def create_task(
         user_id=user_id
     )
 
-    task = TaskService.create_task(session, task_create)
+    def create(commit: bool):
+        task = TaskService.create_task(session, task_create, commit=commit)
+
+        # Format task response
+        return {
+            "success": True,
+            "task": format_task(task)
+        }
+
+    fingerprint = request_fingerprint("create_task", task_request.dict())
+    result = run_idempotent(session, user_id, idempotency_key, fingerprint, response, create)
+    forget_task_lists(user_id)
+    set_etag(response, result["task"])
+
+    return result
 
-    # Format task response
-    task_dict = {
-        "id": str(task.id),
-        "userId": str(task.user_id),
-        "title": task.title,
-        "description": task.description,
-        "completed": task.completed,
-        "createdAt": task.created_at.isoformat() if task.created_at else None,
-        "updatedAt": task.updated_at.isoformat() if task.updated_at else None,
-    }
+
+# Declared before /tasks/{task_id} so "batch" is not parsed as a task id
+@router.get("/users/{user_id}/tasks/batch", response_model=dict)
+def get_tasks_by_ids(
+    user_id: int,
+    ids: str = Query(..., description=f"Comma-separated task ids, at most {MAX_BATCH_IDS}"),
+    fields: Optional[str] = FIELDS_QUERY,
+    include_archived: bool = INCLUDE_ARCHIVED_QUERY,
+    current_user_data: dict = Depends(get_current_user),
+    session: Session = Depends(get_db_session)
+):
+    """
+    Get several tasks by ID in one request; ids that don't exist (or belong to
+    another user) are returned in `missing`
+    """
+    # Verify that the user_id in the URL matches the authenticated user's ID
+    if str(current_user_data["user_id"]) != str(user_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied - you can only access your own tasks"
+        )
+
+    try:
+        task_ids = list(dict.fromkeys(int(value) for value in ids.split(",") if value.strip()))
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="'ids' must be a comma-separated list of integers"
+        )
+
+    if not task_ids or len(task_ids) > MAX_BATCH_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"'ids' must contain between 1 and {MAX_BATCH_IDS} task ids"
+        )
+
+    selected_fields = parse_fields(fields)
+    rows = TaskService.get_task_rows_by_ids(session, user_id, task_ids, field_columns(selected_fields), include_archived)
+    found = {row.id: row for row in rows}
 
     return {
         "success": True,
-        "task": task_dict
+        "tasks": [format_task_fields(found[task_id], selected_fields) for task_id in task_ids if task_id in found],
+        "missing": [str(task_id) for task_id in task_ids if task_id not in found],
     }
 
 
@@ -111,8 +309,11 @@ def create_task(
 def get_task_by_id(
     user_id: int,
     task_id: int,
+    fields: Optional[str] = FIELDS_QUERY,
+    include_archived: bool = INCLUDE_ARCHIVED_QUERY,
     current_user_data: dict = Depends(get_current_user),
-    session: Session = Depends(get_db_session)
+    session: Session = Depends(get_db_session),
+    response: Response = None
 ):
     """
     Get a specific task by ID for a user
@@ -124,18 +325,12 @@ def get_task_by_id(
             detail="Access denied - you can only access your own tasks"
         )
 
-    task = TaskService.get_task_by_id(session, user_id, task_id)
+    selected_fields = parse_fields(fields)
+    task = TaskService.get_task_row_by_id(session, user_id, task_id, field_columns(selected_fields), include_archived)
 
     # Format task response
-    task_dict = {
-        "id": str(task.id),
-        "userId": str(task.user_id),
-        "title": task.title,
-        "description": task.description,
-        "completed": task.completed,
-        "createdAt": task.created_at.isoformat() if task.created_at else None,
-        "updatedAt": task.updated_at.isoformat() if task.updated_at else None,
-    }
+    task_dict = format_task_fields(task, selected_fields)
+    set_etag(response, task)
 
     return {
         "success": True,
@@ -149,7 +344,9 @@ def update_task(
     task_id: int,
     task_update: TaskUpdate,
     current_user_data: dict = Depends(get_current_user),
-    session: Session = Depends(get_db_session)
+    session: Session = Depends(get_db_session),
+    if_match: Optional[str] = Header(None),
+    response: Response = None
 ):
     """
     Update an existing task for a user
@@ -161,18 +358,14 @@ def update_task(
             detail="Access denied - you can only update your own tasks"
         )
 
-    updated_task = TaskService.update_task(session, user_id, task_id, task_update)
+    # Optimistic concurrency: 412 if the task changed since the client read it
+    expected_version = parse_if_match(if_match, task_update.version)
+    updated_task = TaskService.update_task(session, user_id, task_id, task_update, expected_version)
+    forget_task_lists(user_id)
 
     # Format task response
-    task_dict = {
-        "id": str(updated_task.id),
-        "userId": str(updated_task.user_id),
-        "title": updated_task.title,
-        "description": updated_task.description,
-        "completed": updated_task.completed,
-        "createdAt": updated_task.created_at.isoformat() if updated_task.created_at else None,
-        "updatedAt": updated_task.updated_at.isoformat() if updated_task.updated_at else None,
-    }
+    task_dict = format_task(updated_task)
+    set_etag(response, updated_task)
 
     return {
         "success": True,
@@ -198,6 +391,7 @@ def delete_task(
         )
 
     TaskService.delete_task(session, user_id, task_id)
+    forget_task_lists(user_id)
 
     return {
         "success": True,
@@ -211,7 +405,9 @@ def toggle_task_completion(
     task_id: int,
     task_completion: TaskCompletionToggle,
     current_user_data: dict = Depends(get_current_user),
-    session: Session = Depends(get_db_session)
+    session: Session = Depends(get_db_session),
+    if_match: Optional[str] = Header(None),
+    response: Response = None
 ):
     """
     Toggle the completion status of a task
@@ -231,20 +427,125 @@ def toggle_task_completion(
             detail="'completed' field must be a boolean value"
         )
 
-    updated_task = TaskService.toggle_task_completion(session, user_id, task_id, completed)
+    expected_version = parse_if_match(if_match, task_completion.version)
+    updated_task = TaskService.toggle_task_completion(session, user_id, task_id, completed, expected_version)
+    forget_task_lists(user_id)
 
     # Format task response
-    task_dict = {
-        "id": str(updated_task.id),
-        "userId": str(updated_task.user_id),
-        "title": updated_task.title,
-        "description": updated_task.description,
-        "completed": updated_task.completed,
-        "createdAt": updated_task.created_at.isoformat() if updated_task.created_at else None,
-        "updatedAt": updated_task.updated_at.isoformat() if updated_task.updated_at else None,
-    }
+    task_dict = format_task(updated_task)
+    set_etag(response, updated_task)
 
     return {
         "success": True,
         "task": task_dict
-    }
\ No newline at end of file
+    }
+
+
+@router.patch("/users/{user_id}/tasks/complete", response_model=dict)
+def set_completion_for_all_tasks(
+    user_id: int,
+    task_completion: TaskCompletionToggle,
+    current_user_data: dict = Depends(get_current_user),
+    session: Session = Depends(get_db_session),
+    idempotency_key: Optional[str] = Header(None),
+    response: Response = None
+):
+    """
+    Mark all of a user's tasks as completed (or not completed) in one statement
+    Accepts an Idempotency-Key header like task creation
+    """
+    # Verify that the user_id in the URL matches the authenticated user's ID
+    if str(current_user_data["user_id"]) != str(user_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied - you can only modify your own tasks"
+        )
+
+    def set_completion(commit: bool):
+        affected = TaskService.set_completion_for_all(session, user_id, task_completion.completed, commit=commit)
+
+        return {
+            "success": True,
+            "affected": affected
+        }
+
+    fingerprint = request_fingerprint("set_completion_for_all", task_completion.completed)
+    result = run_idempotent(session, user_id, idempotency_key, fingerprint, response, set_completion)
+    forget_task_lists(user_id)
+
+    return result
+
+
+@router.delete("/users/{user_id}/tasks", response_model=dict)
+def delete_tasks_by_status(
+    user_id: int,
+    completed: bool = Query(..., description="Delete tasks with this completion status"),
+    current_user_data: dict = Depends(get_current_user),
+    session: Session = Depends(get_db_session),
+    idempotency_key: Optional[str] = Header(None),
+    response: Response = None
+):
+    """
+    Delete all of a user's tasks matching a completion status in one statement,
+    e.g. DELETE /users/{user_id}/tasks?completed=true to clear completed tasks
+    Accepts an Idempotency-Key header like task creation
+    """
+    # Verify that the user_id in the URL matches the authenticated user's ID
+    if str(current_user_data["user_id"]) != str(user_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied - you can only delete your own tasks"
+        )
+
+    def delete_by_status(commit: bool):
+        affected = TaskService.delete_tasks_by_status(session, user_id, completed, commit=commit)
+
+        return {
+            "success": True,
+            "affected": affected
+        }
+
+    fingerprint = request_fingerprint("delete_tasks_by_status", completed)
+    result = run_idempotent(session, user_id, idempotency_key, fingerprint, response, delete_by_status)
+    forget_task_lists(user_id)
+
+    return result
+
+
+def rebalance_task_positions(user_id: int):
+    """
+    Background job: respace a user's order keys once they have grown too long
+    """
+    with RoutingSession() as session:
+        TaskService.rebalance_task_positions(session, user_id)
+
+
+@router.patch("/users/{user_id}/tasks/{task_id}/move", response_model=dict)
+def move_task(
+    user_id: int,
+    task_id: int,
+    task_move: TaskMove,
+    background_tasks: BackgroundTasks,
+    current_user_data: dict = Depends(get_current_user),
+    session: Session = Depends(get_db_session)
+):
+    """
+    Move a task in the user's manual order, between after_id and before_id
+    """
+    # Verify that the user_id in the URL matches the authenticated user's ID
+    if str(current_user_data["user_id"]) != str(user_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied - you can only modify your own tasks"
+        )
+
+    position = TaskService.move_task(session, user_id, task_id, task_move.after_id, task_move.before_id)
+    forget_task_lists(user_id)
+
+    if len(position) > settings.TASK_ORDER_KEY_MAX_LENGTH:
+        background_tasks.add_task(rebalance_task_positions, user_id)
+
+    return {
+        "success": True,
+        "message": "Task moved successfully"
+    }
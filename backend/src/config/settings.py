@@ -1,3 +1,4 @@
+from functools import lru_cache
 from pydantic_settings import BaseSettings
 from typing import Optional
 
@@ -10,13 +11,131 @@ class Settings(BaseSettings):
 
     # Database settings
     DATABASE_URL: str = "sqlite:///./todo_app.db"  # Default, should be overridden
+    DB_WARMUP_CONNECTIONS: int = 2  # Pooled connections opened at startup before serving
+    DB_POOL_SIZE: int = 5  # Read pool connections kept open (PostgreSQL: the only pool)
+    DB_MAX_OVERFLOW: int = 10  # Extra read connections opened under load
+    READINESS_TIMEOUT_MS: int = 1000  # /ready gives up on the database after this long
+
+    # SQLite engine profile (file databases only): WAL, relaxed fsync, single writer connection
+    SQLITE_TUNED: bool = True
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_MMAP_SIZE: int = 268435456  # 256 MB
+    SQLITE_CACHE_SIZE_KB: int = 65536  # Per connection page cache
 
     # Application settings
     ENVIRONMENT: str = "development"
     LOG_LEVEL: str = "INFO"
 
+    # Server settings (used by serve.py)
+    HOST: str = "0.0.0.0"
+    PORT: int = 7860
+    WORKERS: int = 0  # 0 = one worker per CPU available to the container
+    WORKER_MAX_REQUESTS: int = 10000  # Recycle a worker after this many requests (0 = never)
+    WORKER_MAX_REQUESTS_JITTER: int = 1000  # Spread recycling so workers don't restart together
+    WORKER_TIMEOUT: int = 60  # Seconds a silent worker is allowed before it is restarted
+    GRACEFUL_TIMEOUT: int = 30  # Seconds to drain in-flight requests on shutdown or recycle
+    KEEPALIVE: int = 5
+
+    # Manual task ordering: respace a user's order keys once any key grows past this length
+    TASK_ORDER_KEY_MAX_LENGTH: int = 24
+
+    # Task archival, soft-deleted task purge and table compaction (background worker)
+    TASK_PURGE_ENABLED: bool = True
+    TASK_PURGE_INTERVAL_SECONDS: int = 60
+    TASK_PURGE_GRACE_SECONDS: int = 300  # Tombstones younger than this are kept
+    TASK_PURGE_BATCH_SIZE: int = 500  # Rows hard-deleted per transaction
+    TASK_PURGE_MAX_BATCHES: int = 20  # Per run; the rest waits for the next run
+    TASK_ARCHIVE_AFTER_DAYS: int = 0  # Completed tasks untouched this long move to archived_tasks (0 = off)
+    TASK_ARCHIVE_BATCH_SIZE: int = 500
+    TASK_ARCHIVE_MAX_BATCHES: int = 20
+    TASK_COMPACTION_INTERVAL_SECONDS: int = 3600  # VACUUM/ANALYZE after a purge, at most this often
+    SQLITE_INCREMENTAL_VACUUM_PAGES: int = 2000  # Free pages returned to the OS per compaction
+
+    # Admission control: concurrent DB-bound requests per route class, beyond which requests get a fast 503
+    # Every class reads through the read pool, so the three budgets together must stay
+    # within DB_POOL_SIZE + DB_MAX_OVERFLOW (3 + 8 + 4 = 15 by default)
+    ADMISSION_CONTROL_ENABLED: bool = True
+    ADMISSION_AUTH_CONCURRENCY: int = 3  # Signup/signin are bcrypt-bound
+    ADMISSION_TASK_READ_CONCURRENCY: int = 8
+    ADMISSION_TASK_WRITE_CONCURRENCY: int = 4  # Writes also share one SQLite writer connection
+    ADMISSION_QUEUE_SIZE: int = 16  # Requests allowed to wait for a slot, per class
+    ADMISSION_QUEUE_TIMEOUT_MS: int = 1000  # Longest wait for a slot before a 503 (vs the 30 s pool timeout)
+    ADMISSION_RETRY_AFTER_SECONDS: int = 1
+
+    # Request deadlines per route class, applied as database statement timeouts (0 = no deadline)
+    REQUEST_DEADLINE_AUTH_MS: int = 10000
+    REQUEST_DEADLINE_TASK_READ_MS: int = 5000
+    REQUEST_DEADLINE_TASK_WRITE_MS: int = 10000
+    SQLITE_PROGRESS_HANDLER_STEPS: int = 1000  # SQLite VM steps between deadline checks
+
+    # Tracing (OpenTelemetry; needs opentelemetry-sdk)
+    TRACING_ENABLED: bool = False
+    TRACING_EXPORTER: str = "file"  # "file" (OTLP/JSON lines in TRACING_FILE) or "console"
+    TRACING_FILE: str = "traces.jsonl"
+    TRACING_SERVICE_NAME: str = "todo-api"
+    TRACE_SAMPLE_RATIO: float = 0.01  # Share of ordinary requests whose trace is kept
+    TRACE_SLOW_REQUEST_MS: int = 500  # Traces of requests at least this slow are always kept
+    TRACE_MAX_PENDING_TRACES: int = 10000  # In-flight traces buffered for the keep/drop decision
+    TRACE_MAX_STATEMENT_LENGTH: int = 2000  # SQL text recorded per span
+
+    # Traffic capture for replay load tests (benchmarks/replay.py)
+    TRAFFIC_CAPTURE_ENABLED: bool = False
+    TRAFFIC_CAPTURE_FILE: str = "traffic.jsonl"  # Each worker writes <name>.<pid>.jsonl
+    TRAFFIC_CAPTURE_SALT: str = ""  # Keys the user bucket hash, shared by all workers (default: derived from BETTER_AUTH_SECRET)
+    TRAFFIC_CAPTURE_SAMPLE_RATIO: float = 1.0  # Share of users whose requests are captured
+    TRAFFIC_CAPTURE_USER_BUCKETS: int = 1024  # Users are recorded only as a salted hash bucket
+    TRAFFIC_CAPTURE_QUEUE_SIZE: int = 10000  # Records waiting for the writer thread; extras are dropped
+
+    # Admin endpoints (/api/admin: CPU profiles, memory snapshots); disabled while no token is set
+    ADMIN_API_TOKEN: Optional[str] = None  # Sent as the X-Admin-Token header
+    PROFILER_MAX_SECONDS: int = 60  # Longest CPU profile one request may run
+    PROFILER_INTERVAL_MS: int = 10  # Default time between stack samples
+    MEMORY_SNAPSHOT_FRAMES: int = 10  # Traceback depth recorded per allocation while tracing memory
+    MEMORY_MAX_SNAPSHOTS: int = 10  # Oldest snapshots are discarded beyond this
+
+    # Bulk user provisioning (POST /api/admin/users/bulk and provision_users.py)
+    PROVISIONING_BATCH_SIZE: int = 200  # Users per multi-row INSERT, each in its own short transaction
+    PROVISIONING_HASH_WORKERS: int = 0  # Threads hashing passwords in parallel (0 = one per CPU available)
+    PROVISIONING_MAX_USERS: int = 10000  # Largest batch one API request may provision
+
+    # Idempotency-Key settings (task creation and bulk writes)
+    IDEMPOTENCY_TTL_SECONDS: int = 86400  # How long a stored response is replayed; expired keys are purged by maintenance
+
+    # Response compression settings
+    COMPRESSION_MINIMUM_SIZE: int = 500  # Bytes; smaller responses are sent as-is
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+    COMPRESSION_CACHE_MAX_BYTES: int = 16777216  # Compressed bodies kept for identical responses (0 = off)
+
+    # Logging settings
+    LOG_FILE: str = "app.log"  # Used outside development only
+    LOG_MAX_BYTES: int = 10485760  # Rotate the log file at 10 MB
+    LOG_BACKUP_COUNT: int = 5
+    LOG_QUEUE_SIZE: int = 10000  # Records beyond this are dropped, not blocked on
+
     model_config = {"env_file": ".env", "case_sensitive": True}
 
 
-# Create a singleton instance of settings
-settings = Settings()
\ No newline at end of file
+@lru_cache(maxsize=None)
+def get_settings() -> Settings:
+    """
+    The process-wide Settings, read from the environment and .env on first call
+    """
+    return Settings()
+
+
+class LazySettings:
+    """
+    Stand-in for the Settings singleton that defers reading the environment
+    until an attribute is first used, so importing a module stays side-effect free
+    """
+
+    def __getattr__(self, name: str):
+        return getattr(get_settings(), name)
+
+    def __setattr__(self, name: str, value):
+        setattr(get_settings(), name, value)
+
+
+# Shared settings; constructed lazily by get_settings()
+settings = LazySettings()
\ No newline at end of file
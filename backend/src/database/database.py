@@ -1,11 +1,212 @@
+import threading
+from typing import Any, Dict, Optional, Tuple
+from sqlalchemy import Delete, Insert, Update, event
+from sqlalchemy.engine import Engine, make_url
 from sqlmodel import create_engine, Session
 from ..config.settings import settings
+from ..utils.deadline import DeadlineExceeded, current_deadline
+from ..utils.tracing import instrument_engine
 
-# Create the database engine
-engine = create_engine(settings.DATABASE_URL, echo=(settings.ENVIRONMENT == "development"))
+
+def _is_file_sqlite(database_url: str) -> bool:
+    url = make_url(database_url)
+    return url.get_backend_name() == "sqlite" and url.database not in (None, "", ":memory:")
+
+
+def _apply_sqlite_pragmas(dbapi_connection):
+    cursor = dbapi_connection.cursor()
+    # Only takes effect on a new database (or after a full VACUUM); enables incremental_vacuum
+    cursor.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+    cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+    # Negative cache_size is in KiB rather than pages
+    cursor.execute(f"PRAGMA cache_size=-{int(settings.SQLITE_CACHE_SIZE_KB)}")
+    cursor.close()
+
+
+def _deadline_progress_handler() -> int:
+    # Called by SQLite every SQLITE_PROGRESS_HANDLER_STEPS VM steps; non-zero interrupts the statement
+    deadline = current_deadline()
+    return 1 if deadline is not None and deadline.expired() else 0
+
+
+def _install_deadline_hooks(engine: Engine):
+    """
+    Bound each statement by the current request's deadline (utils/deadline.py)
+    SQLite: a progress handler interrupts statements past the deadline.
+    PostgreSQL: SET LOCAL statement_timeout to the time left when a transaction begins.
+    On any backend, an expired deadline fails fast before a statement is sent, and
+    an error caused by the deadline is raised as DeadlineExceeded.
+    """
+    backend = engine.dialect.name
+
+    if backend == "sqlite":
+        @event.listens_for(engine, "connect")
+        def _on_connect(dbapi_connection, connection_record):
+            dbapi_connection.set_progress_handler(_deadline_progress_handler, settings.SQLITE_PROGRESS_HANDLER_STEPS)
+
+    if backend == "postgresql":
+        @event.listens_for(engine, "begin")
+        def _on_begin(connection):
+            deadline = current_deadline()
+            if deadline is not None and deadline.armed:
+                connection.exec_driver_sql(f"SET LOCAL statement_timeout = {max(1, int(deadline.remaining() * 1000))}")
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_execute(connection, cursor, statement, parameters, context, executemany):
+        deadline = current_deadline()
+        if deadline is None:
+            return
+        if deadline.expired():
+            raise DeadlineExceeded()
+        # Lets Deadline.cancel() interrupt this statement if the client disconnects
+        deadline.attach(connection.connection.driver_connection)
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_execute(connection, cursor, statement, parameters, context, executemany):
+        deadline = current_deadline()
+        if deadline is not None:
+            deadline.detach(connection.connection.driver_connection)
+
+    @event.listens_for(engine, "handle_error")
+    def _on_error(context):
+        deadline = current_deadline()
+        if deadline is None:
+            return
+        if context.connection is not None:
+            deadline.detach(context.connection.connection.driver_connection)
+        # Interrupted (SQLite) or cancelled by statement_timeout (PostgreSQL) because of the deadline
+        if deadline.expired():
+            raise DeadlineExceeded() from context.original_exception
+
+
+def _pool_options() -> Dict[str, Any]:
+    return {"pool_size": settings.DB_POOL_SIZE, "max_overflow": settings.DB_MAX_OVERFLOW}
+
+
+def build_engines(database_url: str, sqlite_tuned: Optional[bool] = None) -> Tuple[Engine, Engine]:
+    """
+    Create the (read, write) engine pair for a database URL
+    For file-backed SQLite with the tuned profile, reads use a pool of WAL connections
+    and writes are serialized through a single connection that takes the write lock up front.
+    Every other database gets one engine used for both.
+    """
+    echo = settings.ENVIRONMENT == "development"
+    if sqlite_tuned is None:
+        sqlite_tuned = settings.SQLITE_TUNED
+
+    if not (sqlite_tuned and _is_file_sqlite(database_url)):
+        # SQLite's default pools take no sizing; elsewhere size the pool the admission budgets share
+        pool_options = {} if make_url(database_url).get_backend_name() == "sqlite" else _pool_options()
+        engine = create_engine(database_url, echo=echo, **pool_options)
+        # Tracing hooks first: a DeadlineExceeded raised by the deadline hooks stops later handle_error listeners
+        instrument_engine(engine)
+        _install_deadline_hooks(engine)
+        return engine, engine
+
+    connect_args = {
+        "check_same_thread": False,
+        "timeout": settings.SQLITE_BUSY_TIMEOUT_MS / 1000,
+    }
+    read_engine = create_engine(database_url, echo=echo, connect_args=connect_args, **_pool_options())
+    write_engine = create_engine(
+        database_url,
+        echo=echo,
+        connect_args=connect_args,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=settings.SQLITE_BUSY_TIMEOUT_MS / 1000,
+    )
+
+    @event.listens_for(read_engine, "connect")
+    def _on_read_connect(dbapi_connection, connection_record):
+        _apply_sqlite_pragmas(dbapi_connection)
+
+    @event.listens_for(write_engine, "connect")
+    def _on_write_connect(dbapi_connection, connection_record):
+        # Let SQLAlchemy emit BEGIN itself (see _on_write_begin)
+        dbapi_connection.isolation_level = None
+        _apply_sqlite_pragmas(dbapi_connection)
+
+    @event.listens_for(write_engine, "begin")
+    def _on_write_begin(connection):
+        # Take the write lock when the transaction starts, avoiding
+        # "database is locked" on a read-to-write lock upgrade
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+    for built_engine in (read_engine, write_engine):
+        instrument_engine(built_engine)
+        _install_deadline_hooks(built_engine)
+    return read_engine, write_engine
+
+
+# The application's (read, write) engines, built on first use rather than at import
+_engines: Optional[Tuple[Engine, Engine]] = None
+_engines_lock = threading.Lock()
+
+
+def get_engines() -> Tuple[Engine, Engine]:
+    """
+    The (read, write) engine pair for DATABASE_URL, created on first call
+    """
+    global _engines
+    if _engines is None:
+        with _engines_lock:
+            if _engines is None:
+                _engines = build_engines(settings.DATABASE_URL)
+    return _engines
+
+
+def get_engine() -> Engine:
+    return get_engines()[0]
+
+
+def get_write_engine() -> Engine:
+    return get_engines()[1]
+
+
+def dispose_engines(close: bool = True):
+    """
+    Drop pooled connections of engines that have been built; a no-op before first use
+    """
+    if _engines is not None:
+        for built_engine in set(_engines):
+            built_engine.dispose(close=close)
+
+
+def __getattr__(name: str):
+    # `from src.database.database import engine` keeps working for scripts; it builds the engines on access
+    if name == "engine":
+        return get_engine()
+    if name == "write_engine":
+        return get_write_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+class RoutingSession(Session):
+    """
+    Session that sends flushes and DML statements to the write engine
+    and everything else to the read engine; bind_arguments={"bind": ...} picks one explicitly
+    """
+
+    def __init__(self, read_bind: Engine = None, write_bind: Engine = None, **kwargs):
+        super().__init__(**kwargs)
+        self.read_bind = read_bind or get_engine()
+        self.write_bind = write_bind or get_write_engine()
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is not None:
+            return bind
+        if self.write_bind is self.read_bind:
+            return self.read_bind
+        if self._flushing or isinstance(clause, (Insert, Update, Delete)):
+            return self.write_bind
+        return self.read_bind
 
 
 def get_session():
     """Generator to yield database session"""
-    with Session(engine) as session:
-        yield session
\ No newline at end of file
+    with RoutingSession() as session:
+        yield session
@@ -0,0 +1,305 @@
+"""
+Background table maintenance: archive old completed tasks, purge soft-deleted
+tasks and expired Idempotency-Keys, and compact the database
+
+Every worker starts the loop, but only the one holding MaintenanceLock runs the passes.
+"""
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import delete, insert, select, text, true
+from sqlalchemy.engine import Connection, Engine
+
+from .database import get_write_engine
+from ..config.settings import settings
+from ..models.idempotency import IdempotencyKey
+from ..models.task import TASK_TIER_COLUMNS, ArchivedTask, Task
+
+logger = logging.getLogger(__name__)
+
+_state: Dict[str, Any] = {
+    "archived_total": 0,
+    "purged_total": 0,
+    "expired_keys_total": 0,
+    "last_purge_at": None,
+    "last_compaction_at": None,
+    "pending_compaction": False,
+    "runner": False,
+    "error": None,
+}
+_last_compaction: Optional[float] = None  # time.monotonic() of the last compaction
+
+# Application-wide key of the PostgreSQL advisory lock held by the maintenance runner
+MAINTENANCE_LOCK_KEY = 0x7461736B
+
+
+class MaintenanceLock:
+    """
+    Elects one maintenance runner among the server's processes
+    PostgreSQL: a session-level advisory lock held on a dedicated connection.
+    File-backed SQLite: an exclusive flock on <database>.maintenance-lock.
+    Both are released by the operating system or server when the holder dies, so
+    another worker takes over on its next attempt. Other databases (in-memory
+    SQLite) cannot be shared between processes, so the lock is always granted.
+    """
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self._connection: Optional[Connection] = None
+        self._lock_file = None
+
+    @property
+    def held(self) -> bool:
+        return self._connection is not None or self._lock_file is not None
+
+    def acquire(self) -> bool:
+        """
+        Try to take the lock without waiting; True while this process holds it
+        """
+        backend = self.engine.dialect.name
+        database = self.engine.url.database
+
+        if backend == "postgresql":
+            if self._connection is not None:
+                try:
+                    # The lock went away with the connection if the server dropped it
+                    self._connection.exec_driver_sql("SELECT 1")
+                    self._connection.commit()
+                    return True
+                except Exception:
+                    self.release()
+            connection = self.engine.connect()
+            acquired = connection.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": MAINTENANCE_LOCK_KEY}).scalar()
+            # Session-level: the lock outlives this transaction, which must not stay open
+            connection.commit()
+            if not acquired:
+                connection.close()
+                return False
+            self._connection = connection
+            return True
+
+        if backend == "sqlite" and database not in (None, "", ":memory:"):
+            if self._lock_file is not None:
+                return True
+            import fcntl  # POSIX only, like gunicorn itself
+
+            lock_file = open(f"{os.path.abspath(database)}.maintenance-lock", "a")
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                lock_file.close()
+                return False
+            self._lock_file = lock_file
+            return True
+
+        return True
+
+    def release(self):
+        if self._connection is not None:
+            connection, self._connection = self._connection, None
+            try:
+                connection.close()
+            except Exception:
+                logger.exception("Closing the maintenance lock connection failed")
+        if self._lock_file is not None:
+            lock_file, self._lock_file = self._lock_file, None
+            lock_file.close()
+
+
+def archive_completed_tasks(age_days: int, batch_size: int, max_batches: int) -> int:
+    """
+    Move completed tasks not updated for `age_days` from tasks to archived_tasks
+    Each batch deletes its rows with DELETE ... RETURNING and inserts what was
+    returned, in one short transaction, so the hot table and its indexes only hold
+    the working set. The DELETE re-checks the full predicate, so a task un-completed,
+    edited or soft-deleted after the batch was picked stays where it is.
+    Returns the number moved.
+    """
+    write_engine = get_write_engine()
+    tasks, archived = Task.__table__, ArchivedTask.__table__
+    cutoff = datetime.utcnow() - timedelta(days=age_days)
+    archivable = (tasks.c.completed == true(), tasks.c.deleted_at.is_(None), tasks.c.updated_at < cutoff)
+    moved = 0
+
+    for _ in range(max_batches):
+        with write_engine.begin() as connection:
+            task_ids = connection.execute(
+                select(tasks.c.id).where(*archivable).limit(batch_size)
+            ).scalars().all()
+            rows = []
+            if task_ids:
+                rows = connection.execute(
+                    delete(tasks)
+                    .where(tasks.c.id.in_(task_ids), *archivable)
+                    .returning(*[tasks.c[name] for name in TASK_TIER_COLUMNS])
+                ).mappings().all()
+            if rows:
+                archived_at = datetime.utcnow()
+                connection.execute(insert(archived), [{**row, "archived_at": archived_at} for row in rows])
+
+        moved += len(rows)
+        if len(task_ids) < batch_size:
+            break
+
+    return moved
+
+
+def purge_deleted_tasks(batch_size: int, max_batches: int, grace_seconds: int) -> int:
+    """
+    Hard-delete tombstoned tasks older than the grace period
+    Each batch is its own short transaction so request writes interleave with the purge.
+    Returns the number of rows removed.
+    """
+    write_engine = get_write_engine()
+    cutoff = datetime.utcnow() - timedelta(seconds=grace_seconds)
+    purged = 0
+
+    for _ in range(max_batches):
+        with write_engine.begin() as connection:
+            task_ids = connection.execute(
+                select(Task.id)
+                .where(Task.deleted_at.is_not(None), Task.deleted_at < cutoff)
+                .limit(batch_size)
+            ).scalars().all()
+            if task_ids:
+                connection.execute(delete(Task).where(Task.id.in_(task_ids)))
+
+        purged += len(task_ids)
+        if len(task_ids) < batch_size:
+            break
+
+    return purged
+
+
+def purge_expired_idempotency_keys(ttl_seconds: int, batch_size: int, max_batches: int) -> int:
+    """
+    Delete stored Idempotency-Key responses older than the TTL, in short batches
+    Returns the number of keys removed.
+    """
+    write_engine = get_write_engine()
+    keys = IdempotencyKey.__table__
+    cutoff = datetime.utcnow() - timedelta(seconds=ttl_seconds)
+    purged = 0
+
+    for _ in range(max_batches):
+        with write_engine.begin() as connection:
+            key_ids = connection.execute(
+                select(keys.c.id).where(keys.c.created_at < cutoff).limit(batch_size)
+            ).scalars().all()
+            if key_ids:
+                connection.execute(delete(keys).where(keys.c.id.in_(key_ids)))
+
+        purged += len(key_ids)
+        if len(key_ids) < batch_size:
+            break
+
+    return purged
+
+
+def compact_database():
+    """
+    Reclaim space left by purged rows and refresh planner statistics
+    PostgreSQL: VACUUM (ANALYZE) on the tasks table.
+    SQLite: a bounded incremental_vacuum plus PRAGMA optimize.
+    """
+    write_engine = get_write_engine()
+    backend = write_engine.dialect.name
+
+    if backend == "postgresql":
+        # VACUUM cannot run inside a transaction block
+        with write_engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            connection.exec_driver_sql(f"VACUUM (ANALYZE) {Task.__tablename__}")
+    elif backend == "sqlite":
+        raw_connection = write_engine.raw_connection()
+        try:
+            # executescript steps the pragma to completion; a plain execute frees a single page
+            raw_connection.driver_connection.executescript(
+                f"PRAGMA incremental_vacuum({int(settings.SQLITE_INCREMENTAL_VACUUM_PAGES)}); PRAGMA optimize;"
+            )
+        finally:
+            raw_connection.close()
+
+
+def run_maintenance():
+    """
+    One maintenance pass: archive old completed tasks, purge tombstones and
+    expired Idempotency-Keys, then compact if rows left the tasks table since the last compaction and the
+    compaction interval has elapsed
+    Failures are recorded rather than raised so the loop keeps running
+    """
+    global _last_compaction
+
+    try:
+        if settings.TASK_ARCHIVE_AFTER_DAYS > 0:
+            archived = archive_completed_tasks(
+                settings.TASK_ARCHIVE_AFTER_DAYS,
+                settings.TASK_ARCHIVE_BATCH_SIZE,
+                settings.TASK_ARCHIVE_MAX_BATCHES,
+            )
+            _state["archived_total"] += archived
+            if archived:
+                _state["pending_compaction"] = True
+                logger.info("Archived %d completed tasks", archived)
+
+        purged = purge_deleted_tasks(
+            settings.TASK_PURGE_BATCH_SIZE,
+            settings.TASK_PURGE_MAX_BATCHES,
+            settings.TASK_PURGE_GRACE_SECONDS,
+        )
+        _state["purged_total"] += purged
+        _state["last_purge_at"] = datetime.utcnow().isoformat()
+        if purged:
+            _state["pending_compaction"] = True
+            logger.info("Purged %d soft-deleted tasks", purged)
+
+        _state["expired_keys_total"] += purge_expired_idempotency_keys(
+            settings.IDEMPOTENCY_TTL_SECONDS,
+            settings.TASK_PURGE_BATCH_SIZE,
+            settings.TASK_PURGE_MAX_BATCHES,
+        )
+
+        now = time.monotonic()
+        compaction_due = _last_compaction is None or now - _last_compaction >= settings.TASK_COMPACTION_INTERVAL_SECONDS
+        if _state["pending_compaction"] and compaction_due:
+            compact_database()
+            _last_compaction = now
+            _state["pending_compaction"] = False
+            _state["last_compaction_at"] = datetime.utcnow().isoformat()
+            logger.info("Compacted database after purge")
+
+        _state["error"] = None
+    except Exception as e:
+        _state["error"] = str(e)
+        logger.exception("Task maintenance failed")
+
+
+async def maintenance_loop():
+    """
+    Run maintenance every TASK_PURGE_INTERVAL_SECONDS on the thread pool until cancelled
+    Each interval the worker tries to become (or stay) the runner; the others skip the pass.
+    """
+    lock = MaintenanceLock(get_write_engine())
+    try:
+        while True:
+            await asyncio.sleep(settings.TASK_PURGE_INTERVAL_SECONDS)
+            try:
+                _state["runner"] = await run_in_threadpool(lock.acquire)
+            except Exception as e:
+                _state["runner"] = False
+                _state["error"] = str(e)
+                logger.exception("Taking the maintenance lock failed")
+                continue
+            if _state["runner"]:
+                await run_in_threadpool(run_maintenance)
+    finally:
+        lock.release()
+        _state["runner"] = False
+
+
+def get_maintenance_status() -> Dict[str, Any]:
+    return dict(_state)
@@ -0,0 +1,179 @@
+"""
+Database warm-up run at startup, and the readiness state reported by /ready
+"""
+import logging
+import threading
+import time
+from contextlib import ExitStack
+from typing import Any, Dict, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
+from sqlmodel import select
+
+from .database import RoutingSession, get_engine, get_engines
+from ..config.settings import settings
+from ..models.auth import User
+from ..models.task import Task, TaskUpdate
+from ..services.task_service import TaskService
+
+logger = logging.getLogger(__name__)
+
+# Ids that never match a row, so warm-up queries compile and run without touching data
+_WARMUP_USER_ID = -1
+_WARMUP_EMAIL = "warmup@invalid"
+
+_state: Dict[str, Any] = {
+    "warmed_up": False,
+    "warmup_seconds": None,
+    "error": None,
+}
+
+
+def prefill_pool(engine: Engine, connections: int) -> int:
+    """
+    Open `connections` pooled connections of `engine` at once and return them to the pool
+    Holding them simultaneously forces the pool to create distinct connections
+    instead of handing the same one back each time
+    """
+    pool_size = getattr(engine.pool, "size", lambda: connections)()
+    connections = max(1, min(connections, pool_size))
+
+    with ExitStack() as stack:
+        for _ in range(connections):
+            connection = stack.enter_context(engine.connect())
+            connection.execute(text("SELECT 1"))
+
+    return connections
+
+
+def compile_hot_statements():
+    """
+    Run the statements the task and auth endpoints send once, so SQLAlchemy's
+    compiled statement cache of each engine is populated before the first real request
+    Reads go through the Core-row paths with the fieldsets and options the endpoints
+    use; writes target ids that never match, so they change nothing.
+    """
+    with RoutingSession() as session:
+        # GET /tasks: plain, filtered, manual order, with archived tasks, one page at a time
+        # (LIMIT/OFFSET are bound parameters, so any page size shares the cache entry)
+        TaskService.get_all_task_rows(session, _WARMUP_USER_ID, limit=1)
+        TaskService.get_all_task_rows(session, _WARMUP_USER_ID, False, limit=1)
+        TaskService.get_all_task_rows(session, _WARMUP_USER_ID, ordered=True, limit=1)
+        TaskService.get_all_task_rows(session, _WARMUP_USER_ID, include_archived=True, limit=1)
+        TaskService.count_task_rows(session, _WARMUP_USER_ID)
+        TaskService.count_task_rows(session, _WARMUP_USER_ID, False)
+        TaskService.count_task_rows(session, _WARMUP_USER_ID, include_archived=True)
+        # GET /tasks/batch
+        TaskService.get_task_rows_by_ids(session, _WARMUP_USER_ID, [_WARMUP_USER_ID])
+
+        # Calls that end in a 404 for the warm-up ids after running their statements:
+        # GET /tasks/{id}, PUT /tasks/{id}, PATCH /tasks/{id}/complete and DELETE /tasks/{id}
+        for warm_up in (
+            lambda: TaskService.get_task_row_by_id(session, _WARMUP_USER_ID, _WARMUP_USER_ID, include_archived=True),
+            lambda: TaskService.update_task(session, _WARMUP_USER_ID, _WARMUP_USER_ID, TaskUpdate(title="warm-up", description="warm-up")),
+            lambda: TaskService.toggle_task_completion(session, _WARMUP_USER_ID, _WARMUP_USER_ID, True),
+            lambda: TaskService.delete_task(session, _WARMUP_USER_ID, _WARMUP_USER_ID),
+        ):
+            try:
+                warm_up()
+            except HTTPException:
+                session.rollback()
+
+        # POST /tasks: flush the INSERT, then roll it back
+        session.add(Task(user_id=_WARMUP_USER_ID, title="warm-up"))
+        session.flush()
+        session.rollback()
+
+        # Same statement AuthService uses for signup and signin lookups
+        session.exec(select(User).where(User.email == _WARMUP_EMAIL)).first()
+
+
+def warm_up_database():
+    """
+    Prefill the connection pool and compile hot statements
+    Failures are recorded rather than raised so the process still starts and /ready reports them
+    """
+    start = time.perf_counter()
+    try:
+        read_engine, write_engine = get_engines()
+        opened = prefill_pool(read_engine, settings.DB_WARMUP_CONNECTIONS)
+        if write_engine is not read_engine:
+            # The single writer connection, so the first write doesn't pay for connecting
+            opened += prefill_pool(write_engine, 1)
+        compile_hot_statements()
+    except Exception as e:
+        _state["error"] = str(e)
+        logger.exception("Database warm-up failed")
+        return
+
+    _state["warmed_up"] = True
+    _state["error"] = None
+    _state["warmup_seconds"] = round(time.perf_counter() - start, 4)
+    logger.info("Database warm-up finished: %d connections in %.3fs", opened, _state["warmup_seconds"])
+
+
+def get_pool_status() -> Dict[str, Any]:
+    """
+    Snapshot of the connection pool for readiness reporting
+    """
+    pool = get_engine().pool
+    status = {"class": type(pool).__name__}
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        method = getattr(pool, name, None)
+        if callable(method):
+            status[name] = method()
+    return status
+
+
+# Single-connection engine used only by /ready, so a saturated request pool cannot stall the probe
+_probe_engine: Optional[Engine] = None
+_probe_lock = threading.Lock()
+
+
+def get_probe_engine() -> Engine:
+    """
+    Engine for the readiness probe: one pooled connection to the application's
+    database, with a READINESS_TIMEOUT_MS wait for it (concurrent probes queue on it)
+    Rebuilt when the application's engines point at another database.
+    """
+    global _probe_engine
+    url = get_engine().url
+    with _probe_lock:
+        if _probe_engine is None or _probe_engine.url != url:
+            if _probe_engine is not None:
+                _probe_engine.dispose()
+            timeout = settings.READINESS_TIMEOUT_MS / 1000
+            backend = url.get_backend_name()
+            connect_args = {}
+            if backend == "sqlite":
+                connect_args = {"timeout": timeout, "check_same_thread": False}
+            elif backend == "postgresql":
+                connect_args = {"connect_timeout": max(1, round(timeout))}
+            # In-memory SQLite keeps its default single-connection pool
+            options = {} if url.database in (None, "", ":memory:") else {"pool_size": 1, "max_overflow": 0, "pool_timeout": timeout}
+            _probe_engine = create_engine(url, connect_args=connect_args, **options)
+        return _probe_engine
+
+
+def check_readiness() -> Dict[str, Any]:
+    """
+    Check database reachability and report pool and warm-up state
+    The check uses its own connection (get_probe_engine), never the request pool
+    """
+    database_reachable = True
+    database_error = None
+    try:
+        with get_probe_engine().connect() as connection:
+            connection.execute(text("SELECT 1"))
+    except Exception as e:
+        database_reachable = False
+        database_error = str(e)
+
+    return {
+        "ready": database_reachable and _state["warmed_up"],
+        "database": {"reachable": database_reachable, "error": database_error},
+        "pool": get_pool_status(),
+        "warmup": dict(_state),
+    }
@@ -0,0 +1,119 @@
+"""
+Admission control: per-route-class concurrency budgets with fast 503s under overload
+"""
+import asyncio
+import json
+import re
+from typing import Any, Dict, Optional
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+_TASK_PATH = re.compile(r"^/api/users/[^/]+/tasks(/|$)")
+
+
+def route_class(method: str, path: str) -> Optional[str]:
+    """
+    Route class of a DB-bound request, or None for endpoints that are never shed
+    (/health, /ready, /metrics, docs)
+    """
+    if path.startswith("/api/auth/"):
+        return "auth"
+    if _TASK_PATH.match(path):
+        return "task_reads" if method in ("GET", "HEAD") else "task_writes"
+    return None
+
+
+class AdmissionLimiter:
+    """
+    Concurrency budget for one route class
+    Up to max_concurrency requests run at once; up to max_queue more wait at most
+    queue_timeout seconds for a slot. Everything beyond that is rejected at once
+    instead of queueing on the connection pool.
+    """
+
+    def __init__(self, max_concurrency: int, max_queue: int, queue_timeout: float):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.in_flight = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+
+    async def acquire(self) -> bool:
+        if not self._semaphore.locked():
+            await self._semaphore.acquire()
+        elif self.waiting >= self.max_queue:
+            self.rejected += 1
+            return False
+        else:
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.rejected += 1
+                return False
+            finally:
+                self.waiting -= 1
+
+        self.in_flight += 1
+        self.admitted += 1
+        return True
+
+    def release(self):
+        self.in_flight -= 1
+        self._semaphore.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+        }
+
+
+class AdmissionControlMiddleware:
+    """
+    Admit each DB-bound request through its route class's limiter, or answer
+    503 with Retry-After without touching the thread pool or the database
+    """
+
+    def __init__(self, app: ASGIApp, limiters: Dict[str, AdmissionLimiter], retry_after: int = 1):
+        self.app = app
+        self.limiters = limiters
+        self.retry_after = retry_after
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        limiter = self.limiters.get(route_class(scope["method"], scope["path"]))
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not await limiter.acquire():
+            await self._reject(send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
+
+    async def _reject(self, send: Send):
+        body = json.dumps({"detail": "Server is busy - please retry shortly"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(self.retry_after).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
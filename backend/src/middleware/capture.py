@@ -0,0 +1,216 @@
+"""
+Traffic capture: record sanitized request shapes for replay load tests (benchmarks/replay.py)
+"""
+import hashlib
+import json
+import os
+import queue
+import random
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qsl
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .tracing import route_template
+
+# Capture file format version, written in the header line
+# 2: record times ("t") are Unix timestamps, so files from several workers merge by time
+CAPTURE_FORMAT_VERSION = 2
+
+# Query parameters whose values describe the request's shape; any other value is dropped
+_SHAPE_PARAMS = {"completed", "limit", "offset", "fields", "sort", "include_archived"}
+# Query parameters recorded as the number of comma-separated items they hold
+_COUNTED_PARAMS = {"ids"}
+
+# Route recorded for requests that matched no route (404s, 405s, requests shed before routing):
+# their raw path may hold user and task ids, so it is never written
+UNMATCHED_ROUTE = "<unmatched>"
+
+_USER_PATH = re.compile(r"^/api/users/([^/]+)/")
+_TOTAL_PATTERN = re.compile(rb'"total":\s*(\d+)')
+
+
+def worker_capture_path(path: str, pid: int) -> str:
+    """
+    Per-process capture file: traffic.jsonl -> traffic.<pid>.jsonl
+    """
+    root, extension = os.path.splitext(path)
+    return f"{root}.{pid}{extension}"
+
+
+class TrafficCaptureWriter:
+    """
+    Background thread that appends capture records to a JSON-lines file
+    Each process writes its own file (see worker_capture_path), chosen when the
+    thread starts, so gunicorn workers never interleave lines. Request handlers
+    only enqueue; when the queue is full records are dropped and counted.
+    """
+
+    def __init__(self, path: str, queue_size: int, header: Optional[Dict[str, Any]] = None):
+        self.base_path = path
+        self.path = path
+        self.header = header or {}
+        self.written = 0
+        self.dropped = 0
+        self._queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue(maxsize=queue_size)
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        # Started from the lifespan, so this is the worker's pid, not the gunicorn master's
+        self.path = worker_capture_path(self.base_path, os.getpid())
+        self._thread = threading.Thread(target=self._run, name="traffic-capture", daemon=True)
+        self._thread.start()
+
+    @staticmethod
+    def timestamp() -> float:
+        """
+        Wall-clock time of a request; replay merges every worker's records by it and keeps their spacing
+        """
+        return round(time.time(), 3)
+
+    def write(self, record: Dict[str, Any]):
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        """
+        Write out queued records and stop the thread
+        """
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        with open(self.path, "a", encoding="utf-8") as output:
+            header = {
+                "capture": CAPTURE_FORMAT_VERSION,
+                "started_at": datetime.now(timezone.utc).isoformat(),
+                "pid": os.getpid(),
+                **self.header,
+            }
+            output.write(json.dumps(header, separators=(",", ":")) + "\n")
+            while True:
+                record = self._queue.get()
+                if record is None:
+                    output.flush()
+                    return
+                output.write(json.dumps(record, separators=(",", ":")) + "\n")
+                self.written += 1
+                if self._queue.empty():
+                    output.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"file": self.path, "written": self.written, "dropped": self.dropped, "queued": self._queue.qsize()}
+
+
+class TrafficCaptureMiddleware:
+    """
+    Record one compact line per HTTP request: timestamp, method, route template,
+    shape-only query parameters, request/response body sizes, status, duration,
+    list size and a user bucket. Ids, bodies, headers and tokens are never recorded;
+    users appear only as a hash bucket keyed with `salt`, and sampling keeps or
+    drops whole buckets so each captured user's request pattern stays intact.
+    Every worker must be given the same salt so a user lands in the same bucket
+    (and the same sampling decision) whichever worker serves the request.
+    """
+
+    def __init__(self, app: ASGIApp, writer: TrafficCaptureWriter, salt: str, sample_ratio: float = 1.0, user_buckets: int = 1024):
+        self.app = app
+        self.writer = writer
+        self.user_buckets = user_buckets
+        self.sampled_buckets = int(max(0.0, min(1.0, sample_ratio)) * user_buckets)
+        self.sample_ratio = sample_ratio
+        self._salt = hashlib.blake2b(salt.encode(), digest_size=16, person=b"traffic-capture").digest()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        bucket = self._user_bucket(scope["path"])
+        if bucket is None:
+            sampled = random.random() < self.sample_ratio
+        else:
+            sampled = bucket < self.sampled_buckets
+        if not sampled:
+            await self.app(scope, receive, send)
+            return
+
+        timestamp = self.writer.timestamp()
+        start = time.perf_counter()
+        request_bytes = 0
+        response_bytes = 0
+        status = 500
+        tail = b""
+
+        async def counting_receive() -> Message:
+            nonlocal request_bytes
+            message = await receive()
+            if message["type"] == "http.request":
+                request_bytes += len(message.get("body", b""))
+            return message
+
+        async def counting_send(message: Message):
+            nonlocal response_bytes, status, tail
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                body = message.get("body", b"")
+                response_bytes += len(body)
+                # Task lists end with "total":N,"limit":..,"offset":..}
+                tail = (tail + body)[-64:]
+            await send(message)
+
+        try:
+            await self.app(scope, counting_receive, counting_send)
+        finally:
+            record = {
+                "t": timestamp,
+                "m": scope["method"],
+                "r": route_template(scope) or UNMATCHED_ROUTE,
+                "s": status,
+                "d": round((time.perf_counter() - start) * 1000, 2),
+                "qb": request_bytes,
+                "rb": response_bytes,
+            }
+            query = _query_shape(scope.get("query_string", b""))
+            if query:
+                record["q"] = query
+            if bucket is not None:
+                record["u"] = bucket
+            match = _TOTAL_PATTERN.search(tail) if scope["method"] == "GET" and status == 200 else None
+            if match is not None:
+                record["n"] = int(match.group(1))
+            self.writer.write(record)
+
+    def _user_bucket(self, path: str) -> Optional[int]:
+        match = _USER_PATH.match(path)
+        if match is None:
+            return None
+        digest = hashlib.blake2b(match.group(1).encode(), digest_size=8, key=self._salt).digest()
+        return int.from_bytes(digest, "big") % self.user_buckets
+
+
+def _query_shape(query_string: bytes) -> Dict[str, Any]:
+    """
+    Query parameters reduced to their shape: allowed values kept, lists counted, everything else masked
+    """
+    shape: Dict[str, Any] = {}
+    for key, value in parse_qsl(query_string.decode("latin-1"), keep_blank_values=True):
+        if key in _SHAPE_PARAMS:
+            shape[key] = value[:64]
+        elif key in _COUNTED_PARAMS:
+            shape[key] = len([item for item in value.split(",") if item])
+        else:
+            shape[key] = None
+    return shape
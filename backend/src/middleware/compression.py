@@ -0,0 +1,205 @@
+"""
+Response compression middleware (brotli or gzip, negotiated via Accept-Encoding)
+"""
+import gzip
+import hashlib
+import zlib
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; fall back to gzip only
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "application/x-ndjson",
+    "image/svg+xml",
+)
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Pick the supported encoding with the highest q-value in an Accept-Encoding header
+    Ties go to brotli; encodings with q=0 (explicitly or via *;q=0) are never chosen
+    """
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name] = quality
+
+    wildcard = accepted.get("*", 0.0)
+    supported = ("br", "gzip") if brotli is not None else ("gzip",)
+    # max() keeps the first of equal values, so br wins ties
+    best = max(supported, key=lambda name: accepted.get(name, wildcard))
+    return best if accepted.get(best, wildcard) > 0 else None
+
+
+class CompressedBodyCache:
+    """
+    LRU of compressed bodies keyed by encoding and a digest of the raw body
+    Identical responses (e.g. repeated list fetches) reuse their compressed bytes
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: "OrderedDict[Tuple[str, bytes], bytes]" = OrderedDict()
+
+    @staticmethod
+    def key(encoding: str, body: bytes) -> Tuple[str, bytes]:
+        return encoding, hashlib.blake2b(body, digest_size=16).digest()
+
+    def get(self, key: Tuple[str, bytes]) -> Optional[bytes]:
+        compressed = self._entries.get(key)
+        if compressed is not None:
+            self._entries.move_to_end(key)
+        return compressed
+
+    def put(self, key: Tuple[str, bytes], compressed: bytes):
+        if len(compressed) > self.max_bytes or key in self._entries:
+            return
+        self._entries[key] = compressed
+        self.size += len(compressed)
+        while self.size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.size -= len(evicted)
+
+
+class CompressionMiddleware:
+    """
+    Compress responses larger than minimum_size
+    Complete bodies are compressed in one shot (and cached by content digest);
+    streaming bodies are compressed chunk by chunk with a flush after each chunk
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 500, gzip_level: int = 6, brotli_quality: int = 4, cache_max_bytes: int = 0):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.cache = CompressedBodyCache(cache_max_bytes) if cache_max_bytes > 0 else None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+    def compress(self, encoding: str, body: bytes) -> bytes:
+        if self.cache is not None:
+            key = self.cache.key(encoding, body)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        if encoding == "br":
+            compressed = brotli.compress(body, quality=self.brotli_quality)
+        else:
+            compressed = gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+
+        if self.cache is not None:
+            self.cache.put(key, compressed)
+        return compressed
+
+    def streaming_compressor(self, encoding: str):
+        if encoding == "br":
+            compressor = brotli.Compressor(quality=self.brotli_quality)
+            return compressor.process, compressor.flush, compressor.finish
+        compressor = zlib.compressobj(self.gzip_level, zlib.DEFLATED, 31)  # wbits=31: gzip container
+        return compressor.compress, lambda: compressor.flush(zlib.Z_SYNC_FLUSH), compressor.flush
+
+
+class _CompressionResponder:
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.downstream = send
+        self.start_message: Optional[Message] = None
+        self.passthrough = False
+        self.stream = None
+
+    async def send(self, message: Message):
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            headers = Headers(raw=message["headers"])
+            content_type = headers.get("content-type", "")
+            self.passthrough = (
+                "content-encoding" in headers
+                or not content_type.startswith(COMPRESSIBLE_TYPES)
+            )
+            return
+
+        if message["type"] != "http.response.body":
+            await self.downstream(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.passthrough:
+            await self._flush_start()
+            await self.downstream(message)
+            return
+
+        if self.stream is None and self.start_message is not None:
+            if not more_body:
+                await self._send_complete(body)
+                return
+            # First chunk of a streaming response
+            self.stream = self.middleware.streaming_compressor(self.encoding)
+            headers = MutableHeaders(raw=self.start_message["headers"])
+            self._mark_encoded(headers)
+            del headers["content-length"]
+            await self._flush_start()
+
+        process, flush, finish = self.stream
+        chunk = process(body)
+        chunk += flush() if more_body else finish()
+        await self.downstream({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+    async def _send_complete(self, body: bytes):
+        if len(body) < self.middleware.minimum_size:
+            await self._flush_start()
+            await self.downstream({"type": "http.response.body", "body": body, "more_body": False})
+            return
+
+        compressed = self.middleware.compress(self.encoding, body)
+        headers = MutableHeaders(raw=self.start_message["headers"])
+        self._mark_encoded(headers)
+        headers["content-length"] = str(len(compressed))
+        await self._flush_start()
+        await self.downstream({"type": "http.response.body", "body": compressed, "more_body": False})
+
+    def _mark_encoded(self, headers: MutableHeaders):
+        headers["content-encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+
+    async def _flush_start(self):
+        if self.start_message is not None:
+            await self.downstream(self.start_message)
+            self.start_message = None
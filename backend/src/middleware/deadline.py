@@ -0,0 +1,78 @@
+"""
+Request deadline middleware: starts the per-route deadline and cancels it when the client disconnects
+"""
+import asyncio
+from typing import Dict, Optional
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .admission import route_class
+from ..utils.deadline import Deadline, reset_deadline, set_deadline
+
+
+class DeadlineMiddleware:
+    """
+    Give each DB-bound request a deadline from its route class (see admission.route_class)
+    Database hooks turn the deadline into statement timeouts; DeadlineExceeded is
+    answered with 504 by the app's exception handler.
+    """
+
+    def __init__(self, app: ASGIApp, timeouts: Dict[str, float]):
+        self.app = app
+        self.timeouts = timeouts
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timeout = self.timeouts.get(route_class(scope["method"], scope["path"]))
+        if not timeout:
+            await self.app(scope, receive, send)
+            return
+
+        deadline = Deadline(timeout)
+        watcher = _DisconnectWatcher(receive, deadline)
+
+        async def send_and_disarm(message: Message):
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                deadline.disarm()
+
+        token = set_deadline(deadline)
+        try:
+            await self.app(scope, watcher.receive, send_and_disarm)
+        finally:
+            deadline.disarm()
+            watcher.stop()
+            reset_deadline(token)
+
+
+class _DisconnectWatcher:
+    """
+    Reads the request's ASGI messages in the background and hands them to the app
+    through a queue, so a disconnect is noticed even while the handler is busy
+    in the thread pool (sync endpoints never call receive() on their own)
+    """
+
+    def __init__(self, receive: Receive, deadline: Deadline):
+        self._receive = receive
+        self._deadline = deadline
+        self._queue: "asyncio.Queue[Message]" = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = asyncio.ensure_future(self._pump())
+
+    async def _pump(self):
+        while True:
+            message = await self._receive()
+            self._queue.put_nowait(message)
+            if message["type"] == "http.disconnect":
+                self._deadline.cancel()
+                return
+
+    async def receive(self) -> Message:
+        return await self._queue.get()
+
+    def stop(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        self._task = None
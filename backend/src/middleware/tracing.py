@@ -0,0 +1,71 @@
+"""
+Request tracing middleware: root span per request and trace id response headers
+"""
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..utils.tracing import get_tracer
+
+
+class TracingMiddleware:
+    """
+    Root span per HTTP request, continuing an incoming W3C traceparent if present
+    The trace id is returned in X-Trace-Id (and traceparent) on every response
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        # Created by the first traced request, so opentelemetry is never imported while tracing is off
+        self.propagator = None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        tracer = get_tracer()
+        if scope["type"] != "http" or tracer is None:
+            await self.app(scope, receive, send)
+            return
+
+        from opentelemetry.trace import SpanKind, Status, StatusCode
+
+        if self.propagator is None:
+            from opentelemetry.trace.propagation.tracecontext import TraceContextTextMapPropagator
+            self.propagator = TraceContextTextMapPropagator()
+
+        carrier = {"traceparent": Headers(scope=scope).get("traceparent", "")}
+        parent = self.propagator.extract(carrier) if carrier["traceparent"] else None
+        attributes = {"http.method": scope["method"], "http.target": scope["path"]}
+
+        with tracer.start_as_current_span(f"{scope['method']} {scope['path']}", context=parent, kind=SpanKind.SERVER, attributes=attributes) as span:
+            span_context = span.get_span_context()
+            trace_id = format(span_context.trace_id, "032x")
+
+            async def send_with_trace_id(message: Message):
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.status_code", message["status"])
+                    if message["status"] >= 500:
+                        span.set_status(Status(StatusCode.ERROR))
+                    headers = MutableHeaders(raw=message["headers"])
+                    headers["X-Trace-Id"] = trace_id
+                    headers["traceparent"] = f"00-{trace_id}-{format(span_context.span_id, '016x')}-01"
+                await send(message)
+
+            await self.app(scope, receive, send_with_trace_id)
+
+            route_path = route_template(scope)
+            if route_path is not None:
+                span.update_name(f"{scope['method']} {route_path}")
+                span.set_attribute("http.route", route_path)
+
+
+def route_template(scope: Scope):
+    """
+    Matched route template including the router prefix, e.g. /api/users/{user_id}/tasks
+    scope["route"] holds the route as declared on its APIRouter (without the
+    include_router prefix), so the prefix is taken from the leading request path segments
+    """
+    path_format = getattr(scope.get("route"), "path_format", None)
+    if not path_format:
+        return None
+    segments = scope["path"].rstrip("/").split("/")
+    route_segments = path_format.rstrip("/").split("/")
+    prefix = "/".join(segments[:len(segments) - len(route_segments) + 1])
+    return prefix + path_format
@@ -1,3 +1,4 @@
-from .task import Task, TaskCreate, TaskUpdate, TaskResponse
+from .task import Task, TaskCreate, TaskUpdate, TaskResponse, ArchivedTask
+from .idempotency import IdempotencyKey
 
-__all__ = ["Task", "TaskCreate", "TaskUpdate", "TaskResponse"]
\ No newline at end of file
+__all__ = ["Task", "TaskCreate", "TaskUpdate", "TaskResponse", "ArchivedTask", "IdempotencyKey"]
@@ -1,5 +1,5 @@
 from sqlmodel import SQLModel, Field, Column, DateTime
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 from pydantic import BaseModel, EmailStr
 
@@ -75,6 +75,10 @@ class AuthRequest(BaseModel):
     name: Optional[str] = None  # For signup
 
 
+class BulkProvisionRequest(BaseModel):
+    users: List[AuthRequest]
+
+
 class AuthResponse(BaseModel):
     success: bool
     token: Optional[str] = None
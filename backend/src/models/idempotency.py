@@ -0,0 +1,22 @@
+from sqlalchemy import JSON, Index, String, UniqueConstraint
+from sqlmodel import SQLModel, Field, Column, DateTime
+from datetime import datetime
+from typing import Any, Optional
+
+
+class IdempotencyKey(SQLModel, table=True):
+    """Response of a write sent with an Idempotency-Key, committed with the write itself"""
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        # One stored response per key across every worker; a concurrent retry fails here and replays
+        UniqueConstraint("user_id", "key", name="uq_idempotency_keys_user_id_key"),
+        # Expired keys, for the maintenance job
+        Index("ix_idempotency_keys_created_at", "created_at"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    user_id: int
+    key: str = Field(sa_column=Column(String(255), nullable=False))
+    fingerprint: str = Field(sa_column=Column(String(32), nullable=False))  # request_fingerprint() of the first request
+    response: Any = Field(sa_column=Column(JSON, nullable=False))
+    created_at: datetime = Field(default_factory=datetime.utcnow, sa_column=Column(DateTime(timezone=True), nullable=False))
@@ -1,3 +1,4 @@
+from sqlalchemy import Index, String, text
 from sqlmodel import SQLModel, Field, Column, DateTime
 from datetime import datetime
 from typing import Optional
@@ -27,6 +28,7 @@ class TaskUpdate(SQLModel):
     title: Optional[str] = Field(default=None, min_length=1, max_length=255)
     description: Optional[str] = Field(default=None, max_length=1000)
     completed: Optional[bool] = Field(default=None)
+    version: Optional[int] = Field(default=None)  # Expected current version (alternative to If-Match)
 
 
 class TaskResponse(TaskBase):
@@ -51,14 +53,67 @@ class TaskResponse(TaskBase):
 # Database model
 class Task(TaskBase, table=True):
     __tablename__ = "tasks"
+    __table_args__ = (
+        # Serves ORDER BY position for a user's list straight from the index
+        Index("ix_tasks_user_id_position", "user_id", "position"),
+        # Partial indexes: live rows for the read paths, tombstones for the purge worker
+        Index(
+            "ix_tasks_live_user_id_completed", "user_id", "completed",
+            postgresql_where=text("deleted_at IS NULL"), sqlite_where=text("deleted_at IS NULL"),
+        ),
+        Index(
+            "ix_tasks_deleted_at", "deleted_at",
+            postgresql_where=text("deleted_at IS NOT NULL"), sqlite_where=text("deleted_at IS NOT NULL"),
+        ),
+        # Completed live rows, for the archival job
+        Index(
+            "ix_tasks_archivable_updated_at", "updated_at",
+            postgresql_where=text("completed = true AND deleted_at IS NULL"),
+            sqlite_where=text("completed = 1 AND deleted_at IS NULL"),
+        ),
+        # Never reuse ids on SQLite: archived tasks keep their id and must be restorable
+        {"sqlite_autoincrement": True},
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(index=True)
+    version: int = Field(default=1)  # Bumped on every update for optimistic concurrency
+    # Fractional order key (see utils/ordering.py); byte-order collation so keys sort as generated
+    position: Optional[str] = Field(
+        default=None,
+        sa_column=Column(String(255).with_variant(String(255, collation="C"), "postgresql"), nullable=True),
+    )
     created_at: datetime = Field(default_factory=datetime.utcnow, sa_column=Column(DateTime(timezone=True)))
+    # Soft-delete tombstone; rows are hard-deleted later by the purge worker (database/maintenance.py)
+    deleted_at: Optional[datetime] = Field(default=None, sa_column=Column(DateTime(timezone=True), nullable=True))
     updated_at: datetime = Field(default_factory=datetime.utcnow, sa_column=Column(DateTime(timezone=True)))
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         if 'created_at' not in kwargs or kwargs['created_at'] is None:
             self.created_at = datetime.utcnow()
-        self.updated_at = datetime.utcnow()
\ No newline at end of file
+        self.updated_at = datetime.utcnow()
+
+
+# Columns copied between the hot (tasks) and cold (archived_tasks) tiers
+TASK_TIER_COLUMNS = ("id", "user_id", "title", "description", "completed", "version", "position", "created_at", "updated_at")
+
+
+class ArchivedTask(TaskBase, table=True):
+    """Cold tier: old completed tasks moved out of `tasks` by the archival job"""
+    __tablename__ = "archived_tasks"
+    __table_args__ = (
+        # Serves user lookups and the manual order of include_archived lists without a sort
+        Index("ix_archived_tasks_user_id_position", "user_id", "position"),
+    )
+
+    id: int = Field(primary_key=True, sa_column_kwargs={"autoincrement": False})  # Same id the task had in `tasks`
+    user_id: int
+    version: int = Field(default=1)
+    position: Optional[str] = Field(
+        default=None,
+        sa_column=Column(String(255).with_variant(String(255, collation="C"), "postgresql"), nullable=True),
+    )
+    created_at: datetime = Field(sa_column=Column(DateTime(timezone=True)))
+    updated_at: datetime = Field(sa_column=Column(DateTime(timezone=True)))
+    archived_at: datetime = Field(default_factory=datetime.utcnow, sa_column=Column(DateTime(timezone=True)))
@@ -4,9 +4,11 @@ from datetime import timedelta
 from ..models.auth import User, UserCreate, UserUpdate, AuthResponse, JWTTokenData, UserResponse
 from ..utils.jwt_utils import create_access_token, verify_token
 from ..utils.password_utils import hash_password, verify_password
+from ..utils.tracing import traced_methods
 from ..config.settings import settings
 
 
+@traced_methods
 class AuthService:
     @staticmethod
     def authenticate_user(email: str, password: str, session: Session) -> Optional[User]:
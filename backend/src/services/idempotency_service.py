@@ -0,0 +1,119 @@
+"""
+Idempotency-Key support: replay the stored response for retried writes
+
+Responses are stored in the idempotency_keys table in the same transaction as the
+write they belong to, so every worker sees them and a write is never committed
+without its key (or the other way round). Identical requests racing each other
+in one process are coalesced before the write: the first runs it, the rest wait
+and replay its response. A retry racing the first request on another worker fails
+on the unique (user_id, key) constraint, rolls its own write back and replays the
+winner's response.
+"""
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import delete, insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session
+
+from ..config.settings import settings
+from ..models.idempotency import IdempotencyKey
+from ..utils.singleflight import SingleFlight
+from ..utils.tracing import traced_methods
+
+_lock = threading.Lock()
+_state: Dict[str, int] = {"executed": 0, "replayed": 0}
+
+# In-flight keyed writes of this process, by (user_id, key, fingerprint)
+_in_flight = SingleFlight()
+
+
+@traced_methods
+class IdempotencyService:
+    @staticmethod
+    def run(session: Session, user_id: int, key: str, fingerprint: str, write: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Return (response, replayed) for a write sent with this key and fingerprint
+        `write` must leave its changes uncommitted; they are committed together with
+        the stored response. Failed writes store nothing, so the client can retry them.
+        Raises 422 if the key was already used for a different request.
+        A concurrent identical request waits for this one and replays its response
+        (or gets its error) instead of running the write a second time.
+        """
+        led = False
+
+        def lead():
+            nonlocal led
+            led = True
+            return IdempotencyService._run(session, user_id, key, fingerprint, write)
+
+        response, replayed = _in_flight.do((user_id, key, fingerprint), lead)
+        if not led:
+            _count("replayed")
+            return response, True
+        return response, replayed
+
+    @staticmethod
+    def _run(session: Session, user_id: int, key: str, fingerprint: str, write: Callable[[], Any]) -> Tuple[Any, bool]:
+        keys = IdempotencyKey.__table__
+        cutoff = datetime.utcnow() - timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS)
+
+        stored = IdempotencyService._stored(session, user_id, key, cutoff)
+        if stored is None:
+            response = write()
+            # A key from an earlier TTL window would otherwise block the insert
+            session.execute(delete(keys).where(keys.c.user_id == user_id, keys.c.key == key, keys.c.created_at < cutoff))
+            try:
+                session.execute(insert(keys).values(
+                    user_id=user_id, key=key, fingerprint=fingerprint, response=response, created_at=datetime.utcnow(),
+                ))
+                session.commit()
+            except IntegrityError:
+                # Another request with this key committed first: undo our write and replay theirs
+                session.rollback()
+                stored = IdempotencyService._stored(session, user_id, key, cutoff)
+                if stored is None:
+                    raise HTTPException(
+                        status_code=status.HTTP_409_CONFLICT,
+                        detail="A request with this Idempotency-Key is in progress - please retry"
+                    )
+            else:
+                _count("executed")
+                return response, False
+
+        stored_fingerprint, response = stored
+        if stored_fingerprint != fingerprint:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Idempotency-Key was already used for a different request"
+            )
+        _count("replayed")
+        return response, True
+
+    @staticmethod
+    def _stored(session: Session, user_id: int, key: str, cutoff: datetime) -> Optional[Tuple[str, Any]]:
+        """
+        (fingerprint, response) stored for this key within the TTL, if any
+        """
+        keys = IdempotencyKey.__table__
+        row = session.execute(
+            select(keys.c.fingerprint, keys.c.response)
+            .where(keys.c.user_id == user_id, keys.c.key == key, keys.c.created_at >= cutoff)
+        ).first()
+        return tuple(row) if row is not None else None
+
+    @staticmethod
+    def stats() -> Dict[str, int]:
+        """
+        Process-local counts of executed and replayed keyed writes; replays
+        include requests coalesced with an identical one in flight
+        """
+        with _lock:
+            return {**_state, "coalesced": _in_flight.stats()["coalesced"]}
+
+
+def _count(outcome: str):
+    with _lock:
+        _state[outcome] += 1
@@ -0,0 +1,157 @@
+"""
+Bulk user provisioning: create many accounts in one pass
+
+Entries are checked up front (email syntax, password length, duplicates within
+the batch, emails already registered), so bcrypt only runs for users that can
+actually be created. Passwords are then hashed in parallel across cores while
+earlier batches are inserted with one multi-row INSERT per transaction. The
+results are yielded per user as each batch commits.
+"""
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from pydantic.networks import validate_email
+from pydantic_core import PydanticCustomError
+from sqlalchemy import insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Engine
+
+from ..config.settings import settings
+from ..database.database import get_write_engine
+from ..models.auth import AuthRequest, User
+from ..utils.password_utils import hash_passwords
+from ..utils.tracing import traced
+
+MIN_PASSWORD_LENGTH = 8
+
+
+class ProvisioningService:
+    @staticmethod
+    def provision_users(
+        users: Sequence[AuthRequest],
+        engine: Optional[Engine] = None,
+        batch_size: Optional[int] = None,
+        workers: Optional[int] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Create `users`, yielding one result per user and then a summary
+
+        Each result is {"index", "email", "status", ...} where status is "created"
+        (with the new "id"), "conflict" (email taken, or repeated in this batch) or
+        "invalid" (with an "error"). Results for rejected entries come first; the
+        rest follow batch by batch. The last item is {"summary": {...}}.
+        """
+        engine = engine or get_write_engine()
+        batch_size = batch_size or settings.PROVISIONING_BATCH_SIZE
+        start = time.perf_counter()
+        counts = {"requested": len(users), "created": 0, "conflict": 0, "invalid": 0}
+
+        def counted(result: Dict[str, Any]) -> Dict[str, Any]:
+            counts[result["status"]] += 1
+            return result
+
+        candidates, rejected = ProvisioningService._validate(users)
+        for result in rejected:
+            yield counted(result)
+
+        registered = ProvisioningService._registered_emails(engine, [user.email for _, user in candidates], batch_size)
+        pending = []
+        for index, user in candidates:
+            if user.email in registered:
+                yield counted(_result(index, user.email, "conflict", error="Email already registered"))
+            else:
+                pending.append((index, user))
+
+        hashes = hash_passwords((user.password for _, user in pending), workers or settings.PROVISIONING_HASH_WORKERS or None)
+        try:
+            batch: List[Tuple[int, AuthRequest, str]] = []
+            for (index, user), hashed_password in zip(pending, hashes):
+                batch.append((index, user, hashed_password))
+                if len(batch) == batch_size:
+                    for result in ProvisioningService._insert_batch(engine, batch):
+                        yield counted(result)
+                    batch = []
+            if batch:
+                for result in ProvisioningService._insert_batch(engine, batch):
+                    yield counted(result)
+        finally:
+            hashes.close()
+
+        yield {"summary": {**counts, "seconds": round(time.perf_counter() - start, 3)}}
+
+    @staticmethod
+    def _validate(users: Sequence[AuthRequest]) -> Tuple[List[Tuple[int, AuthRequest]], List[Dict[str, Any]]]:
+        """
+        Split entries into (index, user) candidates and results for the ones rejected outright
+        """
+        candidates = []
+        rejected = []
+        seen = set()
+        for index, user in enumerate(users):
+            try:
+                validate_email(user.email)
+            except PydanticCustomError as e:
+                rejected.append(_result(index, user.email, "invalid", error=str(e)))
+                continue
+            if len(user.password) < MIN_PASSWORD_LENGTH:
+                rejected.append(_result(index, user.email, "invalid", error=f"Password must be at least {MIN_PASSWORD_LENGTH} characters"))
+                continue
+            if user.email in seen:
+                rejected.append(_result(index, user.email, "conflict", error="Duplicate email in request"))
+                continue
+            seen.add(user.email)
+            candidates.append((index, user))
+        return candidates, rejected
+
+    @staticmethod
+    @traced("ProvisioningService.registered_emails")
+    def _registered_emails(engine: Engine, emails: List[str], chunk_size: int) -> set:
+        """
+        Which of `emails` already belong to an account, looked up through the unique email index
+        """
+        registered = set()
+        with engine.connect() as connection:
+            for offset in range(0, len(emails), chunk_size):
+                chunk = emails[offset:offset + chunk_size]
+                registered.update(connection.execute(select(User.email).where(User.email.in_(chunk))).scalars())
+        return registered
+
+    @staticmethod
+    @traced("ProvisioningService.insert_batch")
+    def _insert_batch(engine: Engine, batch: List[Tuple[int, AuthRequest, str]]) -> List[Dict[str, Any]]:
+        """
+        Insert one batch with a single multi-row INSERT in its own transaction
+        Rows whose email was registered since the up-front check are skipped by the
+        database (ON CONFLICT DO NOTHING) and reported as conflicts.
+        """
+        users = User.__table__
+        now = datetime.utcnow()
+        rows = [
+            {"email": user.email, "name": user.name, "hashed_password": hashed_password, "created_at": now, "updated_at": now}
+            for _, user, hashed_password in batch
+        ]
+
+        with engine.begin() as connection:
+            statement = _insert_ignoring_conflicts(connection.dialect.name, users)
+            inserted = connection.execute(statement.values(rows).returning(users.c.id, users.c.email))
+            created = {email: user_id for user_id, email in inserted}
+
+        return [
+            _result(index, user.email, "created", id=str(created[user.email])) if user.email in created
+            else _result(index, user.email, "conflict", error="Email already registered")
+            for index, user, _ in batch
+        ]
+
+
+def _insert_ignoring_conflicts(dialect: str, table):
+    if dialect == "postgresql":
+        return postgresql.insert(table).on_conflict_do_nothing(index_elements=["email"])
+    if dialect == "sqlite":
+        return sqlite.insert(table).on_conflict_do_nothing(index_elements=["email"])
+    # Elsewhere a concurrent signup for the same email fails the whole batch
+    return insert(table)
+
+
+def _result(index: int, email: str, status: str, **fields) -> Dict[str, Any]:
+    return {"index": index, "email": email, "status": status, **fields}
@@ -1,17 +1,29 @@
+from sqlalchemy import bindparam, delete, func, insert, union_all, update
+from sqlalchemy.engine import Row
 from sqlmodel import Session, select
-from typing import List, Optional
-from ..models.task import Task, TaskCreate, TaskUpdate, TaskResponse
+from typing import List, Optional, Sequence, Tuple
+from ..models.task import TASK_TIER_COLUMNS, ArchivedTask, Task, TaskCreate, TaskUpdate, TaskResponse
+from ..utils.ordering import evenly_spaced_keys, key_between
+from ..utils.tracing import traced_methods
 from fastapi import HTTPException, status
 from datetime import datetime
 
 
+# Columns returned by the row-based read paths when no projection is requested
+TASK_READ_COLUMNS = ("id", "user_id", "title", "description", "completed", "version", "created_at", "updated_at")
+
+# Every read and write excludes soft-deleted rows; matches the partial index predicates on Task
+NOT_DELETED = Task.deleted_at.is_(None)
+
+
+@traced_methods
 class TaskService:
     @staticmethod
     def get_all_tasks(session: Session, user_id: int, completed: Optional[bool] = None) -> List[Task]:
         """
         Get all tasks for a specific user, optionally filtered by completion status
         """
-        statement = select(Task).where(Task.user_id == user_id)
+        statement = select(Task).where(Task.user_id == user_id, NOT_DELETED)
 
         if completed is not None:
             statement = statement.where(Task.completed == completed)
@@ -19,12 +31,115 @@ class TaskService:
         tasks = session.exec(statement).all()
         return tasks
 
+    @staticmethod
+    def get_all_task_rows(session: Session, user_id: int, completed: Optional[bool] = None, columns: Optional[Sequence[str]] = None, ordered: bool = False, include_archived: bool = False, limit: Optional[int] = None, offset: int = 0) -> List[Row]:
+        """
+        Read-only variant of get_all_tasks that selects plain column tuples
+        Rows skip Task construction and the session identity map; they expose the
+        same attribute names as Task, so they can be passed to the same serializers.
+        `columns` narrows the SELECT to the given Task column names; `ordered`
+        returns tasks in their manual order, read from the (user_id, position) index.
+        `include_archived` adds the user's archived tasks with a UNION ALL.
+        `limit`/`offset` page the result in SQL; count_task_rows gives the total.
+        """
+        if include_archived and ordered:
+            # ORDER BY on a UNION can only use selected columns
+            columns = list(dict.fromkeys([*(columns or TASK_READ_COLUMNS), "position", "id"]))
+
+        statement = select(*TaskService._read_columns(columns)).where(Task.user_id == user_id, NOT_DELETED)
+        if completed is not None:
+            statement = statement.where(Task.completed == completed)
+
+        if include_archived:
+            archived = select(*TaskService._read_columns(columns, ArchivedTask)).where(ArchivedTask.user_id == user_id)
+            if completed is not None:
+                archived = archived.where(ArchivedTask.completed == completed)
+            statement = union_all(statement, archived)
+            if ordered:
+                statement = statement.order_by(statement.selected_columns.position, statement.selected_columns.id)
+        elif ordered:
+            statement = statement.order_by(Task.position, Task.id)
+
+        if limit is not None:
+            statement = statement.limit(limit).offset(offset)
+
+        return session.connection().execute(statement).all()
+
+    @staticmethod
+    def count_task_rows(session: Session, user_id: int, completed: Optional[bool] = None, include_archived: bool = False) -> int:
+        """
+        Number of rows get_all_task_rows returns for the same filters, without a limit
+        """
+        statement = select(func.count()).select_from(Task).where(Task.user_id == user_id, NOT_DELETED)
+        if completed is not None:
+            statement = statement.where(Task.completed == completed)
+        total = session.connection().execute(statement).scalar_one()
+
+        if include_archived:
+            archived = select(func.count()).select_from(ArchivedTask).where(ArchivedTask.user_id == user_id)
+            if completed is not None:
+                archived = archived.where(ArchivedTask.completed == completed)
+            total += session.connection().execute(archived).scalar_one()
+
+        return total
+
+    @staticmethod
+    def get_task_row_by_id(session: Session, user_id: int, task_id: int, columns: Optional[Sequence[str]] = None, include_archived: bool = False) -> Row:
+        """
+        Row-based variant of get_task_by_id, optionally narrowed to `columns`
+        With include_archived, a task not found in the hot table is looked up in the archive
+        """
+        statement = select(*TaskService._read_columns(columns)).where(Task.id == task_id, Task.user_id == user_id, NOT_DELETED)
+        row = session.connection().execute(statement).first()
+
+        if row is None and include_archived:
+            statement = select(*TaskService._read_columns(columns, ArchivedTask)).where(
+                ArchivedTask.id == task_id, ArchivedTask.user_id == user_id
+            )
+            row = session.connection().execute(statement).first()
+
+        if row is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Task not found"
+            )
+
+        return row
+
+    @staticmethod
+    def get_task_rows_by_ids(session: Session, user_id: int, task_ids: Sequence[int], columns: Optional[Sequence[str]] = None, include_archived: bool = False) -> List[Row]:
+        """
+        Fetch many of a user's tasks in one WHERE user_id = ? AND id IN (...) query
+        The id column is always selected so callers can tell which ids were not found
+        """
+        if not task_ids:
+            return []
+
+        if columns and "id" not in columns:
+            columns = ["id", *columns]
+
+        statement = select(*TaskService._read_columns(columns)).where(
+            Task.user_id == user_id,
+            Task.id.in_(task_ids),
+            NOT_DELETED,
+        )
+        if include_archived:
+            statement = union_all(statement, select(*TaskService._read_columns(columns, ArchivedTask)).where(
+                ArchivedTask.user_id == user_id,
+                ArchivedTask.id.in_(task_ids),
+            ))
+        return session.connection().execute(statement).all()
+
+    @staticmethod
+    def _read_columns(columns: Optional[Sequence[str]], model=Task) -> list:
+        return [getattr(model, name) for name in (columns or TASK_READ_COLUMNS)]
+
     @staticmethod
     def get_task_by_id(session: Session, user_id: int, task_id: int) -> Task:
         """
         Get a specific task by ID for a user
         """
-        statement = select(Task).where(Task.id == task_id, Task.user_id == user_id)
+        statement = select(Task).where(Task.id == task_id, Task.user_id == user_id, NOT_DELETED)
         task = session.exec(statement).first()
 
         if not task:
@@ -36,91 +151,305 @@ class TaskService:
         return task
 
     @staticmethod
-    def create_task(session: Session, task_create: TaskCreate) -> Task:
+    def create_task(session: Session, task_create: TaskCreate, commit: bool = True) -> Task:
         """
         Create a new task
+        With commit=False the row is only flushed, for the caller to commit with its own writes
         """
+        # New tasks go to the end of the user's manual order. Read the current end on the
+        # writer, inside the transaction that inserts, so concurrent creates (serialized by
+        # BEGIN IMMEDIATE on SQLite) never compute the same position from a stale read
+        write_bind = getattr(session, "write_bind", None)
+        last_position = session.execute(
+            select(func.max(Task.position)).where(Task.user_id == task_create.user_id, NOT_DELETED),
+            bind_arguments={"bind": write_bind} if write_bind is not None else None,
+        ).scalar()
+
         # Create the task instance from the input data
         db_task = Task(
             title=task_create.title,
             description=task_create.description,
             completed=task_create.completed,
             user_id=task_create.user_id,
+            position=key_between(last_position, None),
         )
 
         # Add the task to the session
         session.add(db_task)
+        if not commit:
+            session.flush()
+            return db_task
         session.commit()
         session.refresh(db_task)
 
         return db_task
 
     @staticmethod
-    def update_task(session: Session, user_id: int, task_id: int, task_update: TaskUpdate) -> Task:
+    def update_task(session: Session, user_id: int, task_id: int, task_update: TaskUpdate, expected_version: Optional[int] = None) -> Row:
         """
-        Update an existing task
+        Update an existing task in a single UPDATE ... RETURNING statement
+        The version is bumped atomically; with expected_version set, the update only
+        applies if the task is still at that version (412 otherwise).
+        An archived task is restored to the hot table first.
         """
-        statement = select(Task).where(Task.id == task_id, Task.user_id == user_id)
-        db_task = session.exec(statement).first()
-
-        if not db_task:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Task not found"
-            )
-
         # Update only the fields that are provided
         update_data = task_update.dict(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(db_task, field, value)
+        update_data.pop("version", None)
 
-        # Update the updated_at timestamp
-        db_task.updated_at = datetime.utcnow()
+        return TaskService._versioned_update(session, user_id, task_id, update_data, expected_version)
+
+    @staticmethod
+    def _versioned_update(session: Session, user_id: int, task_id: int, values: dict, expected_version: Optional[int]) -> Row:
+        statement = update(Task).where(Task.id == task_id, Task.user_id == user_id, NOT_DELETED)
+        if expected_version is not None:
+            statement = statement.where(Task.version == expected_version)
+
+        statement = (
+            statement
+            .values(**values, version=Task.version + 1, updated_at=datetime.utcnow())
+            .returning(*TaskService._read_columns(None))
+            .execution_options(synchronize_session=False)
+        )
+        row = session.execute(statement).first()
+        if row is None and TaskService._restore_archived_task(session, user_id, task_id):
+            row = session.execute(statement).first()
+
+        if row is None:
+            # Undo a restore whose update did not apply
+            session.rollback()
+
+            # Only the failure path pays for a lookup, to tell 404 from 412
+            exists = session.execute(
+                select(Task.id).where(Task.id == task_id, Task.user_id == user_id, NOT_DELETED)
+            ).first() or session.execute(
+                select(ArchivedTask.id).where(ArchivedTask.id == task_id, ArchivedTask.user_id == user_id)
+            ).first()
+            if exists is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Task not found"
+                )
+            raise HTTPException(
+                status_code=status.HTTP_412_PRECONDITION_FAILED,
+                detail="Task was modified by another request - version mismatch"
+            )
 
-        session.add(db_task)
         session.commit()
-        session.refresh(db_task)
+        return row
 
-        return db_task
+    @staticmethod
+    def _restore_archived_task(session: Session, user_id: int, task_id: int) -> bool:
+        """
+        Move a task from archived_tasks back into tasks, in the caller's transaction
+        Returns False if the user has no such archived task
+        """
+        tasks, archived = Task.__table__, ArchivedTask.__table__
+        restored = session.execute(
+            insert(tasks).from_select(
+                TASK_TIER_COLUMNS,
+                select(*[archived.c[name] for name in TASK_TIER_COLUMNS]).where(
+                    archived.c.id == task_id, archived.c.user_id == user_id
+                ),
+            )
+        )
+        if restored.rowcount == 0:
+            return False
+
+        session.execute(delete(archived).where(archived.c.id == task_id))
+        return True
 
     @staticmethod
     def delete_task(session: Session, user_id: int, task_id: int) -> bool:
         """
-        Delete a task by ID for a user
+        Soft-delete a task by ID for a user with a single UPDATE
+        The row is hard-deleted later by the purge worker; archived tasks are deleted directly
         """
-        statement = select(Task).where(Task.id == task_id, Task.user_id == user_id)
-        db_task = session.exec(statement).first()
+        statement = (
+            update(Task)
+            .where(Task.id == task_id, Task.user_id == user_id, NOT_DELETED)
+            .values(deleted_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        deleted = session.execute(statement).rowcount
+        if deleted == 0:
+            archived = ArchivedTask.__table__
+            deleted = session.execute(
+                delete(archived).where(archived.c.id == task_id, archived.c.user_id == user_id)
+            ).rowcount
+        session.commit()
 
-        if not db_task:
+        if deleted == 0:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Task not found"
             )
 
-        session.delete(db_task)
-        session.commit()
-
         return True
 
     @staticmethod
-    def toggle_task_completion(session: Session, user_id: int, task_id: int, completed: bool) -> Task:
+    def toggle_task_completion(session: Session, user_id: int, task_id: int, completed: bool, expected_version: Optional[int] = None) -> Row:
         """
         Toggle the completion status of a task
         """
-        statement = select(Task).where(Task.id == task_id, Task.user_id == user_id)
-        db_task = session.exec(statement).first()
+        return TaskService._versioned_update(session, user_id, task_id, {"completed": completed}, expected_version)
+
+    @staticmethod
+    def move_task(session: Session, user_id: int, task_id: int, after_id: Optional[int] = None, before_id: Optional[int] = None) -> str:
+        """
+        Move a task between two others in the manual order by giving it a new
+        fractional key; only the moved row is written. With just one neighbour,
+        the other side is found with an index seek. Returns the new key.
+        """
+        if after_id is None and before_id is None:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Provide after_id and/or before_id"
+            )
+        if after_id == before_id or task_id in (after_id, before_id):
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="after_id and before_id must be two different tasks other than the one being moved"
+            )
 
-        if not db_task:
+        bounds = TaskService._move_bounds(session, user_id, after_id, before_id)
+        if bounds is None:
+            # Tasks created before manual ordering have no key, and concurrent moves can
+            # leave duplicate keys; respace once and retry, never more
+            TaskService.rebalance_task_positions(session, user_id)
+            bounds = TaskService._move_bounds(session, user_id, after_id, before_id)
+            if bounds is None:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="Task order changed during the move - please retry"
+                )
+        lower, upper = bounds
+
+        try:
+            position = key_between(lower, upper)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="after_id must come before before_id in the current order"
+            )
+
+        result = session.execute(
+            update(Task)
+            .where(Task.id == task_id, Task.user_id == user_id, NOT_DELETED)
+            .values(position=position)
+            .execution_options(synchronize_session=False)
+        )
+        session.commit()
+
+        if result.rowcount == 0:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Task not found"
             )
 
-        db_task.completed = completed
-        db_task.updated_at = datetime.utcnow()
+        return position
 
-        session.add(db_task)
-        session.commit()
-        session.refresh(db_task)
+    @staticmethod
+    def _move_bounds(session: Session, user_id: int, after_id: Optional[int], before_id: Optional[int]) -> Optional[Tuple[Optional[str], Optional[str]]]:
+        """
+        Keys to place a moved task between, or None if the neighbours need respacing first
+        (a neighbour without a key, or both neighbours sharing one)
+        """
+        lower = upper = None
+        if after_id is not None:
+            lower = TaskService._position_of(session, user_id, after_id)
+            if lower is None:
+                return None
+        if before_id is not None:
+            upper = TaskService._position_of(session, user_id, before_id)
+            if upper is None:
+                return None
+
+        if before_id is None:
+            upper = session.execute(
+                select(func.min(Task.position)).where(Task.user_id == user_id, NOT_DELETED, Task.position > lower)
+            ).scalar()
+        elif after_id is None:
+            lower = session.execute(
+                select(func.max(Task.position)).where(Task.user_id == user_id, NOT_DELETED, Task.position < upper)
+            ).scalar()
+
+        if lower is not None and lower == upper:
+            return None
+        return lower, upper
+
+    @staticmethod
+    def _position_of(session: Session, user_id: int, task_id: int) -> Optional[str]:
+        row = session.execute(
+            select(Task.position).where(Task.id == task_id, Task.user_id == user_id, NOT_DELETED)
+        ).first()
+
+        if row is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Task {task_id} not found"
+            )
+
+        return row.position
+
+    @staticmethod
+    def rebalance_task_positions(session: Session, user_id: int) -> int:
+        """
+        Rewrite all of a user's order keys as short, evenly spaced keys, keeping
+        the current order. Run in the background when keys grow too long.
+        Returns the number of tasks rewritten.
+        """
+        task_ids = session.execute(
+            select(Task.id).where(Task.user_id == user_id, NOT_DELETED).order_by(Task.position, Task.id)
+        ).scalars().all()
+
+        if task_ids:
+            # Core executemany against the table: one statement, routed to the writer
+            table = Task.__table__
+            session.execute(
+                update(table).where(table.c.id == bindparam("task_id")).values(position=bindparam("new_position")),
+                [{"task_id": task_id, "new_position": key} for task_id, key in zip(task_ids, evenly_spaced_keys(len(task_ids)))],
+            )
+            session.commit()
+
+        return len(task_ids)
+
+    @staticmethod
+    def set_completion_for_all(session: Session, user_id: int, completed: bool, commit: bool = True) -> int:
+        """
+        Mark every task of a user as completed (or not) in a single UPDATE
+        Only rows whose status actually changes are written; returns that count
+        """
+        statement = (
+            update(Task)
+            .where(Task.user_id == user_id, NOT_DELETED, Task.completed == (not completed))
+            .values(completed=completed, version=Task.version + 1, updated_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        result = session.execute(statement)
+        if commit:
+            session.commit()
+
+        return result.rowcount
+
+    @staticmethod
+    def delete_tasks_by_status(session: Session, user_id: int, completed: bool, commit: bool = True) -> int:
+        """
+        Soft-delete all of a user's tasks with the given completion status in a single UPDATE
+        Matching archived tasks are deleted too. Returns the number of deleted tasks
+        """
+        statement = (
+            update(Task)
+            .where(Task.user_id == user_id, NOT_DELETED, Task.completed == completed)
+            .values(deleted_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        deleted = session.execute(statement).rowcount
+
+        archived = ArchivedTask.__table__
+        deleted += session.execute(
+            delete(archived).where(archived.c.user_id == user_id, archived.c.completed == completed)
+        ).rowcount
+        if commit:
+            session.commit()
 
-        return db_task
\ No newline at end of file
+        return deleted
@@ -0,0 +1,76 @@
+"""
+Per-request deadlines shared between the HTTP layer and database calls
+"""
+import threading
+import time
+from contextvars import ContextVar, Token
+from typing import Any, Optional, Set
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a request's deadline passes (or its client disconnects) during a database call"""
+
+
+class Deadline:
+    """
+    Time budget for one request
+    Database hooks read it from the context to bound statements; cancel() also
+    interrupts statements that are running right now on attached connections.
+    Once the response is sent the deadline is disarmed, so background tasks that
+    run afterwards are never interrupted.
+    """
+
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        self.expires_at = time.monotonic() + timeout
+        self.cancelled = False
+        self.armed = True
+        self._lock = threading.Lock()
+        self._connections: Set[Any] = set()
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.armed and (self.cancelled or time.monotonic() >= self.expires_at)
+
+    def disarm(self):
+        self.armed = False
+
+    def cancel(self):
+        """
+        Client went away: stop any running statement so its connection is freed
+        """
+        if not self.armed:
+            return
+        self.cancelled = True
+        with self._lock:
+            connections = list(self._connections)
+        for connection in connections:
+            # sqlite3: interrupt(); psycopg: cancel(); both are safe to call from another thread
+            interrupt = getattr(connection, "interrupt", None) or getattr(connection, "cancel", None)
+            if interrupt is not None:
+                interrupt()
+
+    def attach(self, connection: Any):
+        with self._lock:
+            self._connections.add(connection)
+
+    def detach(self, connection: Any):
+        with self._lock:
+            self._connections.discard(connection)
+
+
+_current_deadline: ContextVar[Optional[Deadline]] = ContextVar("request_deadline", default=None)
+
+
+def current_deadline() -> Optional[Deadline]:
+    return _current_deadline.get()
+
+
+def set_deadline(deadline: Optional[Deadline]) -> Token:
+    return _current_deadline.set(deadline)
+
+
+def reset_deadline(token: Token):
+    _current_deadline.reset(token)
@@ -0,0 +1,18 @@
+"""
+Idempotency-Key helpers; responses are stored by services/idempotency_service.py
+"""
+import hashlib
+import json
+from typing import Any
+
+# Longest Idempotency-Key value accepted
+MAX_IDEMPOTENCY_KEY_LENGTH = 255
+
+
+def request_fingerprint(*parts: Any) -> str:
+    """
+    Digest of what identifies a request (route, payload), to detect a key reused for a different request
+    """
+    encoded = json.dumps(parts, sort_keys=True, default=str).encode()
+    return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
@@ -1,10 +1,11 @@
-import jwt
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
 from fastapi import HTTPException, status
 from ..config.settings import settings
+from .tracing import traced
 
 
+@traced("jwt.create_access_token")
 def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
     """
     Create a JWT access token with the given data
@@ -13,6 +14,8 @@ def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta]
     - Includes standard JWT claims
     - Uses configured signing algorithm and secret
     """
+    import jwt
+
     to_encode = data.copy()
 
     if expires_delta:
@@ -32,6 +35,7 @@ def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta]
     return encoded_jwt
 
 
+@traced("jwt.verify_token")
 def verify_token(token: str) -> Optional[Dict[str, Any]]:
     """
     Verify a JWT token and return the payload if valid
@@ -40,6 +44,8 @@ def verify_token(token: str) -> Optional[Dict[str, Any]]:
     - Checks expiration
     - Validates required claims
     """
+    import jwt
+
     try:
         payload = jwt.decode(
             token,
@@ -155,6 +161,8 @@ def validate_token_integrity(token: str) -> bool:
     """
     Validates the token integrity by verifying its signature against the stored secret
     """
+    import jwt
+
     try:
         # This will validate the signature against the secret without fully decoding
         jwt.decode(
@@ -180,6 +188,8 @@ def handle_token_validation_error(error: Exception) -> HTTPException:
     Standardized error handling for token validation issues
     Provides security-appropriate error messages without revealing sensitive details
     """
+    import jwt
+
     if isinstance(error, jwt.ExpiredSignatureError):
         return HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -1,28 +1,98 @@
+import atexit
+import json
 import logging
+import queue
+import re
 import sys
-from datetime import datetime
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from typing import Any, Dict, Optional
 from ..config.settings import settings
 
 
+# Pre-compiled patterns used to strip sensitive values from event payloads
+_EMAIL_PATTERN = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
+_TOKEN_PATTERN = re.compile(r'[A-Za-z0-9_-]+\.[A-Za-z0-9_-]+\.[A-Za-z0-9_-]+')
+_PASSWORD_PATTERN = re.compile(r'password["\']?\s*[:=]\s*["\'][^"\']*["\']?')
+
+# The listener thread that owns the real (blocking) handlers
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional["NonBlockingQueueHandler"] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Format log records as single-line JSON documents
+    Event payloads attached by the log_*_event helpers are sanitized here,
+    so the work happens on the listener thread rather than the request thread
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'timestamp': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'location': f"{record.pathname}:{record.lineno}",
+        }
+
+        event = getattr(record, 'event', None)
+        if event is not None:
+            entry['event'] = _sanitize_event(event)
+
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+
+        return json.dumps(entry, default=str)
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Queue handler that never blocks the calling thread
+    Records are handed over unformatted; if the queue is full they are dropped and counted
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._drop_lock = threading.Lock()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Formatting is deferred to the listener thread
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._drop_lock:
+                self.dropped += 1
+
+
 def setup_logging():
     """
     Configure logging for the application
-    Sets up different log levels based on environment and security considerations
+    Request threads only enqueue records; a background listener formats them as JSON
+    and writes them to stdout and, outside development, to a size-rotated log file
     """
-    # Create a custom formatter that includes more security-relevant information
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s - %(pathname)s:%(lineno)d'
-    )
+    global _listener, _queue_handler
+
+    formatter = JsonFormatter()
 
     # Configure the root logger
     root_logger = logging.getLogger()
 
     # Set log level based on environment
-    if settings.environment.lower() == 'development':
+    if settings.ENVIRONMENT.lower() == 'development':
         root_logger.setLevel(logging.DEBUG)
     else:
-        root_logger.setLevel(logging.INFO)
+        root_logger.setLevel(settings.LOG_LEVEL.upper())
+
+    # Stop a previous listener so repeated calls don't leak threads
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
 
     # Remove default handlers to avoid duplicates
     if root_logger.handlers:
@@ -31,42 +101,89 @@ def setup_logging():
     # Create console handler
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setFormatter(formatter)
-    root_logger.addHandler(console_handler)
-
-    # In production, you might also want to add file handler
-    if settings.environment.lower() != 'development':
-        file_handler = logging.FileHandler('app.log')
+    handlers = [console_handler]
+
+    # In production, also write to a size-rotated file
+    if settings.ENVIRONMENT.lower() != 'development':
+        file_handler = RotatingFileHandler(
+            settings.LOG_FILE,
+            maxBytes=settings.LOG_MAX_BYTES,
+            backupCount=settings.LOG_BACKUP_COUNT,
+        )
         file_handler.setFormatter(formatter)
-        root_logger.addHandler(file_handler)
+        handlers.append(file_handler)
+
+    log_queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+    _queue_handler = NonBlockingQueueHandler(log_queue)
+    root_logger.addHandler(_queue_handler)
+
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
 
     return root_logger
 
 
+def shutdown_logging():
+    """
+    Flush queued records and stop the listener thread
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def get_dropped_log_count() -> int:
+    """
+    Number of records dropped because the log queue was full
+    """
+    return _queue_handler.dropped if _queue_handler is not None else 0
+
+
+def _sanitize_event(event: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Mask tokens and other sensitive values in an event payload
+    """
+    details = dict(event.get('details') or {})
+
+    # Don't log sensitive information like passwords or full tokens
+    if 'token' in details:
+        original_token = str(details['token'])
+        details['token'] = f"{original_token[:10]}..." if len(original_token) > 10 else "MASKED"
+
+    for key, value in details.items():
+        if key != 'token' and isinstance(value, str):
+            details[key] = sanitize_log_message(value)
+
+    return {**event, 'details': details}
+
+
+def _log_event(level: int, label: str, event: Dict[str, Any]):
+    logger = logging.getLogger(__name__)
+
+    # Filtered-out events never reach the queue or the formatter
+    if not logger.isEnabledFor(level):
+        return
+
+    # stacklevel=3 attributes the record to the caller of the log_*_event helper
+    logger.log(level, "%s: %s", label, event['event_type'], extra={'event': event}, stacklevel=3)
+
+
 def log_auth_event(event_type: str, user_id: Optional[str] = None, details: Optional[Dict[str, Any]] = None):
     """
     Log authentication-related events with appropriate security context
     Examples: login_success, login_failure, token_creation, token_verification, etc.
     """
-    logger = logging.getLogger(__name__)
+    if event_type.startswith('login') or event_type.startswith('auth'):
+        level = logging.INFO
+    else:
+        level = logging.DEBUG
 
-    event_details = {
+    _log_event(level, "AUTH_EVENT", {
         'event_type': event_type,
-        'timestamp': datetime.utcnow().isoformat(),
         'user_id': user_id or 'unknown',
         'details': details or {},
-    }
-
-    # Don't log sensitive information like passwords or full tokens
-    if 'token' in event_details['details']:
-        # Mask the token for security
-        original_token = event_details['details']['token']
-        masked_token = f"{original_token[:10]}..." if len(original_token) > 10 else "MASKED"
-        event_details['details']['token'] = masked_token
-
-    if event_type.startswith('login') or event_type.startswith('auth'):
-        logger.info(f"AUTH_EVENT: {event_details}")
-    else:
-        logger.debug(f"AUTH_EVENT: {event_details}")
+    })
 
 
 def log_security_event(event_type: str, user_id: Optional[str] = None, ip_address: Optional[str] = None, details: Optional[Dict[str, Any]] = None):
@@ -74,17 +191,12 @@ def log_security_event(event_type: str, user_id: Optional[str] = None, ip_addres
     Log security-relevant events
     Examples: invalid_token, expired_token, unauthorized_access, etc.
     """
-    logger = logging.getLogger(__name__)
-
-    event_details = {
+    _log_event(logging.WARNING, "SECURITY_EVENT", {
         'event_type': event_type,
-        'timestamp': datetime.utcnow().isoformat(),
         'user_id': user_id or 'unknown',
         'ip_address': ip_address or 'unknown',
         'details': details or {},
-    }
-
-    logger.warning(f"SECURITY_EVENT: {event_details}")
+    })
 
 
 def log_token_event(event_type: str, user_id: Optional[str] = None, token_id: Optional[str] = None, details: Optional[Dict[str, Any]] = None):
@@ -92,39 +204,34 @@ def log_token_event(event_type: str, user_id: Optional[str] = None, token_id: Op
     Log JWT token-related events with security considerations
     Examples: token_generated, token_verified, token_expired, token_invalid, etc.
     """
-    logger = logging.getLogger(__name__)
+    if event_type == 'token_invalid' or event_type == 'token_expired':
+        level = logging.WARNING
+    else:
+        level = logging.INFO
 
-    event_details = {
+    _log_event(level, "TOKEN_EVENT", {
         'event_type': event_type,
-        'timestamp': datetime.utcnow().isoformat(),
         'user_id': user_id or 'unknown',
         'token_id': token_id or 'unknown',  # In a real implementation, you might track token IDs
         'details': details or {},
-    }
-
-    if event_type == 'token_invalid' or event_type == 'token_expired':
-        logger.warning(f"TOKEN_EVENT: {event_details}")
-    else:
-        logger.info(f"TOKEN_EVENT: {event_details}")
+    })
 
 
 def sanitize_log_message(message: str) -> str:
     """
     Remove sensitive information from log messages
     """
-    import re
-
     # Remove potential email addresses
-    sanitized = re.sub(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', '[EMAIL_MASKED]', message)
+    sanitized = _EMAIL_PATTERN.sub('[EMAIL_MASKED]', message)
 
     # Remove potential tokens (anything that looks like JWT: part.part.part)
-    sanitized = re.sub(r'[A-Za-z0-9_-]+\.[A-Za-z0-9_-]+\.[A-Za-z0-9_-]+', '[TOKEN_MASKED]', sanitized)
+    sanitized = _TOKEN_PATTERN.sub('[TOKEN_MASKED]', sanitized)
 
     # Remove potential passwords or other sensitive terms
-    sanitized = re.sub(r'password["\']?\s*[:=]\s*["\'][^"\']*["\']?', 'password":"[PASSWORD_MASKED]"', sanitized)
+    sanitized = _PASSWORD_PATTERN.sub('password":"[PASSWORD_MASKED]"', sanitized)
 
     return sanitized
 
 
-# Initialize the logging configuration
-setup_logging()
\ No newline at end of file
+# Flush anything still queued when the interpreter exits
+atexit.register(shutdown_logging)
@@ -0,0 +1,154 @@
+"""
+Fractional order keys for manual task ordering
+
+Keys are strings that sort lexicographically (byte order, so they work with any
+database collation for ASCII) and a new key can always be generated between
+any two existing ones, so moving a task only rewrites that task's row.
+
+A key is an integer part followed by an optional fraction. The first character
+of the integer part encodes its length ('a' = 1 digit, 'b' = 2 digits, ... and
+'Z', 'Y', ... for negative integers), which keeps keys short when tasks are
+appended one after another: a0, a1, ..., az, b00, b01, ...
+"""
+from typing import List, Optional
+
+DIGITS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+_SMALLEST_INTEGER = "A" + DIGITS[0] * 26
+_FIRST_KEY = "a" + DIGITS[0]
+
+
+def _midpoint(a: str, b: Optional[str]) -> str:
+    """
+    Fraction strictly between a and b (b=None means 1); neither may end in '0'
+    """
+    if b is not None:
+        # Keep the shared prefix, then split the remainder
+        n = 0
+        while n < len(b) and (a[n] if n < len(a) else DIGITS[0]) == b[n]:
+            n += 1
+        if n > 0:
+            return b[:n] + _midpoint(a[n:], b[n:])
+
+    digit_a = DIGITS.index(a[0]) if a else 0
+    digit_b = DIGITS.index(b[0]) if b is not None else len(DIGITS)
+    if digit_b - digit_a > 1:
+        return DIGITS[(digit_a + digit_b + 1) // 2]
+
+    # Adjacent first digits
+    if b is not None and len(b) > 1:
+        return b[:1]
+    return DIGITS[digit_a] + _midpoint(a[1:], None)
+
+
+def _integer_length(head: str) -> int:
+    if "a" <= head <= "z":
+        return ord(head) - ord("a") + 2
+    if "A" <= head <= "Z":
+        return ord("Z") - ord(head) + 2
+    raise ValueError(f"Invalid order key head: {head!r}")
+
+
+def _integer_part(key: str) -> str:
+    length = _integer_length(key[0])
+    if length > len(key):
+        raise ValueError(f"Invalid order key: {key!r}")
+    return key[:length]
+
+
+def _increment_integer(x: str) -> Optional[str]:
+    head, digits = x[0], list(x[1:])
+    for i in range(len(digits) - 1, -1, -1):
+        position = DIGITS.index(digits[i]) + 1
+        if position < len(DIGITS):
+            digits[i] = DIGITS[position]
+            return head + "".join(digits)
+        digits[i] = DIGITS[0]
+
+    # Every digit carried over: move to the next integer length
+    if head == "Z":
+        return _FIRST_KEY
+    if head == "z":
+        return None
+    new_head = chr(ord(head) + 1)
+    if new_head > "a":
+        digits.append(DIGITS[0])
+    else:
+        digits.pop()
+    return new_head + "".join(digits)
+
+
+def _decrement_integer(x: str) -> Optional[str]:
+    head, digits = x[0], list(x[1:])
+    for i in range(len(digits) - 1, -1, -1):
+        position = DIGITS.index(digits[i]) - 1
+        if position >= 0:
+            digits[i] = DIGITS[position]
+            return head + "".join(digits)
+        digits[i] = DIGITS[-1]
+
+    if head == "a":
+        return "Z" + DIGITS[-1]
+    if head == "A":
+        return None
+    new_head = chr(ord(head) - 1)
+    if new_head < "Z":
+        digits.append(DIGITS[-1])
+    else:
+        digits.pop()
+    return new_head + "".join(digits)
+
+
+def key_between(lower: Optional[str], upper: Optional[str]) -> str:
+    """
+    Generate an order key strictly between lower and upper
+    None means unbounded on that side; lower must sort before upper
+    """
+    if lower is not None and upper is not None and lower >= upper:
+        raise ValueError(f"{lower!r} must sort before {upper!r}")
+
+    if lower is None and upper is None:
+        return _FIRST_KEY
+
+    if lower is None:
+        integer = _integer_part(upper)
+        fraction = upper[len(integer):]
+        if integer == _SMALLEST_INTEGER:
+            return integer + _midpoint("", fraction)
+        if integer < upper:
+            return integer
+        decremented = _decrement_integer(integer)
+        if decremented is None:
+            raise ValueError("Cannot generate a key before the smallest key")
+        return decremented
+
+    if upper is None:
+        integer = _integer_part(lower)
+        fraction = lower[len(integer):]
+        incremented = _increment_integer(integer)
+        return integer + _midpoint(fraction, None) if incremented is None else incremented
+
+    lower_integer = _integer_part(lower)
+    lower_fraction = lower[len(lower_integer):]
+    upper_integer = _integer_part(upper)
+    upper_fraction = upper[len(upper_integer):]
+    if lower_integer == upper_integer:
+        return lower_integer + _midpoint(lower_fraction, upper_fraction)
+
+    incremented = _increment_integer(lower_integer)
+    if incremented is None:
+        raise ValueError("Cannot generate a key after the largest key")
+    if incremented < upper:
+        return incremented
+    return lower_integer + _midpoint(lower_fraction, None)
+
+
+def evenly_spaced_keys(count: int) -> List[str]:
+    """
+    `count` consecutive short keys, used when rebalancing a user's ordering
+    """
+    keys = []
+    key = None
+    for _ in range(count):
+        key = key_between(key, None)
+        keys.append(key)
+    return keys
@@ -1,9 +1,15 @@
 """
 Password hashing utilities using bcrypt
+bcrypt is imported on first use so importing the app doesn't load it.
 """
-import bcrypt
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator, Optional
 
+from .tracing import traced
 
+
+@traced("bcrypt.hash_password")
 def hash_password(password: str) -> str:
     """
     Hash a password using bcrypt
@@ -14,12 +20,15 @@ def hash_password(password: str) -> str:
     Returns:
         Hashed password as string
     """
+    import bcrypt
+
     # Generate salt and hash password
     salt = bcrypt.gensalt()
     hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
     return hashed.decode('utf-8')
 
 
+@traced("bcrypt.verify_password")
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     Verify a password against a hashed password
@@ -31,6 +40,8 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     Returns:
         True if password matches, False otherwise
     """
+    import bcrypt
+
     try:
         return bcrypt.checkpw(
             plain_password.encode('utf-8'),
@@ -38,3 +49,35 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         )
     except Exception:
         return False
+
+
+def hashing_workers(workers: Optional[int] = None) -> int:
+    """
+    Number of threads to hash with: `workers` if set, else one per CPU this process may use
+    """
+    if workers:
+        return workers
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def hash_passwords(passwords: Iterable[str], workers: Optional[int] = None) -> Iterator[str]:
+    """
+    Hash many passwords in parallel, yielding the hashes in input order
+
+    bcrypt releases the GIL while it hashes, so a thread pool keeps every core busy
+    without the start-up cost of worker processes or forking a threaded server.
+    Hashing runs ahead of the consumer; closing the iterator cancels what is left.
+    """
+    import bcrypt
+
+    def hash_one(password: str) -> str:
+        return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+
+    pool = ThreadPoolExecutor(max_workers=hashing_workers(workers), thread_name_prefix="bcrypt")
+    try:
+        yield from pool.map(hash_one, passwords)
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,238 @@
+"""
+On-demand diagnostics for a live worker: a sampling CPU profiler and tracemalloc snapshots
+Nothing runs until an admin endpoint asks: the sampler exists only for the length
+of one profile, and tracemalloc is started by the first snapshot and stopped again
+by stop_memory_tracing(), so leaving this compiled in costs nothing while idle.
+"""
+import itertools
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, OrderedDict
+from typing import Any, Dict, Optional
+
+from fastapi import HTTPException, status
+
+from ..config.settings import settings
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# A thread whose innermost Python frame is in one of these modules is parked
+# waiting (event loop select, idle thread pool workers, locks), not using CPU;
+# under uvloop the idle event loop shows asyncio.run as its innermost frame
+_IDLE_MODULES = (
+    "selectors.py",
+    "queue.py",
+    "threading.py",
+    os.path.join("asyncio", "runners.py"),
+    os.path.join("concurrent", "futures", "thread.py"),
+)
+
+_profile_lock = threading.Lock()
+_frame_labels: Dict[Any, str] = {}
+
+_memory_lock = threading.Lock()
+_snapshots: "OrderedDict[int, tracemalloc.Snapshot]" = OrderedDict()
+_snapshot_ids = itertools.count(1)
+_SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, __file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+def _short_path(filename: str) -> str:
+    marker = "site-packages" + os.sep
+    if marker in filename:
+        return filename.split(marker, 1)[1]
+    if filename.startswith(BACKEND_DIR + os.sep):
+        return os.path.relpath(filename, BACKEND_DIR)
+    return os.path.basename(filename)
+
+
+def _frame_label(code) -> str:
+    label = _frame_labels.get(code)
+    if label is None:
+        label = _frame_labels[code] = f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})"
+    return label
+
+
+def profile_cpu(seconds: float, interval: float, include_idle: bool = False) -> Dict[str, Any]:
+    """
+    Sample every thread's Python stack each `interval` seconds for `seconds`
+    Returns folded stacks ("thread;outer;...;inner" -> samples) ready for flamegraph.pl
+    or speedscope, plus per-function self/total sample counts. Runs in the calling
+    thread, which leaves itself out; one profile at a time (409 otherwise).
+    """
+    if not _profile_lock.acquire(blocking=False):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A CPU profile is already running"
+        )
+
+    try:
+        own_thread = threading.get_ident()
+        stacks: Counter = Counter()
+        samples = 0
+        idle_samples = 0
+        cpu_start = time.thread_time()
+        deadline = time.monotonic() + seconds
+        next_sample = time.monotonic()
+
+        while next_sample < deadline:
+            thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_thread:
+                    continue
+                if not include_idle and frame.f_code.co_filename.endswith(_IDLE_MODULES):
+                    idle_samples += 1
+                    continue
+                labels = []
+                while frame is not None:
+                    labels.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                labels.append(thread_names.get(thread_id, str(thread_id)))
+                stacks[";".join(reversed(labels))] += 1
+                samples += 1
+            # Don't keep the last sampled frame (and its locals) alive while sleeping
+            frame = None
+
+            next_sample += interval
+            delay = next_sample - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                # Fell behind (GIL contention): skip missed ticks rather than bursting
+                next_sample = time.monotonic()
+
+        sampler_cpu = time.thread_time() - cpu_start
+    finally:
+        _profile_lock.release()
+
+    self_counts: Counter = Counter()
+    total_counts: Counter = Counter()
+    for stack, count in stacks.items():
+        frames = stack.split(";")[1:]
+        if frames:
+            self_counts[frames[-1]] += count
+        for label in set(frames):
+            total_counts[label] += count
+
+    return {
+        "seconds": seconds,
+        "interval_ms": interval * 1000,
+        "samples": samples,
+        "idle_samples": idle_samples,
+        "sampler_cpu_ms": round(sampler_cpu * 1000, 2),
+        "stacks": stacks,
+        "top_self": self_counts.most_common(25),
+        "top_total": total_counts.most_common(25),
+    }
+
+
+def collapsed_stacks(stacks: Counter) -> str:
+    """
+    Brendan Gregg's folded stack format, one "frame;frame;frame count" line per stack
+    """
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+def _format_stat(stat, group_by: str) -> Dict[str, Any]:
+    # Tracebacks run from the oldest call to the allocating line
+    frame = stat.traceback[-1]
+    entry = {
+        "location": f"{_short_path(frame.filename)}:{frame.lineno}",
+        "size_bytes": stat.size,
+        "count": stat.count,
+    }
+    if hasattr(stat, "size_diff"):
+        entry["size_diff_bytes"] = stat.size_diff
+        entry["count_diff"] = stat.count_diff
+    if group_by == "traceback":
+        entry["traceback"] = [f"{_short_path(frame.filename)}:{frame.lineno}" for frame in stat.traceback]
+    return entry
+
+
+def take_memory_snapshot(limit: int = 25, group_by: str = "lineno") -> Dict[str, Any]:
+    """
+    Snapshot live allocations, starting tracemalloc first if it is not running
+    Only allocations made after tracing started are visible, so take a first
+    snapshot, let the suspect traffic run, then take another and diff them.
+    """
+    started = False
+    with _memory_lock:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(settings.MEMORY_SNAPSHOT_FRAMES)
+            started = True
+        snapshot = tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+        snapshot_id = next(_snapshot_ids)
+        _snapshots[snapshot_id] = snapshot
+        while len(_snapshots) > settings.MEMORY_MAX_SNAPSHOTS:
+            _snapshots.popitem(last=False)
+        traced, peak = tracemalloc.get_traced_memory()
+
+    return {
+        "id": snapshot_id,
+        "started_tracing": started,
+        "traced_bytes": traced,
+        "peak_traced_bytes": peak,
+        "top": [_format_stat(stat, group_by) for stat in snapshot.statistics(group_by)[:limit]],
+    }
+
+
+def _get_snapshot(snapshot_id: int) -> "tracemalloc.Snapshot":
+    with _memory_lock:
+        snapshot = _snapshots.get(snapshot_id)
+    if snapshot is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Memory snapshot {snapshot_id} not found"
+        )
+    return snapshot
+
+
+def diff_memory_snapshots(base_id: int, target_id: Optional[int] = None, limit: int = 25, group_by: str = "lineno") -> Dict[str, Any]:
+    """
+    Top allocation sites by growth from snapshot `base_id` to `target_id` (default: a new snapshot)
+    """
+    base = _get_snapshot(base_id)
+    if target_id is None:
+        target_id = take_memory_snapshot(limit=0)["id"]
+    target = _get_snapshot(target_id)
+
+    differences = target.compare_to(base, group_by)
+    return {
+        "base": base_id,
+        "target": target_id,
+        "size_diff_bytes": sum(stat.size_diff for stat in differences),
+        "count_diff": sum(stat.count_diff for stat in differences),
+        "top": [_format_stat(stat, group_by) for stat in differences[:limit]],
+    }
+
+
+def stop_memory_tracing() -> Dict[str, Any]:
+    """
+    Stop tracemalloc and drop stored snapshots, returning the process to zero overhead
+    """
+    with _memory_lock:
+        was_tracing = tracemalloc.is_tracing()
+        tracemalloc.stop()
+        _snapshots.clear()
+    return {"stopped": was_tracing}
+
+
+def get_memory_status() -> Dict[str, Any]:
+    with _memory_lock:
+        tracing = tracemalloc.is_tracing()
+        traced, peak = tracemalloc.get_traced_memory() if tracing else (0, 0)
+        return {
+            "tracing": tracing,
+            "traced_bytes": traced,
+            "peak_traced_bytes": peak,
+            "tracemalloc_overhead_bytes": tracemalloc.get_tracemalloc_memory() if tracing else 0,
+            "snapshots": list(_snapshots),
+        }
@@ -0,0 +1,92 @@
+"""
+Single-flight request coalescing for thread-pool handlers
+"""
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from .deadline import DeadlineExceeded, current_deadline
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Share one execution of a function between concurrent callers with the same key
+    The first caller (the leader) runs the function; callers arriving while it is
+    in flight wait and receive the leader's result, or re-raise the leader's error.
+    Waiters wait no longer than their own request deadline. If the leader fails
+    with DeadlineExceeded (its deadline passed or its client left), the waiters
+    run the function again, coalescing behind a new leader, rather than inheriting
+    another request's timeout. Nothing is cached once the call finishes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                if call is not None:
+                    self.coalesced += 1
+                    leader = False
+                else:
+                    call = _Call()
+                    self._calls[key] = call
+                    self.executed += 1
+                    leader = True
+
+            if leader:
+                return self._lead(key, call, fn)
+
+            deadline = current_deadline()
+            timeout = deadline.remaining() if deadline is not None and deadline.armed else None
+            if not call.done.wait(timeout):
+                raise DeadlineExceeded()
+            if isinstance(call.error, DeadlineExceeded):
+                # The leader ran out of its own time; that says nothing about ours
+                continue
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+    def _lead(self, key: Hashable, call: _Call, fn: Callable[[], Any]) -> Any:
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                # forget() may already have detached this call
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+            call.done.set()
+
+    def forget(self, predicate: Callable[[Hashable], bool]):
+        """
+        Detach in-flight calls whose key matches, so later callers start a fresh
+        execution instead of joining one that began before a write
+        """
+        with self._lock:
+            for key in [key for key in self._calls if predicate(key)]:
+                del self._calls[key]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.executed + self.coalesced
+            return {
+                "executed": self.executed,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._calls),
+                "coalescing_rate": round(self.coalesced / total, 4) if total else 0.0,
+            }
@@ -0,0 +1,120 @@
+"""
+Span exporter and tail-sampling processor used by setup_tracing()
+Kept apart from utils/tracing.py so the OpenTelemetry SDK is only imported
+when tracing is switched on.
+"""
+import threading
+from collections import OrderedDict
+from typing import Dict, List
+
+from opentelemetry.sdk.trace import ReadableSpan, SpanProcessor
+from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+from opentelemetry.trace import StatusCode
+
+try:
+    from google.protobuf.json_format import MessageToJson
+    from opentelemetry.exporter.otlp.proto.common.trace_encoder import encode_spans
+except ImportError:  # opentelemetry-exporter-otlp-proto-common not installed
+    encode_spans = None
+
+
+class JsonLinesSpanExporter(SpanExporter):
+    """
+    Append finished spans to a file, one JSON line per export batch
+    With opentelemetry-exporter-otlp-proto-common installed each line is an OTLP/JSON
+    ExportTraceServiceRequest (the collector's file format, readable by otlpjsonfile);
+    without it each line is one span in the SDK's own to_json() layout, which is not OTLP
+    """
+
+    def __init__(self, path: str):
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def export(self, spans) -> "SpanExportResult":
+        if encode_spans is not None:
+            lines = [MessageToJson(encode_spans(spans), indent=None)] if spans else []
+        else:
+            lines = [span.to_json(indent=None) for span in spans]
+        with self._lock:
+            for line in lines:
+                self._file.write(line.replace("\n", "") + "\n")
+            self._file.flush()
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self):
+        with self._lock:
+            self._file.close()
+
+
+class TailSamplingSpanProcessor(SpanProcessor):
+    """
+    Hold each trace's spans until its local root ends, then pass the whole trace
+    to `delegate` if it is sampled by ratio, slow, failed, or sampled upstream
+    Spans ending after their root (e.g. background work) follow the decision already made
+    """
+
+    def __init__(self, delegate: "SpanProcessor", ratio: float, slow_ms: float, max_pending_traces: int):
+        self._delegate = delegate
+        self._ratio_bound = int(max(0.0, min(1.0, ratio)) * (1 << 64))
+        self._slow_ns = slow_ms * 1_000_000
+        self._max_pending = max_pending_traces
+        self._lock = threading.Lock()
+        self._pending: "OrderedDict[int, List[ReadableSpan]]" = OrderedDict()
+        # Recent keep/drop decisions, bounded like _pending
+        self._decided: "OrderedDict[int, bool]" = OrderedDict()
+        self.kept = 0
+        self.dropped = 0
+
+    def on_start(self, span, parent_context=None):
+        pass
+
+    def on_end(self, span: "ReadableSpan"):
+        trace_id = span.context.trace_id
+        if span.parent is not None and not span.parent.is_remote:
+            with self._lock:
+                decision = self._decided.get(trace_id)
+                if decision is None:
+                    self._pending.setdefault(trace_id, []).append(span)
+                    while len(self._pending) > self._max_pending:
+                        self._pending.popitem(last=False)
+                        self.dropped += 1
+            if decision:
+                self._delegate.on_end(span)
+            return
+
+        keep = self._keep(span)
+        with self._lock:
+            spans = self._pending.pop(trace_id, [])
+            self._decided[trace_id] = keep
+            while len(self._decided) > self._max_pending:
+                self._decided.popitem(last=False)
+            if keep:
+                self.kept += 1
+            else:
+                self.dropped += 1
+        if not keep:
+            return
+
+        for child in spans:
+            self._delegate.on_end(child)
+        self._delegate.on_end(span)
+
+    def _keep(self, root: "ReadableSpan") -> bool:
+        if root.parent is not None and root.parent.trace_flags.sampled:
+            return True
+        if root.status.status_code == StatusCode.ERROR:
+            return True
+        if root.end_time - root.start_time >= self._slow_ns:
+            return True
+        # Deterministic on the trace id, like TraceIdRatioBased
+        return (root.context.trace_id & 0xFFFFFFFFFFFFFFFF) < self._ratio_bound
+
+    def shutdown(self):
+        self._delegate.shutdown()
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return self._delegate.force_flush(timeout_millis)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"kept": self.kept, "dropped": self.dropped, "pending": len(self._pending)}
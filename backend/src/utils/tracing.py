@@ -0,0 +1,173 @@
+"""
+OpenTelemetry tracing: request, route, service, JWT, bcrypt and SQL spans
+
+Every request is traced, and the keep-or-drop decision is made when the request's
+root span ends: a TRACE_SAMPLE_RATIO share of traces is kept, plus every trace
+slower than TRACE_SLOW_REQUEST_MS or ending in an error, so p99 outliers always
+have a full waterfall. Kept traces go to a JSON-lines file or the console; both
+work offline. The opentelemetry packages are optional and only imported by
+setup_tracing(): without them (or with TRACING_ENABLED off) the helpers below
+cost a single check per call.
+"""
+import functools
+import logging
+from typing import Callable, Dict, Optional
+
+from fastapi.routing import APIRoute
+
+from ..config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+_tracer = None
+_provider = None
+_sampler = None
+
+
+def setup_tracing():
+    """
+    Configure the tracer provider and exporter from settings
+    Idempotent; does nothing if tracing is disabled or the SDK is not installed
+    """
+    global _tracer, _provider, _sampler
+
+    if _provider is not None or not settings.TRACING_ENABLED:
+        return
+    try:
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+        from .trace_export import JsonLinesSpanExporter, TailSamplingSpanProcessor
+    except ImportError:
+        logger.warning("TRACING_ENABLED is set but opentelemetry-sdk is not installed; tracing is off")
+        return
+
+    if settings.TRACING_EXPORTER == "console":
+        exporter = ConsoleSpanExporter()
+    else:
+        exporter = JsonLinesSpanExporter(settings.TRACING_FILE)
+
+    _sampler = TailSamplingSpanProcessor(
+        BatchSpanProcessor(exporter),
+        ratio=settings.TRACE_SAMPLE_RATIO,
+        slow_ms=settings.TRACE_SLOW_REQUEST_MS,
+        max_pending_traces=settings.TRACE_MAX_PENDING_TRACES,
+    )
+    _provider = TracerProvider(resource=Resource.create({"service.name": settings.TRACING_SERVICE_NAME}))
+    _provider.add_span_processor(_sampler)
+    _tracer = _provider.get_tracer("todo-api")
+
+
+def shutdown_tracing():
+    """
+    Flush and stop the exporter; called on application shutdown
+    """
+    global _tracer, _provider, _sampler
+
+    if _provider is not None:
+        _provider.shutdown()
+    _tracer = None
+    _provider = None
+    _sampler = None
+
+
+def get_tracer():
+    """
+    The configured tracer, or None while tracing is off
+    """
+    return _tracer
+
+
+def get_tracing_stats() -> Optional[Dict[str, int]]:
+    return _sampler.stats() if _sampler is not None else None
+
+
+def traced(name: Optional[str] = None) -> Callable:
+    """
+    Decorator that runs the function inside a span named `name` (default: its qualified name)
+    """
+    def decorator(fn: Callable) -> Callable:
+        span_name = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _tracer is None:
+                return fn(*args, **kwargs)
+            with _tracer.start_as_current_span(span_name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def traced_methods(cls):
+    """
+    Class decorator: trace every public staticmethod as "<Class>.<method>"
+    """
+    for attribute, value in list(vars(cls).items()):
+        if isinstance(value, staticmethod) and not attribute.startswith("_"):
+            setattr(cls, attribute, staticmethod(traced(f"{cls.__name__}.{attribute}")(value.__func__)))
+    return cls
+
+
+def instrument_engine(engine):
+    """
+    One span per SQL statement, with the statement text and row count
+    """
+    from sqlalchemy import event
+
+    system = engine.dialect.name
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_execute(connection, cursor, statement, parameters, context, executemany):
+        if _tracer is None or context is None:
+            return
+        from opentelemetry.trace import SpanKind
+
+        span = _tracer.start_span(
+            f"SQL {statement.split(None, 1)[0].upper() if statement else ''}",
+            kind=SpanKind.CLIENT,
+            attributes={"db.system": system, "db.statement": statement[:settings.TRACE_MAX_STATEMENT_LENGTH]},
+        )
+        context._trace_span = span
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_execute(connection, cursor, statement, parameters, context, executemany):
+        span = getattr(context, "_trace_span", None)
+        if span is not None:
+            if cursor.rowcount is not None and cursor.rowcount >= 0:
+                span.set_attribute("db.rowcount", cursor.rowcount)
+            span.end()
+            context._trace_span = None
+
+    @event.listens_for(engine, "handle_error")
+    def _on_error(exception_context):
+        context = exception_context.execution_context
+        span = getattr(context, "_trace_span", None) if context is not None else None
+        if span is not None:
+            from opentelemetry.trace import Status, StatusCode
+
+            span.record_exception(exception_context.original_exception)
+            span.set_status(Status(StatusCode.ERROR))
+            span.end()
+            context._trace_span = None
+
+
+class TracedRoute(APIRoute):
+    """
+    APIRoute that wraps the route handler (dependencies, endpoint and response
+    serialization) in a "route <name>" span
+    """
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        span_name = f"route {self.name}"
+
+        async def traced_handler(request):
+            if _tracer is None:
+                return await handler(request)
+            with _tracer.start_as_current_span(span_name):
+                return await handler(request)
+
+        return traced_handler
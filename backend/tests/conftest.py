@@ -0,0 +1,58 @@
+"""
+Fixtures for the behaviour tests
+
+Run from the backend directory:
+    python -m pytest tests -q
+
+Tests that need a database get a fresh SQLite file, and the application's
+engines are pointed at it for the duration of the test.
+"""
+import os
+import sys
+from typing import Callable, Dict
+
+import pytest
+
+# Settings are read once, on first use, so configure them before any src import
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("ENVIRONMENT", "test")
+os.environ.setdefault("BETTER_AUTH_SECRET", "test-secret-not-for-production-use-0123456789")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlmodel import SQLModel  # noqa: E402
+
+from src.database import database  # noqa: E402
+from src.models.auth import User  # noqa: E402, F401  registers the users table
+from src.models.idempotency import IdempotencyKey  # noqa: E402, F401  registers the idempotency_keys table
+from src.models.task import ArchivedTask, Task  # noqa: E402, F401  registers the task tables
+from src.utils.jwt_utils import create_access_token  # noqa: E402
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    """
+    Write engine of a fresh SQLite database with every table, also used by the app
+    """
+    read_engine, write_engine = database.build_engines(f"sqlite:///{tmp_path / 'test.db'}")
+    SQLModel.metadata.create_all(write_engine)
+    monkeypatch.setattr(database, "_engines", (read_engine, write_engine))
+    yield write_engine
+    for built_engine in {read_engine, write_engine}:
+        built_engine.dispose()
+
+
+@pytest.fixture
+def client(engine):
+    from fastapi.testclient import TestClient
+
+    from main import app
+
+    return TestClient(app)
+
+
+@pytest.fixture
+def auth_headers() -> Callable[[int], Dict[str, str]]:
+    def headers(user_id: int) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {create_access_token({'user_id': str(user_id)})}"}
+
+    return headers
@@ -0,0 +1,19 @@
+"""
+Admin diagnostics limits, read from settings per request
+"""
+from src.config.settings import settings
+
+ADMIN_TOKEN = "test-admin-token"
+
+
+def test_cpu_profile_length_is_capped_by_the_current_setting(client, monkeypatch):
+    monkeypatch.setattr(settings, "ADMIN_API_TOKEN", ADMIN_TOKEN)
+    monkeypatch.setattr(settings, "PROFILER_MAX_SECONDS", 1)
+    headers = {"X-Admin-Token": ADMIN_TOKEN}
+
+    too_long = client.get("/api/admin/profile/cpu", params={"seconds": 2}, headers=headers)
+    allowed = client.get("/api/admin/profile/cpu", params={"seconds": 0.05, "format": "json"}, headers=headers)
+
+    assert too_long.status_code == 422
+    assert too_long.json()["detail"] == "seconds must be at most 1"
+    assert allowed.status_code == 200
@@ -0,0 +1,88 @@
+"""
+Admission control under overload, and /ready staying responsive while the request pool is exhausted
+"""
+import asyncio
+import time
+from contextlib import ExitStack
+
+import httpx
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from src.database.database import get_engine
+from src.database.warmup import get_probe_engine
+from src.middleware.admission import AdmissionControlMiddleware, AdmissionLimiter
+
+TASKS_PATH = "/api/users/1/tasks"
+
+
+def blocking_app(release: asyncio.Event, limiter: AdmissionLimiter):
+    async def tasks_endpoint(request):
+        await release.wait()
+        return JSONResponse({"tasks": []})
+
+    app = Starlette(routes=[Route(TASKS_PATH, tasks_endpoint), Route("/health", lambda request: JSONResponse({}))])
+    return AdmissionControlMiddleware(app, limiters={"task_reads": limiter}, retry_after=7)
+
+
+async def overload(limiter: AdmissionLimiter):
+    """
+    Hold the only slot with one request, send a second, then let the first finish
+    """
+    release = asyncio.Event()
+    transport = httpx.ASGITransport(app=blocking_app(release, limiter))
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        holder = asyncio.create_task(client.get(TASKS_PATH))
+        while limiter.in_flight == 0:
+            await asyncio.sleep(0.001)
+
+        start = time.monotonic()
+        shed = await client.get(TASKS_PATH)
+        waited = time.monotonic() - start
+        health = await client.get("/health")
+
+        release.set()
+        held = await holder
+    return held, shed, waited, health
+
+
+def test_full_queue_is_rejected_at_once_with_retry_after():
+    limiter = AdmissionLimiter(max_concurrency=1, max_queue=0, queue_timeout=5)
+
+    held, shed, waited, health = asyncio.run(overload(limiter))
+
+    assert held.status_code == 200
+    assert shed.status_code == 503
+    assert shed.headers["retry-after"] == "7"
+    assert shed.json() == {"detail": "Server is busy - please retry shortly"}
+    assert waited < 1
+    assert health.status_code == 200
+    assert limiter.stats()["rejected"] == 1
+
+
+def test_queued_request_is_rejected_after_the_queue_timeout():
+    limiter = AdmissionLimiter(max_concurrency=1, max_queue=1, queue_timeout=0.1)
+
+    held, shed, waited, _ = asyncio.run(overload(limiter))
+
+    assert held.status_code == 200
+    assert shed.status_code == 503
+    assert 0.1 <= waited < 2
+    assert limiter.stats() == {"max_concurrency": 1, "in_flight": 0, "waiting": 0, "admitted": 1, "rejected": 1}
+
+
+def test_ready_answers_while_the_read_pool_is_exhausted(client, engine):
+    read_engine = get_engine()
+    capacity = read_engine.pool.size() + read_engine.pool._max_overflow
+
+    with ExitStack() as held:
+        for _ in range(capacity):
+            held.enter_context(read_engine.connect())
+
+        start = time.monotonic()
+        response = client.get("/ready")
+
+    assert time.monotonic() - start < 2
+    assert response.json()["database"] == {"reachable": True, "error": None}
+    assert get_probe_engine().url == read_engine.url
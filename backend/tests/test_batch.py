@@ -0,0 +1,88 @@
+"""
+Batch task reads: GET /users/{user_id}/tasks/batch?ids=...
+"""
+from datetime import datetime
+
+from sqlmodel import Session
+
+from src.api.tasks import MAX_BATCH_IDS, router
+from src.models.task import ArchivedTask, Task
+
+USER_ID = 1
+OTHER_USER_ID = 2
+BATCH_URL = f"/api/users/{USER_ID}/tasks/batch"
+
+
+def add_tasks(engine, user_id, count, **values):
+    with Session(engine) as session:
+        tasks = [Task(user_id=user_id, title=f"Task {index}", **values) for index in range(count)]
+        session.add_all(tasks)
+        session.commit()
+        return [task.id for task in tasks]
+
+
+def get_batch(client, auth_headers, ids, **params):
+    return client.get(BATCH_URL, params={"ids": ",".join(map(str, ids)), **params}, headers=auth_headers(USER_ID))
+
+
+def test_batch_route_is_declared_before_the_task_id_route():
+    # Routes match in declaration order; the other way round "batch" would be parsed as a task id
+    paths = [route.path for route in router.routes if "GET" in route.methods]
+
+    assert paths.index("/users/{user_id}/tasks/batch") < paths.index("/users/{user_id}/tasks/{task_id}")
+
+
+def test_found_tasks_in_request_order_and_missing_ids(client, engine, auth_headers):
+    own = add_tasks(engine, USER_ID, 3)
+    [foreign] = add_tasks(engine, OTHER_USER_ID, 1)
+    [deleted] = add_tasks(engine, USER_ID, 1, deleted_at=datetime.utcnow())
+
+    response = get_batch(client, auth_headers, [own[2], 9999, own[0], foreign, deleted])
+
+    assert response.status_code == 200
+    body = response.json()
+    assert [task["id"] for task in body["tasks"]] == [str(own[2]), str(own[0])]
+    assert body["missing"] == [str(9999), str(foreign), str(deleted)]
+
+
+def test_duplicate_ids_are_returned_once(client, engine, auth_headers):
+    [task_id] = add_tasks(engine, USER_ID, 1)
+
+    body = get_batch(client, auth_headers, [task_id, task_id, 9999, 9999]).json()
+
+    assert [task["id"] for task in body["tasks"]] == [str(task_id)]
+    assert body["missing"] == ["9999"]
+
+
+def test_archived_tasks_only_with_include_archived(client, engine, auth_headers):
+    now = datetime.utcnow()
+    with Session(engine) as session:
+        session.add(ArchivedTask(id=700, user_id=USER_ID, title="Old", completed=True, version=1, created_at=now, updated_at=now))
+        session.commit()
+
+    assert get_batch(client, auth_headers, [700]).json()["missing"] == ["700"]
+    assert [task["title"] for task in get_batch(client, auth_headers, [700], include_archived=True).json()["tasks"]] == ["Old"]
+
+
+def test_id_limit(client, engine, auth_headers):
+    at_limit = get_batch(client, auth_headers, range(1, MAX_BATCH_IDS + 1))
+    # Duplicates count once towards the limit
+    deduplicated = get_batch(client, auth_headers, [*range(1, MAX_BATCH_IDS + 1), 1])
+    over_limit = get_batch(client, auth_headers, range(1, MAX_BATCH_IDS + 2))
+
+    assert at_limit.status_code == 200
+    assert len(at_limit.json()["missing"]) == MAX_BATCH_IDS
+    assert deduplicated.status_code == 200
+    assert over_limit.status_code == 422
+
+
+def test_malformed_or_empty_ids_are_rejected(client, engine, auth_headers):
+    for ids in ("1,abc", "", ",,"):
+        response = client.get(BATCH_URL, params={"ids": ids}, headers=auth_headers(USER_ID))
+        assert response.status_code == 422
+
+
+def test_other_users_batch_is_forbidden(client, engine, auth_headers):
+    response = client.get(BATCH_URL, params={"ids": "1"}, headers=auth_headers(OTHER_USER_ID))
+
+    assert response.status_code == 403
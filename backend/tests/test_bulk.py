@@ -0,0 +1,118 @@
+"""
+Set-based bulk writes: PATCH /tasks/complete and DELETE /tasks?completed=
+"""
+from datetime import datetime
+
+import pytest
+from sqlmodel import Session, select
+
+from src.models.task import ArchivedTask, Task
+
+USER_ID = 1
+OTHER_USER_ID = 2
+TASKS_URL = f"/api/users/{USER_ID}/tasks"
+
+
+@pytest.fixture
+def tasks(engine):
+    """
+    Two open and three completed tasks of the caller, one soft-deleted open task,
+    one archived completed task, and another user's open and completed tasks
+    """
+    now = datetime.utcnow()
+    with Session(engine) as session:
+        session.add_all([
+            *(Task(user_id=USER_ID, title=f"Open {index}") for index in range(2)),
+            *(Task(user_id=USER_ID, title=f"Done {index}", completed=True) for index in range(3)),
+            Task(user_id=USER_ID, title="Deleted", deleted_at=now),
+            Task(user_id=OTHER_USER_ID, title="Theirs"),
+            Task(user_id=OTHER_USER_ID, title="Theirs done", completed=True),
+            ArchivedTask(id=900, user_id=USER_ID, title="Archived", completed=True, version=1, created_at=now, updated_at=now),
+        ])
+        session.commit()
+
+
+def rows(engine, **where):
+    with Session(engine) as session:
+        statement = select(Task).where(*(getattr(Task, name) == value for name, value in where.items()))
+        return {task.title: task for task in session.exec(statement)}
+
+
+def complete_all(client, auth_headers, completed=True, key=None):
+    headers = {**auth_headers(USER_ID), **({"Idempotency-Key": key} if key else {})}
+    return client.patch(f"{TASKS_URL}/complete", json={"completed": completed}, headers=headers)
+
+
+def delete_by_status(client, auth_headers, completed=True, key=None):
+    headers = {**auth_headers(USER_ID), **({"Idempotency-Key": key} if key else {})}
+    return client.delete(TASKS_URL, params={"completed": completed}, headers=headers)
+
+
+def test_complete_all_touches_only_the_callers_open_tasks(client, engine, auth_headers, tasks):
+    response = complete_all(client, auth_headers)
+
+    assert response.status_code == 200
+    assert response.json() == {"success": True, "affected": 2}
+    mine = rows(engine, user_id=USER_ID)
+    assert all(mine[f"Open {index}"].completed and mine[f"Open {index}"].version == 2 for index in range(2))
+    # Already completed rows are not rewritten
+    assert all(mine[f"Done {index}"].version == 1 for index in range(3))
+    assert mine["Deleted"].completed is False
+    assert rows(engine, user_id=OTHER_USER_ID)["Theirs"].completed is False
+
+
+def test_uncomplete_all_counts_only_changed_rows(client, engine, auth_headers, tasks):
+    assert complete_all(client, auth_headers, completed=False).json()["affected"] == 3
+    assert complete_all(client, auth_headers, completed=False).json()["affected"] == 0
+    assert rows(engine, user_id=OTHER_USER_ID)["Theirs done"].completed is True
+
+
+def test_delete_completed_soft_deletes_the_callers_tasks_and_archive(client, engine, auth_headers, tasks):
+    response = delete_by_status(client, auth_headers, completed=True)
+
+    assert response.status_code == 200
+    # Three completed tasks plus the archived one
+    assert response.json() == {"success": True, "affected": 4}
+    mine = rows(engine, user_id=USER_ID)
+    assert all(mine[f"Done {index}"].deleted_at is not None for index in range(3))
+    assert all(mine[f"Open {index}"].deleted_at is None for index in range(2))
+    assert rows(engine, user_id=OTHER_USER_ID)["Theirs done"].deleted_at is None
+    with Session(engine) as session:
+        assert session.get(ArchivedTask, 900) is None
+
+    listed = client.get(TASKS_URL, headers=auth_headers(USER_ID)).json()
+    assert sorted(task["title"] for task in listed["tasks"]) == ["Open 0", "Open 1"]
+
+
+def test_delete_open_skips_already_deleted_tasks(client, engine, auth_headers, tasks):
+    deleted_at = rows(engine, title="Deleted")["Deleted"].deleted_at
+
+    assert delete_by_status(client, auth_headers, completed=False).json()["affected"] == 2
+    assert rows(engine, title="Deleted")["Deleted"].deleted_at == deleted_at
+    assert delete_by_status(client, auth_headers, completed=False).json()["affected"] == 0
+
+
+@pytest.mark.parametrize("send", [complete_all, delete_by_status])
+def test_reused_idempotency_key_replays_the_counts(client, engine, auth_headers, tasks, send):
+    first = send(client, auth_headers, key="bulk-1")
+    # New matching rows after the first call must not be touched by the retry
+    with Session(engine) as session:
+        session.add(Task(user_id=USER_ID, title="Added later", completed=True))
+        session.add(Task(user_id=USER_ID, title="Added later open"))
+        session.commit()
+    retry = send(client, auth_headers, key="bulk-1")
+
+    assert retry.status_code == 200
+    assert retry.json() == first.json()
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    added = rows(engine, user_id=USER_ID)
+    assert added["Added later open"].completed is False
+    assert added["Added later"].deleted_at is None
+
+
+def test_bulk_writes_on_another_user_are_forbidden(client, engine, auth_headers, tasks):
+    url = f"/api/users/{OTHER_USER_ID}/tasks"
+
+    assert client.patch(f"{url}/complete", json={"completed": True}, headers=auth_headers(USER_ID)).status_code == 403
+    assert client.delete(url, params={"completed": True}, headers=auth_headers(USER_ID)).status_code == 403
+    assert rows(engine, user_id=OTHER_USER_ID)["Theirs"].completed is False
@@ -0,0 +1,95 @@
+"""
+Traffic capture across workers: shared bucket salt, per-worker files merged by replay
+"""
+import json
+import os
+
+from fastapi.testclient import TestClient
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from benchmarks.replay import load_capture
+from src.middleware.admission import AdmissionControlMiddleware, AdmissionLimiter
+from src.middleware.capture import UNMATCHED_ROUTE, TrafficCaptureMiddleware, TrafficCaptureWriter, worker_capture_path
+
+
+def tasks_endpoint(request):
+    return JSONResponse({"tasks": [], "total": 0})
+
+
+def captured_app(writer, salt, **options):
+    app = Starlette(routes=[Route("/api/users/{user_id}/tasks", tasks_endpoint)])
+    return TrafficCaptureMiddleware(app, writer=writer, salt=salt, **options)
+
+
+def write_lines(path, *lines):
+    path.write_text("".join(json.dumps(line) + "\n" for line in lines))
+
+
+def test_writer_uses_a_file_per_process_and_wall_clock_times(tmp_path):
+    writer = TrafficCaptureWriter(str(tmp_path / "traffic.jsonl"), queue_size=10)
+    writer.start()
+    with TestClient(captured_app(writer, "salt")) as client:
+        client.get("/api/users/7/tasks")
+    writer.close()
+
+    assert writer.path == str(tmp_path / f"traffic.{os.getpid()}.jsonl")
+    header, records = load_capture([writer.path])
+    assert header["capture"] == 2 and header["pid"] == os.getpid()
+    assert len(records) == 1
+    assert abs(records[0]["t"] - TrafficCaptureWriter.timestamp()) < 60
+
+
+def test_unmatched_requests_never_record_their_path(tmp_path):
+    writer = TrafficCaptureWriter(str(tmp_path / "traffic.jsonl"), queue_size=10)
+    # No slots and no queue: every task request is shed before routing
+    shedding = AdmissionControlMiddleware(
+        Starlette(routes=[Route("/api/users/{user_id}/tasks/{task_id}", tasks_endpoint)]),
+        limiters={"task_reads": AdmissionLimiter(0, 0, 0)},
+    )
+    writer.start()
+    with TestClient(TrafficCaptureMiddleware(shedding, writer=writer, salt="salt")) as client:
+        shed = client.get("/api/users/48213/tasks/90577")
+        missing = client.get("/api/no-such-route/31337")
+    writer.close()
+
+    assert (shed.status_code, missing.status_code) == (503, 404)
+    with open(writer.path, encoding="utf-8") as capture:
+        text = capture.read()
+    for value in ("48213", "90577", "31337", "no-such-route"):
+        assert value not in text
+    _, records = load_capture([writer.path])
+    assert [(record["r"], record["s"]) for record in records] == [(UNMATCHED_ROUTE, 503), (UNMATCHED_ROUTE, 404)]
+
+
+def test_workers_with_the_same_salt_agree_on_user_buckets(tmp_path):
+    buckets = []
+    for worker in range(2):
+        writer = TrafficCaptureWriter(str(tmp_path / f"worker{worker}.jsonl"), queue_size=10)
+        buckets.append([captured_app(writer, "shared-salt")._user_bucket(f"/api/users/{user}/tasks") for user in range(20)])
+
+    other = captured_app(TrafficCaptureWriter(str(tmp_path / "other.jsonl"), queue_size=10), "other-salt")
+
+    assert buckets[0] == buckets[1]
+    assert [other._user_bucket(f"/api/users/{user}/tasks") for user in range(20)] != buckets[0]
+
+
+def test_load_capture_merges_worker_files_by_timestamp(tmp_path):
+    first, second = tmp_path / worker_capture_path("traffic.jsonl", 101), tmp_path / worker_capture_path("traffic.jsonl", 102)
+    write_lines(first, {"capture": 2, "pid": 101}, {"t": 1000.0, "r": "a"}, {"t": 1002.0, "r": "c"})
+    write_lines(second, {"capture": 2, "pid": 102}, {"t": 1001.0, "r": "b"}, {"t": 1003.0, "r": "d"})
+
+    _, records = load_capture([str(first), str(second)])
+
+    assert [record["r"] for record in records] == ["a", "b", "c", "d"]
+    assert [record["t"] for record in records] == [1000.0, 1001.0, 1002.0, 1003.0]
+
+
+def test_load_capture_chains_sessions_of_format_1_files(tmp_path):
+    path = tmp_path / "traffic.jsonl"
+    write_lines(path, {"capture": 1}, {"t": 0.0}, {"t": 5.0}, {"capture": 1}, {"t": 1.0})
+
+    _, records = load_capture([str(path)])
+
+    assert [record["t"] for record in records] == [0.0, 5.0, 6.0]
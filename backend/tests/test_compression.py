@@ -0,0 +1,151 @@
+"""
+Response compression: encoding negotiation, size threshold, streaming and the body cache
+"""
+import asyncio
+import gzip
+import json
+import zlib
+
+import brotli
+import pytest
+from starlette.responses import JSONResponse, Response, StreamingResponse
+
+from src.middleware import compression
+from src.middleware.compression import CompressedBodyCache, CompressionMiddleware, choose_encoding
+
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    ("gzip;q=1, br;q=0.1", "gzip"),
+    ("br;q=0.1, gzip", "gzip"),
+    ("gzip, br", "br"),
+    ("br;q=0.5, gzip;q=0.5", "br"),
+    ("*", "br"),
+    ("*;q=0.5, gzip;q=0.8", "gzip"),
+    ("gzip;q=0, *", "br"),
+    ("br;q=0", None),
+    ("br;q=0, gzip;q=0", None),
+    ("identity", None),
+    ("", None),
+    ("gzip;q=bogus, br", "br"),
+])
+def test_choose_encoding_picks_the_highest_q(accept_encoding, expected):
+    assert choose_encoding(accept_encoding) == expected
+
+
+def test_choose_encoding_without_brotli(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+
+    assert choose_encoding("br, gzip;q=0.5") == "gzip"
+    assert choose_encoding("br") is None
+
+
+def call(middleware, accept_encoding="gzip"):
+    """
+    Send one GET through the middleware and return (start message, body messages)
+    """
+    messages = []
+    requests = [{"type": "http.request", "body": b"", "more_body": False}]
+
+    async def receive():
+        if requests:
+            return requests.pop()
+        # The client stays connected; streaming responses cancel this wait when done
+        await asyncio.Event().wait()
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": [(b"accept-encoding", accept_encoding.encode())]}
+    asyncio.run(middleware(scope, receive, send))
+    return messages[0], messages[1:]
+
+
+def headers_of(start):
+    return {name.decode(): value.decode() for name, value in start["headers"]}
+
+
+def json_app(size):
+    return JSONResponse({"payload": "x" * size})
+
+
+def test_small_responses_are_sent_as_is():
+    start, bodies = call(CompressionMiddleware(json_app(100), minimum_size=500))
+
+    headers = headers_of(start)
+    assert "content-encoding" not in headers
+    assert json.loads(bodies[0]["body"]) == {"payload": "x" * 100}
+    assert headers["content-length"] == str(len(bodies[0]["body"]))
+
+
+@pytest.mark.parametrize("encoding, decompress", [("gzip", gzip.decompress), ("br", brotli.decompress)])
+def test_large_responses_are_compressed_with_matching_headers(encoding, decompress):
+    start, bodies = call(CompressionMiddleware(json_app(5000), minimum_size=500), accept_encoding=encoding)
+
+    headers = headers_of(start)
+    assert headers["content-encoding"] == encoding
+    assert headers["vary"] == "Accept-Encoding"
+    assert headers["content-length"] == str(len(bodies[0]["body"]))
+    assert json.loads(decompress(bodies[0]["body"])) == {"payload": "x" * 5000}
+
+
+def test_already_encoded_and_binary_responses_pass_through():
+    encoded = Response(b"x" * 5000, media_type="application/json", headers={"content-encoding": "identity"})
+    binary = Response(b"x" * 5000, media_type="image/png")
+
+    for app in (encoded, binary):
+        start, bodies = call(CompressionMiddleware(app, minimum_size=500))
+        assert headers_of(start).get("content-encoding") != "gzip"
+        assert bodies[0]["body"] == b"x" * 5000
+
+
+def test_streaming_chunks_are_flushed_as_they_arrive():
+    chunks = [json.dumps({"line": index}).encode() + b"\n" for index in range(3)]
+
+    async def lines():
+        for chunk in chunks:
+            yield chunk
+
+    start, bodies = call(CompressionMiddleware(StreamingResponse(lines(), media_type="application/x-ndjson"), minimum_size=500))
+
+    headers = headers_of(start)
+    assert headers["content-encoding"] == "gzip"
+    assert "content-length" not in headers
+    # Each chunk decodes on arrival, without waiting for the end of the stream
+    decoder = zlib.decompressobj(31)
+    decoded = [decoder.decompress(message["body"]) for message in bodies if message["body"]]
+    assert decoded[:len(chunks)] == chunks
+    assert bodies[-1]["more_body"] is False
+    assert decoder.eof
+
+
+def test_identical_bodies_reuse_the_cached_compression(monkeypatch):
+    async def app(scope, receive, send):
+        await json_app(5000)(scope, receive, send)
+
+    middleware = CompressionMiddleware(app, minimum_size=500, cache_max_bytes=10000)
+    compressions = []
+    original = gzip.compress
+    monkeypatch.setattr(compression.gzip, "compress", lambda body, **kwargs: compressions.append(body) or original(body, **kwargs))
+
+    first = call(middleware)[1][0]["body"]
+    second = call(middleware)[1][0]["body"]
+
+    assert first == second
+    assert len(compressions) == 1
+
+
+def test_cache_evicts_least_recently_used_entries_by_size():
+    cache = CompressedBodyCache(max_bytes=10)
+    first, second, third = (cache.key("gzip", body) for body in (b"a", b"b", b"c"))
+
+    cache.put(first, b"1" * 4)
+    cache.put(second, b"2" * 4)
+    assert cache.get(first) == b"1" * 4  # first is now the most recently used
+    cache.put(third, b"3" * 4)
+
+    assert cache.get(second) is None
+    assert cache.get(first) is not None and cache.get(third) is not None
+    assert cache.size == 8
+
+    cache.put(cache.key("gzip", b"huge"), b"h" * 11)
+    assert cache.size == 8
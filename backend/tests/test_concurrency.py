@@ -0,0 +1,140 @@
+"""
+Optimistic concurrency: task versions, ETag and If-Match on GET/PUT/PATCH
+"""
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+from sqlmodel import Session, select
+
+from src.api.tasks import parse_if_match
+from src.models.task import ArchivedTask, Task
+
+USER_ID = 1
+OTHER_USER_ID = 2
+
+
+@pytest.fixture
+def task_id(engine):
+    with Session(engine) as session:
+        task = Task(user_id=USER_ID, title="Original", version=3)
+        session.add(task)
+        session.commit()
+        return task.id
+
+
+@pytest.fixture
+def archived_id(engine):
+    now = datetime.utcnow()
+    with Session(engine) as session:
+        session.add(ArchivedTask(id=500, user_id=USER_ID, title="Archived", completed=True, version=2, created_at=now, updated_at=now))
+        session.commit()
+    return 500
+
+
+def task_url(task_id, suffix=""):
+    return f"/api/users/{USER_ID}/tasks/{task_id}{suffix}"
+
+
+def stored_task(engine, task_id):
+    with Session(engine) as session:
+        return session.get(Task, task_id)
+
+
+@pytest.mark.parametrize("header, body_version, expected", [
+    (None, None, None),
+    (None, 4, 4),
+    ('"3"', None, 3),
+    ('W/"3"', None, 3),
+    (' "3" ', 7, 3),
+    ("*", 7, None),
+])
+def test_parse_if_match(header, body_version, expected):
+    assert parse_if_match(header, body_version) == expected
+
+
+def test_parse_if_match_rejects_other_etags():
+    with pytest.raises(HTTPException) as raised:
+        parse_if_match('"abc"', None)
+    assert raised.value.status_code == 400
+
+
+def test_get_exposes_the_version_as_etag(client, auth_headers, task_id):
+    response = client.get(task_url(task_id), headers=auth_headers(USER_ID))
+
+    assert response.headers["ETag"] == '"3"'
+    assert response.json()["task"]["version"] == 3
+
+
+def test_put_with_current_version_bumps_it(client, engine, auth_headers, task_id):
+    headers = {**auth_headers(USER_ID), "If-Match": '"3"'}
+
+    response = client.put(task_url(task_id), json={"title": "Edited"}, headers=headers)
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] == '"4"'
+    assert response.json()["task"]["version"] == 4
+    assert stored_task(engine, task_id).title == "Edited"
+
+
+def test_put_with_stale_if_match_is_rejected(client, engine, auth_headers, task_id):
+    headers = {**auth_headers(USER_ID), "If-Match": '"2"'}
+
+    response = client.put(task_url(task_id), json={"title": "Lost update"}, headers=headers)
+
+    assert response.status_code == 412
+    task = stored_task(engine, task_id)
+    assert (task.title, task.version) == ("Original", 3)
+
+
+def test_body_version_is_a_precondition_and_if_match_wins(client, auth_headers, task_id):
+    stale_body = client.put(task_url(task_id), json={"title": "Stale", "version": 1}, headers=auth_headers(USER_ID))
+    header_wins = client.put(
+        task_url(task_id), json={"title": "Fresh", "version": 1},
+        headers={**auth_headers(USER_ID), "If-Match": '"3"'},
+    )
+
+    assert stale_body.status_code == 412
+    assert header_wins.status_code == 200
+
+
+def test_patch_complete_checks_the_version(client, engine, auth_headers, task_id):
+    stale = client.patch(task_url(task_id, "/complete"), json={"completed": True}, headers={**auth_headers(USER_ID), "If-Match": '"9"'})
+    current = client.patch(task_url(task_id, "/complete"), json={"completed": True, "version": 3}, headers=auth_headers(USER_ID))
+
+    assert stale.status_code == 412
+    assert current.status_code == 200
+    assert current.headers["ETag"] == '"4"'
+    assert stored_task(engine, task_id).completed is True
+
+
+def test_missing_or_foreign_task_is_404_not_412(client, engine, auth_headers, task_id):
+    headers = {**auth_headers(USER_ID), "If-Match": '"1"'}
+    with Session(engine) as session:
+        foreign = Task(user_id=OTHER_USER_ID, title="Not yours")
+        session.add(foreign)
+        session.commit()
+        foreign_id = foreign.id
+
+    assert client.put(task_url(9999), json={"title": "x"}, headers=headers).status_code == 404
+    assert client.put(task_url(foreign_id), json={"title": "x"}, headers=headers).status_code == 404
+    assert client.patch(task_url(9999, "/complete"), json={"completed": True}, headers=headers).status_code == 404
+
+
+def test_versioned_update_restores_an_archived_task(client, engine, auth_headers, archived_id):
+    response = client.put(task_url(archived_id), json={"title": "Back"}, headers={**auth_headers(USER_ID), "If-Match": '"2"'})
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] == '"3"'
+    assert stored_task(engine, archived_id).title == "Back"
+    with Session(engine) as session:
+        assert session.get(ArchivedTask, archived_id) is None
+
+
+def test_stale_update_leaves_an_archived_task_archived(client, engine, auth_headers, archived_id):
+    response = client.put(task_url(archived_id), json={"title": "Back"}, headers={**auth_headers(USER_ID), "If-Match": '"1"'})
+
+    assert response.status_code == 412
+    assert stored_task(engine, archived_id) is None
+    with Session(engine) as session:
+        assert session.exec(select(ArchivedTask.title).where(ArchivedTask.id == archived_id)).one() == "Archived"
@@ -0,0 +1,75 @@
+"""
+Task creation: the new task's position is read and written in one writer transaction
+"""
+import threading
+import time
+
+from sqlalchemy import event
+from sqlmodel import Session, select
+
+from src.database.database import RoutingSession, get_engines
+from src.models.task import Task, TaskCreate
+from src.services import task_service
+from src.services.task_service import TaskService
+
+USER_ID = 1
+
+
+def positions(engine):
+    with Session(engine) as session:
+        return list(session.exec(select(Task.position).where(Task.user_id == USER_ID).order_by(Task.id)))
+
+
+def test_last_position_is_read_on_the_write_engine(client, engine, auth_headers):
+    read_engine, write_engine = get_engines()
+    seen = {read_engine: [], write_engine: []}
+    listeners = []
+    for built_engine, statements in seen.items():
+        def record(connection, cursor, statement, parameters, context, executemany, statements=statements):
+            statements.append(statement)
+        event.listen(built_engine, "before_cursor_execute", record)
+        listeners.append((built_engine, record))
+    try:
+        for key in (None, "create-1"):
+            headers = {**auth_headers(USER_ID), **({"Idempotency-Key": key} if key else {})}
+            assert client.post(f"/api/users/{USER_ID}/tasks", json={"title": "New"}, headers=headers).status_code == 201
+    finally:
+        for built_engine, record in listeners:
+            event.remove(built_engine, "before_cursor_execute", record)
+
+    assert not [statement for statement in seen[read_engine] if "max(tasks.position)" in statement]
+    assert len([statement for statement in seen[write_engine] if "max(tasks.position)" in statement]) == 2
+    assert positions(engine) == ["a0", "a1"]
+
+
+def test_concurrent_creates_get_distinct_positions(engine, monkeypatch):
+    original = task_service.key_between
+
+    def slow_key_between(lower, upper):
+        # Widen the window between reading the last position and inserting after it
+        time.sleep(0.005)
+        return original(lower, upper)
+
+    monkeypatch.setattr(task_service, "key_between", slow_key_between)
+    errors = []
+
+    def create_tasks(worker):
+        try:
+            for index in range(5):
+                with RoutingSession() as session:
+                    TaskService.create_task(session, TaskCreate(title=f"{worker}-{index}", user_id=USER_ID))
+        except Exception as error:  # pragma: no cover - reported below
+            errors.append(error)
+
+    threads = [threading.Thread(target=create_tasks, args=(worker,)) for worker in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    created = positions(engine)
+    assert len(created) == 30
+    assert len(set(created)) == 30
+    # Later inserts always sort after earlier ones
+    assert created == sorted(created)
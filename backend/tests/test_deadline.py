@@ -0,0 +1,112 @@
+"""
+Request deadlines: statements interrupted past the deadline or on client disconnect,
+answered with 504, without leaving anything behind on pooled connections
+"""
+import asyncio
+import time
+
+import pytest
+from fastapi.concurrency import run_in_threadpool
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+import main
+from src.config.settings import settings
+from src.database.database import get_engine
+from src.middleware.deadline import DeadlineMiddleware
+from src.services.task_service import TaskService
+from src.utils.deadline import Deadline, DeadlineExceeded, current_deadline, reset_deadline, set_deadline
+
+USER_ID = 1
+
+# Runs for many seconds unless interrupted
+SLOW_QUERY = text(
+    "WITH RECURSIVE counter(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM counter WHERE x < 500000000) "
+    "SELECT count(*) FROM counter"
+)
+QUICK_QUERY = text(
+    "WITH RECURSIVE counter(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM counter WHERE x < 20000) "
+    "SELECT count(*) FROM counter"
+)
+
+
+def run_with_deadline(engine, deadline, statement):
+    token = set_deadline(deadline)
+    try:
+        with engine.connect() as connection:
+            return connection.execute(statement).scalar()
+    finally:
+        reset_deadline(token)
+
+
+def test_progress_handler_interrupts_a_statement_past_its_deadline(engine):
+    read_engine = get_engine()
+    deadline = Deadline(0.05)
+
+    start = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        run_with_deadline(read_engine, deadline, SLOW_QUERY)
+
+    assert time.monotonic() - start < 2
+    assert not deadline._connections
+    # The interrupted connection went back to the pool and works for the next request
+    assert run_with_deadline(read_engine, Deadline(10), QUICK_QUERY) == 20000
+    with read_engine.connect() as connection:
+        assert connection.execute(QUICK_QUERY).scalar() == 20000
+
+
+def test_slow_request_gets_504_and_leaves_the_pool_clean(engine, auth_headers, monkeypatch):
+    monkeypatch.setattr(settings, "REQUEST_DEADLINE_TASK_READ_MS", 50)
+
+    def slow_rows(session, *args, **kwargs):
+        session.execute(SLOW_QUERY)
+        return []
+
+    with TestClient(main.create_app()) as client:
+        with monkeypatch.context() as patched:
+            patched.setattr(TaskService, "get_all_task_rows", staticmethod(slow_rows))
+            start = time.monotonic()
+            timed_out = client.get(f"/api/users/{USER_ID}/tasks", headers=auth_headers(USER_ID))
+            elapsed = time.monotonic() - start
+
+        after = client.get(f"/api/users/{USER_ID}/tasks", headers=auth_headers(USER_ID))
+
+    assert timed_out.status_code == 504
+    assert timed_out.json() == {"detail": "Request took too long and was cancelled"}
+    assert elapsed < 2
+    assert after.status_code == 200
+    assert current_deadline() is None
+    with get_engine().connect() as connection:
+        assert connection.execute(QUICK_QUERY).scalar() == 20000
+
+
+def test_client_disconnect_cancels_the_running_statement(engine):
+    read_engine = get_engine()
+    seen = {}
+
+    async def slow_endpoint(scope, receive, send):
+        seen["deadline"] = current_deadline()
+        await run_in_threadpool(run_with_deadline, read_engine, current_deadline(), SLOW_QUERY)
+
+    async def disconnecting_receive():
+        if "request_sent" not in seen:
+            seen["request_sent"] = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await asyncio.sleep(0.05)
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        pass
+
+    middleware = DeadlineMiddleware(slow_endpoint, timeouts={"task_reads": 30})
+    scope = {"type": "http", "method": "GET", "path": f"/api/users/{USER_ID}/tasks", "headers": []}
+
+    start = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(middleware(scope, disconnecting_receive, send))
+
+    assert time.monotonic() - start < 5
+    assert seen["deadline"].cancelled
+    assert not seen["deadline"].armed
+    # A new request on the same pooled connection is not affected by the cancelled one
+    assert run_with_deadline(read_engine, Deadline(10), QUICK_QUERY) == 20000
@@ -0,0 +1,110 @@
+"""
+Sparse fieldsets: fields= validation, the id column, and the narrowed SELECT
+"""
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event
+from sqlmodel import Session
+
+from src.api.tasks import TASK_FIELDS, parse_fields
+from src.database.database import get_engine
+from src.models.task import Task
+
+USER_ID = 1
+TABLE = Task.__tablename__
+
+
+@pytest.fixture
+def task_ids(engine):
+    with Session(engine) as session:
+        tasks = [Task(user_id=USER_ID, title=f"Task {index}", description="d" * 500) for index in range(3)]
+        session.add_all(tasks)
+        session.commit()
+        return [task.id for task in tasks]
+
+
+@pytest.fixture
+def statements():
+    """
+    SQL sent through the read engine during the test
+    """
+    seen = []
+
+    def record(connection, cursor, statement, parameters, context, executemany):
+        seen.append(statement)
+
+    read_engine = get_engine()
+    event.listen(read_engine, "before_cursor_execute", record)
+    yield seen
+    event.remove(read_engine, "before_cursor_execute", record)
+
+
+def task_selects(statements):
+    return [statement for statement in statements if statement.lstrip().upper().startswith("SELECT") and f"FROM {TABLE}" in statement]
+
+
+@pytest.mark.parametrize("fields, expected", [
+    (None, None),
+    ("title", ("id", "title")),
+    ("title,id", ("id", "title")),
+    (" title , completed,title", ("id", "title", "completed")),
+    (",".join(TASK_FIELDS), tuple(TASK_FIELDS)),
+])
+def test_parse_fields(fields, expected):
+    assert parse_fields(fields) == expected
+
+
+@pytest.mark.parametrize("fields", ["bogus", "title,bogus", "", " , ", "user_id"])
+def test_parse_fields_rejects_unknown_or_empty_fields(fields):
+    with pytest.raises(HTTPException) as raised:
+        parse_fields(fields)
+    assert raised.value.status_code == 400
+
+
+def test_every_field_maps_to_a_task_column():
+    task = Task(id=1, user_id=USER_ID, title="t")
+    for name, (column, formatter) in TASK_FIELDS.items():
+        assert column in Task.__table__.columns
+        formatter(task)
+
+
+def test_unknown_field_is_a_400(client, auth_headers, task_ids):
+    response = client.get(f"/api/users/{USER_ID}/tasks", params={"fields": "title,secret"}, headers=auth_headers(USER_ID))
+
+    assert response.status_code == 400
+    assert "secret" in response.json()["detail"]
+
+
+def test_list_returns_only_the_requested_fields_plus_id(client, auth_headers, task_ids, statements):
+    response = client.get(f"/api/users/{USER_ID}/tasks", params={"fields": "title,completed"}, headers=auth_headers(USER_ID))
+
+    assert response.status_code == 200
+    tasks = response.json()["tasks"]
+    assert [set(task) for task in tasks] == [{"id", "title", "completed"}] * 3
+    assert sorted(task["id"] for task in tasks) == sorted(str(task_id) for task_id in task_ids)
+
+    [select] = task_selects(statements)
+    for column in ("id", "title", "completed"):
+        assert f"{TABLE}.{column}" in select
+    for column in ("description", "created_at", "updated_at", "version"):
+        assert f"{TABLE}.{column}" not in select
+
+
+def test_single_and_batch_reads_are_narrowed_too(client, auth_headers, task_ids, statements):
+    single = client.get(f"/api/users/{USER_ID}/tasks/{task_ids[0]}", params={"fields": "title"}, headers=auth_headers(USER_ID))
+    batch = client.get(
+        f"/api/users/{USER_ID}/tasks/batch",
+        params={"ids": ",".join(map(str, task_ids)), "fields": "completed"},
+        headers=auth_headers(USER_ID),
+    )
+
+    assert single.json()["task"] == {"id": str(task_ids[0]), "title": "Task 0"}
+    assert [set(task) for task in batch.json()["tasks"]] == [{"id", "completed"}] * 3
+    for select in task_selects(statements):
+        assert f"{TABLE}.description" not in select
+
+
+def test_without_fields_every_field_is_returned(client, auth_headers, task_ids):
+    response = client.get(f"/api/users/{USER_ID}/tasks", headers=auth_headers(USER_ID))
+
+    assert set(response.json()["tasks"][0]) == set(TASK_FIELDS)
@@ -0,0 +1,150 @@
+"""
+Idempotency-Key on task creation: stored responses are shared through the database
+"""
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import func, insert
+from sqlmodel import Session, select
+
+from src.models.idempotency import IdempotencyKey
+from src.models.task import Task
+from src.services import idempotency_service
+from src.services.idempotency_service import IdempotencyService
+from src.services.task_service import TaskService
+from src.utils.idempotency import request_fingerprint
+
+USER_ID = 1
+
+
+def create(client, auth_headers, key, title="Write report"):
+    headers = {**auth_headers(USER_ID), "Idempotency-Key": key}
+    return client.post(f"/api/users/{USER_ID}/tasks", json={"title": title}, headers=headers)
+
+
+def task_count(engine):
+    with Session(engine) as session:
+        return session.exec(select(func.count()).select_from(Task)).one()
+
+
+def store_key(engine, key, response, created_at=None, title="Write report"):
+    fingerprint = request_fingerprint("create_task", {"title": title, "description": None, "completed": False})
+    with engine.begin() as connection:
+        connection.execute(insert(IdempotencyKey.__table__).values(
+            user_id=USER_ID, key=key, fingerprint=fingerprint, response=response,
+            created_at=created_at or datetime.utcnow(),
+        ))
+
+
+def test_retry_replays_the_first_response(client, engine, auth_headers):
+    first = create(client, auth_headers, "retry-1")
+    retry = create(client, auth_headers, "retry-1")
+
+    assert first.status_code == retry.status_code == 201
+    assert retry.json() == first.json()
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in first.headers
+    assert task_count(engine) == 1
+
+
+def test_key_reused_for_a_different_request_is_rejected(client, engine, auth_headers):
+    create(client, auth_headers, "reused")
+
+    assert create(client, auth_headers, "reused", title="Something else").status_code == 422
+    assert task_count(engine) == 1
+
+
+def test_key_committed_by_another_worker_rolls_back_the_write(client, engine, auth_headers, monkeypatch):
+    # The other worker commits after this request's lookup missed, while it is writing
+    stored_elsewhere = {"success": True, "task": {"id": "999", "title": "Write report"}}
+    lookup = IdempotencyService._stored
+    lookups = []
+
+    def stored(session, user_id, key, cutoff):
+        lookups.append(key)
+        if len(lookups) == 1:
+            store_key(engine, key, stored_elsewhere)
+            return None
+        return lookup(session, user_id, key, cutoff)
+
+    monkeypatch.setattr(IdempotencyService, "_stored", staticmethod(stored))
+
+    response = create(client, auth_headers, "raced")
+
+    assert response.status_code == 201
+    assert response.json() == stored_elsewhere
+    assert response.headers["Idempotent-Replayed"] == "true"
+    assert task_count(engine) == 0
+
+
+def test_concurrent_identical_requests_run_the_write_once(client, engine, auth_headers, monkeypatch):
+    flight = idempotency_service._in_flight
+    joined_before = flight.coalesced
+    original = TaskService.create_task
+    writes = []
+
+    def create_once_joined(session, task_create, commit=True):
+        # Hold the write until the second request has joined it
+        writes.append(task_create.title)
+        deadline = time.monotonic() + 5
+        while flight.coalesced == joined_before and time.monotonic() < deadline:
+            time.sleep(0.001)
+        return original(session, task_create, commit=commit)
+
+    monkeypatch.setattr(TaskService, "create_task", staticmethod(create_once_joined))
+    responses = []
+    threads = [threading.Thread(target=lambda: responses.append(create(client, auth_headers, "twice"))) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert writes == ["Write report"]
+    assert [response.status_code for response in responses] == [201, 201]
+    assert responses[0].json() == responses[1].json()
+    assert sorted(response.headers.get("Idempotent-Replayed", "") for response in responses) == ["", "true"]
+    assert task_count(engine) == 1
+    assert IdempotencyService.stats()["coalesced"] == joined_before + 1
+
+
+def test_concurrent_requests_with_different_bodies_are_not_coalesced(client, engine, auth_headers, monkeypatch):
+    flight = idempotency_service._in_flight
+    joined_before = flight.coalesced
+    release = threading.Event()
+    original = TaskService.create_task
+
+    def create_after_release(session, task_create, commit=True):
+        if task_create.title == "First":
+            release.wait(5)
+        return original(session, task_create, commit=commit)
+
+    monkeypatch.setattr(TaskService, "create_task", staticmethod(create_after_release))
+    first = []
+    thread = threading.Thread(target=lambda: first.append(create(client, auth_headers, "shared", title="First")))
+    thread.start()
+    while not flight.stats()["in_flight"]:
+        time.sleep(0.001)
+    # Runs its own write; the unique key decides which of the two requests wins
+    second = create(client, auth_headers, "shared", title="Second")
+    release.set()
+    thread.join()
+
+    assert flight.coalesced == joined_before
+    assert second.status_code == 201 and "Idempotent-Replayed" not in second.headers
+    assert first[0].status_code == 422
+    assert task_count(engine) == 1
+
+
+@pytest.mark.parametrize("age_seconds, replayed", [(60, True), (10 * 86400, False)])
+def test_keys_expire_after_the_ttl(client, engine, auth_headers, age_seconds, replayed):
+    stored = {"success": True, "task": {"id": "999", "title": "Write report"}}
+    store_key(engine, "aged", stored, created_at=datetime.utcnow() - timedelta(seconds=age_seconds))
+
+    response = create(client, auth_headers, "aged")
+
+    assert (response.json() == stored) is replayed
+    assert task_count(engine) == (0 if replayed else 1)
+    with Session(engine) as session:
+        assert session.exec(select(func.count()).select_from(IdempotencyKey)).one() == 1
@@ -0,0 +1,139 @@
+"""
+Non-blocking logging: bounded queue with drop counting, JSON output, and
+sanitization deferred to the listener thread
+"""
+import io
+import json
+import logging
+import queue
+import sys
+import threading
+import time
+from logging.handlers import QueueListener
+
+import pytest
+
+from src.utils import logging as app_logging
+from src.utils.logging import JsonFormatter, NonBlockingQueueHandler, get_dropped_log_count, log_auth_event, log_security_event
+
+TOKEN = "eyJhbGciOi.eyJ1c2VyX2lkIjoiNyJ9.c2lnbmF0dXJl"
+
+
+def make_record(message="hello", level=logging.INFO, **extra):
+    record = logging.LogRecord("test", level, __file__, 42, message, None, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_full_queue_drops_and_counts_without_blocking(monkeypatch):
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=2))
+    monkeypatch.setattr(app_logging, "_queue_handler", handler)
+
+    start = time.monotonic()
+    for index in range(5):
+        handler.handle(make_record(f"record {index}"))
+
+    assert time.monotonic() - start < 1
+    assert handler.dropped == 3
+    assert get_dropped_log_count() == 3
+    assert [handler.queue.get_nowait().getMessage() for _ in range(2)] == ["record 0", "record 1"]
+
+
+def test_records_are_queued_unformatted():
+    handler = NonBlockingQueueHandler(queue.Queue())
+    record = make_record("%s and %s", event={"details": {"email": "someone@example.com"}})
+    record.args = ("one", "two")
+
+    handler.handle(record)
+
+    queued = handler.queue.get_nowait()
+    assert queued is record
+    assert queued.args == ("one", "two")
+    assert queued.event["details"]["email"] == "someone@example.com"
+
+
+def test_json_formatter_writes_one_sanitized_line():
+    event = {
+        "event_type": "login_failure",
+        "details": {"email": "someone@example.com", "token": TOKEN, "body": 'password: "hunter2"', "attempts": 3},
+    }
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        record = make_record("AUTH_EVENT: login_failure", level=logging.WARNING, event=event, exc_info=sys.exc_info())
+
+    line = JsonFormatter().format(record)
+
+    assert "\n" not in line
+    entry = json.loads(line)
+    assert entry["level"] == "WARNING"
+    assert entry["logger"] == "test"
+    assert entry["message"] == "AUTH_EVENT: login_failure"
+    assert entry["location"] == f"{__file__}:42"
+    assert entry["timestamp"].endswith("+00:00")
+    assert entry["event"]["details"] == {
+        "email": "[EMAIL_MASKED]",
+        "token": TOKEN[:10] + "...",
+        "body": 'password":"[PASSWORD_MASKED]"',
+        "attempts": 3,
+    }
+    assert "ValueError: boom" in entry["exception"]
+    assert "hunter2" not in line and "someone@example.com" not in line
+    # The caller's payload is left untouched
+    assert event["details"]["email"] == "someone@example.com"
+
+
+@pytest.fixture
+def event_logger(monkeypatch):
+    """
+    The log_*_event logger wired to a queue and listener like setup_logging() does,
+    without touching the root logger; yields (queue handler, listener, output)
+    """
+    logger = logging.getLogger(app_logging.__name__)
+    output = io.StringIO()
+    stream_handler = logging.StreamHandler(output)
+    stream_handler.setFormatter(JsonFormatter())
+    queue_handler = NonBlockingQueueHandler(queue.Queue())
+    listener = QueueListener(queue_handler.queue, stream_handler)
+
+    monkeypatch.setattr(logger, "handlers", [queue_handler])
+    monkeypatch.setattr(logger, "propagate", False)
+    monkeypatch.setattr(logger, "level", logging.INFO)
+    logger.manager._clear_cache()
+    yield queue_handler, listener, output
+    logger.manager._clear_cache()
+
+
+def test_sanitization_runs_on_the_listener_thread(event_logger, monkeypatch):
+    queue_handler, listener, output = event_logger
+    sanitize = app_logging._sanitize_event
+    threads = []
+
+    def recording_sanitize(event):
+        threads.append(threading.current_thread())
+        return sanitize(event)
+
+    monkeypatch.setattr(app_logging, "_sanitize_event", recording_sanitize)
+
+    log_security_event("invalid_token", user_id="7", details={"email": "someone@example.com"})
+    # Nothing was formatted or sanitized on the logging thread
+    assert threads == []
+    assert queue_handler.queue.qsize() == 1
+
+    listener.start()
+    listener.stop()
+
+    assert len(threads) == 1 and threads[0] is not threading.current_thread()
+    entry = json.loads(output.getvalue())
+    assert entry["event"]["details"] == {"email": "[EMAIL_MASKED]"}
+    # Attributed to the caller of log_security_event, not to the logging module
+    assert entry["location"].startswith(f"{__file__}:")
+
+
+def test_filtered_out_events_never_reach_the_queue(event_logger):
+    queue_handler, _, _ = event_logger
+
+    # token_creation is a DEBUG event; the logger is at INFO
+    log_auth_event("token_creation", user_id="7")
+
+    assert queue_handler.queue.empty()
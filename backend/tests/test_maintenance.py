@@ -0,0 +1,91 @@
+"""
+Background maintenance (database/maintenance.py): archival of old completed tasks,
+expiry of Idempotency-Keys and election of a single runner
+"""
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+from sqlmodel import Session, select
+
+from src.database.maintenance import MaintenanceLock, archive_completed_tasks, purge_expired_idempotency_keys
+from src.models.idempotency import IdempotencyKey
+from src.models.task import ArchivedTask, Task
+
+OLD = datetime.utcnow() - timedelta(days=90)
+
+
+def add_tasks(engine, **tasks):
+    with Session(engine) as session:
+        for title, values in tasks.items():
+            task = Task(user_id=1, title=title, completed=values.get("completed", True))
+            session.add(task)
+            session.flush()
+            # Task.__init__ stamps updated_at; set the fields under test afterwards
+            task.updated_at = values.get("updated_at", OLD)
+            task.deleted_at = values.get("deleted_at")
+        session.commit()
+
+
+def titles(engine, model):
+    with Session(engine) as session:
+        return sorted(session.exec(select(model.title)))
+
+
+def test_archives_only_old_completed_live_tasks(engine):
+    add_tasks(
+        engine,
+        old_done={},
+        old_open={"completed": False},
+        recent_done={"updated_at": datetime.utcnow()},
+        old_deleted={"deleted_at": OLD},
+    )
+
+    assert archive_completed_tasks(age_days=30, batch_size=10, max_batches=5) == 1
+
+    assert titles(engine, ArchivedTask) == ["old_done"]
+    assert titles(engine, Task) == ["old_deleted", "old_open", "recent_done"]
+
+
+def test_task_changed_after_selection_is_not_archived(engine):
+    add_tasks(engine, reopened={}, untouched={})
+    with Session(engine) as session:
+        reopened_id = session.exec(select(Task.id).where(Task.title == "reopened")).one()
+
+    # Reopen a task between the batch SELECT and the DELETE, as a concurrent request would
+    def reopen_after_select(connection, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and "FROM tasks" in statement:
+            cursor.connection.execute("UPDATE tasks SET completed = 0 WHERE id = ?", (reopened_id,))
+
+    event.listen(engine, "after_cursor_execute", reopen_after_select)
+    try:
+        assert archive_completed_tasks(age_days=30, batch_size=10, max_batches=1) == 1
+    finally:
+        event.remove(engine, "after_cursor_execute", reopen_after_select)
+
+    assert titles(engine, ArchivedTask) == ["untouched"]
+    assert titles(engine, Task) == ["reopened"]
+
+
+def test_purges_only_expired_idempotency_keys(engine):
+    with Session(engine) as session:
+        session.add(IdempotencyKey(user_id=1, key="old", fingerprint="f", response={}, created_at=OLD))
+        session.add(IdempotencyKey(user_id=1, key="new", fingerprint="f", response={}))
+        session.commit()
+
+    assert purge_expired_idempotency_keys(86400, batch_size=1, max_batches=10) == 1
+
+    with Session(engine) as session:
+        assert list(session.exec(select(IdempotencyKey.key))) == ["new"]
+
+
+def test_only_one_process_holds_the_maintenance_lock(engine):
+    # flock locks conflict between separately opened files, as they do between workers
+    runner, other = MaintenanceLock(engine), MaintenanceLock(engine)
+
+    assert runner.acquire() and runner.acquire()
+    assert not other.acquire()
+
+    runner.release()
+    assert other.acquire()
+    assert not runner.acquire()
+    other.release()
@@ -0,0 +1,59 @@
+"""
+Fractional order keys (utils/ordering.py)
+"""
+import random
+
+import pytest
+
+from src.utils.ordering import evenly_spaced_keys, key_between
+
+
+def test_first_key():
+    assert key_between(None, None) == "a0"
+
+
+def test_appending_keeps_keys_short_and_increasing():
+    keys = evenly_spaced_keys(100)
+    assert keys[:3] == ["a0", "a1", "a2"]
+    assert keys == sorted(keys)
+    assert len(set(keys)) == len(keys)
+    # 62 one-digit keys, then the integer part grows to two digits
+    assert keys[61] == "az"
+    assert keys[62] == "b00"
+
+
+@pytest.mark.parametrize("lower, upper", [
+    ("a0", "a1"),
+    ("a0", "a0V"),
+    ("a1", "b00"),
+    ("az", "b00"),
+    ("Zz", "a0"),
+    ("a0V", "a0W"),
+])
+def test_key_between_sorts_strictly_between(lower, upper):
+    key = key_between(lower, upper)
+    assert lower < key < upper
+
+
+def test_key_before_and_after():
+    assert key_between(None, "a0") < "a0"
+    assert key_between("a0", None) > "a0"
+    assert key_between(None, "a0V") < "a0V"
+
+
+@pytest.mark.parametrize("lower, upper", [("a1", "a0"), ("a1", "a1")])
+def test_key_between_rejects_out_of_order_bounds(lower, upper):
+    with pytest.raises(ValueError):
+        key_between(lower, upper)
+
+
+def test_repeated_inserts_stay_ordered():
+    rng = random.Random(7)
+    keys = evenly_spaced_keys(5)
+    for _ in range(500):
+        index = rng.randrange(len(keys) + 1)
+        lower = keys[index - 1] if index > 0 else None
+        upper = keys[index] if index < len(keys) else None
+        keys.insert(index, key_between(lower, upper))
+    assert keys == sorted(keys)
+    assert len(set(keys)) == len(keys)
@@ -0,0 +1,99 @@
+"""
+Task list pagination: LIMIT/OFFSET in SQL and the total from COUNT(*)
+"""
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event
+from sqlmodel import Session
+
+from src.database.database import get_engine
+from src.models.task import ArchivedTask, Task
+from src.utils.ordering import evenly_spaced_keys
+
+USER_ID = 1
+TASKS_URL = f"/api/users/{USER_ID}/tasks"
+
+
+@pytest.fixture
+def tasks(engine):
+    """
+    25 live tasks (every fifth completed), 3 soft-deleted, 4 archived and another user's 5
+    """
+    now = datetime.utcnow()
+    with Session(engine) as session:
+        session.add_all(
+            Task(user_id=USER_ID, title=f"Task {index:02}", completed=index % 5 == 0, position=key)
+            for index, key in enumerate(evenly_spaced_keys(25))
+        )
+        session.add_all(Task(user_id=USER_ID, title=f"Deleted {index}", deleted_at=now) for index in range(3))
+        session.add_all(
+            ArchivedTask(id=1000 + index, user_id=USER_ID, title=f"Archived {index}", completed=True,
+                         position=f"z{index}", created_at=now, updated_at=now)
+            for index in range(4)
+        )
+        session.add_all(Task(user_id=2, title=f"Theirs {index}") for index in range(5))
+        session.commit()
+
+
+@pytest.fixture
+def statements():
+    seen = []
+
+    def record(connection, cursor, statement, parameters, context, executemany):
+        seen.append(statement)
+
+    read_engine = get_engine()
+    event.listen(read_engine, "before_cursor_execute", record)
+    yield seen
+    event.remove(read_engine, "before_cursor_execute", record)
+
+
+def page(client, auth_headers, **params):
+    response = client.get(TASKS_URL, params=params, headers=auth_headers(USER_ID))
+    assert response.status_code == 200
+    body = response.json()
+    return [task["title"] for task in body["tasks"]], body["total"]
+
+
+@pytest.mark.parametrize("params, titles, total", [
+    ({"limit": 10, "sort": "position"}, [f"Task {index:02}" for index in range(10)], 25),
+    ({"limit": 10, "offset": 10, "sort": "position"}, [f"Task {index:02}" for index in range(10, 20)], 25),
+    ({"limit": 10, "offset": 20, "sort": "position"}, [f"Task {index:02}" for index in range(20, 25)], 25),
+    ({"limit": 10, "offset": 40, "sort": "position"}, [], 25),
+    ({"limit": 25, "sort": "position"}, [f"Task {index:02}" for index in range(25)], 25),
+    ({"limit": 2, "completed": True, "sort": "position"}, ["Task 00", "Task 05"], 5),
+    ({"limit": 10, "completed": True, "include_archived": True, "sort": "position", "offset": 6},
+     ["Archived 1", "Archived 2", "Archived 3"], 9),
+])
+def test_pages_and_totals(client, auth_headers, tasks, params, titles, total):
+    assert page(client, auth_headers, **params) == (titles, total)
+
+
+def test_unfiltered_pages_cover_every_live_task_once(client, auth_headers, tasks):
+    seen = []
+    for offset in range(0, 30, 7):
+        titles, total = page(client, auth_headers, limit=7, offset=offset)
+        assert total == 25
+        seen.extend(titles)
+
+    assert sorted(seen) == [f"Task {index:02}" for index in range(25)]
+
+
+def test_limit_and_offset_run_in_sql(client, auth_headers, tasks, statements):
+    page(client, auth_headers, limit=10, offset=10, sort="position")
+
+    [listing] = [statement for statement in statements if "LIMIT" in statement]
+    assert "OFFSET" in listing
+    assert any("count(*)" in statement for statement in statements)
+
+
+def test_last_page_needs_no_count(client, auth_headers, tasks, statements):
+    assert page(client, auth_headers, limit=10, offset=20)[1] == 25
+    assert page(client, auth_headers, limit=100)[1] == 25
+
+    assert not any("count(*)" in statement for statement in statements)
+
+
+def test_empty_list(client, engine, auth_headers):
+    assert page(client, auth_headers) == ([], 0)
@@ -0,0 +1,132 @@
+"""
+Bulk user provisioning: per-user results, conflict reporting and batched inserts,
+through the service, POST /api/admin/users/bulk and provision_users.py
+"""
+import json
+
+import pytest
+from sqlmodel import Session, select
+
+import provision_users
+from src.config.settings import settings
+from src.models.auth import AuthRequest, User
+from src.services.provisioning_service import ProvisioningService
+from src.utils import password_utils
+from src.utils.password_utils import verify_password
+
+EXISTING_EMAIL = "existing@example.com"
+ADMIN_TOKEN = "test-admin-token"
+
+
+@pytest.fixture(autouse=True)
+def existing_user(engine):
+    with Session(engine) as session:
+        session.add(User(email=EXISTING_EMAIL, hashed_password="not-a-real-hash"))
+        session.commit()
+
+
+def created_users(engine):
+    with Session(engine) as session:
+        return {user.email: user for user in session.exec(select(User).where(User.email != EXISTING_EMAIL))}
+
+
+def test_provision_users_reports_every_entry(engine):
+    users = [
+        AuthRequest(email="first@example.com", password="first-password", name="First"),
+        AuthRequest(email="short@example.com", password="short"),
+        AuthRequest(email="not-an-email", password="long-enough"),
+        AuthRequest(email=EXISTING_EMAIL, password="long-enough"),
+        AuthRequest(email="first@example.com", password="other-password"),
+        AuthRequest(email="second@example.com", password="second-password"),
+    ]
+
+    results = list(ProvisioningService.provision_users(users, batch_size=1, workers=2))
+
+    summary = results.pop()["summary"]
+    by_index = {result["index"]: result for result in results}
+    assert sorted(by_index) == list(range(len(users)))
+    assert [by_index[index]["status"] for index in range(len(users))] == [
+        "created", "invalid", "invalid", "conflict", "conflict", "created",
+    ]
+    assert by_index[4]["error"] == "Duplicate email in request"
+    assert {key: summary[key] for key in ("requested", "created", "conflict", "invalid")} == {
+        "requested": 6, "created": 2, "conflict": 2, "invalid": 2,
+    }
+
+    created = created_users(engine)
+    assert set(created) == {"first@example.com", "second@example.com"}
+    assert by_index[0]["id"] == str(created["first@example.com"].id)
+    # Hashes come back in input order, so each user gets their own password
+    assert verify_password("first-password", created["first@example.com"].hashed_password)
+    assert verify_password("second-password", created["second@example.com"].hashed_password)
+    assert created["first@example.com"].name == "First"
+
+
+def test_insert_batch_reports_emails_registered_after_the_check(engine):
+    batch = [
+        (0, AuthRequest(email=EXISTING_EMAIL, password="long-enough"), "hash-0"),
+        (1, AuthRequest(email="new@example.com", password="long-enough"), "hash-1"),
+    ]
+
+    results = ProvisioningService._insert_batch(engine, batch)
+
+    assert [result["status"] for result in results] == ["conflict", "created"]
+    with Session(engine) as session:
+        assert session.exec(select(User.hashed_password).where(User.email == EXISTING_EMAIL)).one() == "not-a-real-hash"
+
+
+def test_bulk_endpoint_streams_results(client, engine, monkeypatch):
+    monkeypatch.setattr(settings, "ADMIN_API_TOKEN", ADMIN_TOKEN)
+    body = {"users": [
+        {"email": "api@example.com", "password": "api-password"},
+        {"email": EXISTING_EMAIL, "password": "long-enough"},
+    ]}
+
+    assert client.post("/api/admin/users/bulk", json=body).status_code == 401
+
+    response = client.post("/api/admin/users/bulk", json=body, headers={"X-Admin-Token": ADMIN_TOKEN})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line.get("status") for line in lines[:-1]] == ["conflict", "created"]
+    assert lines[-1]["summary"]["created"] == 1
+    assert set(created_users(engine)) == {"api@example.com"}
+
+
+def test_bulk_endpoint_limits_request_size(client, monkeypatch):
+    monkeypatch.setattr(settings, "ADMIN_API_TOKEN", ADMIN_TOKEN)
+    monkeypatch.setattr(settings, "PROVISIONING_MAX_USERS", 1)
+    body = {"users": [{"email": f"user{index}@example.com", "password": "long-enough"} for index in range(2)]}
+
+    response = client.post("/api/admin/users/bulk", json=body, headers={"X-Admin-Token": ADMIN_TOKEN})
+
+    assert response.status_code == 413
+
+
+def test_cli_reads_csv_and_reports_invalid_entries(engine, tmp_path, capsys):
+    users_file = tmp_path / "users.csv"
+    users_file.write_text("email,password,name\ncli@example.com,cli-password,Cli\nbad@example.com,short,\n")
+
+    assert provision_users.main([str(users_file)]) == 1
+
+    lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert {line["email"]: line["status"] for line in lines[:-1]} == {"bad@example.com": "invalid", "cli@example.com": "created"}
+    assert created_users(engine)["cli@example.com"].name == "Cli"
+
+
+def test_hash_workers_setting_sizes_the_pool(engine, monkeypatch):
+    pool_sizes = []
+
+    class RecordingPool(password_utils.ThreadPoolExecutor):
+        def __init__(self, max_workers=None, **kwargs):
+            pool_sizes.append(max_workers)
+            super().__init__(max_workers=max_workers, **kwargs)
+
+    monkeypatch.setattr(password_utils, "ThreadPoolExecutor", RecordingPool)
+    monkeypatch.setattr(settings, "PROVISIONING_HASH_WORKERS", 3)
+
+    list(ProvisioningService.provision_users([AuthRequest(email="pool@example.com", password="pool-password")]))
+    list(ProvisioningService.provision_users([AuthRequest(email="pool2@example.com", password="pool-password")], workers=1))
+
+    assert pool_sizes == [3, 1]
@@ -0,0 +1,104 @@
+"""
+SingleFlight waiters: bounded by their own deadline, never inheriting the leader's
+"""
+import threading
+import time
+
+import pytest
+
+from src.utils.deadline import Deadline, DeadlineExceeded, reset_deadline, set_deadline
+from src.utils.singleflight import SingleFlight
+
+
+def start_leader(flight, fn):
+    """
+    Run `fn` as the leader in another thread; returns (thread, outcome list)
+    """
+    outcome = []
+
+    def lead():
+        try:
+            outcome.append(flight.do("key", fn))
+        except BaseException as e:
+            outcome.append(e)
+
+    thread = threading.Thread(target=lead)
+    thread.start()
+    return thread, outcome
+
+
+def wait_for_flight(flight):
+    while flight.stats()["in_flight"] == 0:
+        time.sleep(0.001)
+
+
+def release_once_joined(flight, release):
+    """
+    Let the leader finish as soon as a waiter has joined its flight
+    """
+    def watch():
+        while flight.stats()["coalesced"] == 0:
+            time.sleep(0.001)
+        release.set()
+
+    threading.Thread(target=watch).start()
+
+
+def call_with_deadline(flight, timeout, fn):
+    token = set_deadline(Deadline(timeout))
+    try:
+        return flight.do("key", fn)
+    finally:
+        reset_deadline(token)
+
+
+def test_waiter_gives_up_at_its_own_deadline():
+    flight = SingleFlight()
+    release = threading.Event()
+    leader, outcome = start_leader(flight, lambda: release.wait() and "leader result")
+    wait_for_flight(flight)
+
+    start = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        call_with_deadline(flight, 0.05, lambda: "unused")
+    assert time.monotonic() - start < 1
+
+    release.set()
+    leader.join()
+    assert outcome == ["leader result"]
+
+
+def test_waiters_rerun_when_the_leader_runs_out_of_time():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def cancelled_leader():
+        release.wait()
+        raise DeadlineExceeded()
+
+    leader, outcome = start_leader(flight, cancelled_leader)
+    wait_for_flight(flight)
+    release_once_joined(flight, release)
+
+    assert call_with_deadline(flight, 5, lambda: "own result") == "own result"
+
+    leader.join()
+    assert isinstance(outcome[0], DeadlineExceeded)
+    assert flight.stats()["executed"] == 2
+
+
+def test_waiters_share_other_leader_errors():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def failing_leader():
+        release.wait()
+        raise ValueError("shared failure")
+
+    leader, _ = start_leader(flight, failing_leader)
+    wait_for_flight(flight)
+    release_once_joined(flight, release)
+
+    with pytest.raises(ValueError, match="shared failure"):
+        call_with_deadline(flight, 5, lambda: "unused")
+    leader.join()
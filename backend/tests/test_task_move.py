@@ -0,0 +1,84 @@
+"""
+PATCH /api/users/{user_id}/tasks/{task_id}/move
+"""
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import update
+from sqlmodel import Session, select
+
+from src.models.task import Task
+from src.services.task_service import TaskService
+
+USER_ID = 1
+
+
+@pytest.fixture
+def task_ids(engine):
+    with Session(engine) as session:
+        tasks = [Task(user_id=USER_ID, title=f"Task {index}", position=f"a{index}") for index in range(4)]
+        session.add_all(tasks)
+        session.commit()
+        return [task.id for task in tasks]
+
+
+def order(engine):
+    with Session(engine) as session:
+        return list(session.exec(select(Task.id).where(Task.user_id == USER_ID).order_by(Task.position, Task.id)))
+
+
+def move(client, auth_headers, task_id, **body):
+    return client.patch(f"/api/users/{USER_ID}/tasks/{task_id}/move", json=body, headers=auth_headers(USER_ID))
+
+
+def test_move_between_neighbours(client, auth_headers, engine, task_ids):
+    first, second, third, fourth = task_ids
+
+    response = move(client, auth_headers, fourth, after_id=first, before_id=second)
+
+    assert response.status_code == 200
+    assert order(engine) == [first, fourth, second, third]
+
+
+@pytest.mark.parametrize("body", [
+    {"after_id": "second", "before_id": "second"},
+    {"after_id": "moved"},
+    {"before_id": "moved"},
+    {"after_id": "first", "before_id": "moved"},
+])
+def test_move_rejects_degenerate_neighbours(client, auth_headers, engine, task_ids, body):
+    first, second, third, _ = task_ids
+    names = {"first": first, "second": second, "moved": third}
+
+    response = move(client, auth_headers, third, **{key: names[value] for key, value in body.items()})
+
+    assert response.status_code == 422
+    assert order(engine) == task_ids
+
+
+def test_move_between_duplicate_keys_rebalances_once(client, auth_headers, engine, task_ids):
+    first, second, third, fourth = task_ids
+    with Session(engine) as session:
+        session.execute(update(Task).where(Task.id == second).values(position="a0"))
+        session.commit()
+
+    response = move(client, auth_headers, fourth, after_id=first, before_id=second)
+
+    assert response.status_code == 200
+    assert order(engine) == [first, fourth, second, third]
+
+
+def test_move_gives_up_after_one_rebalance(engine, task_ids, monkeypatch):
+    first, second, _, fourth = task_ids
+    with Session(engine) as session:
+        session.execute(update(Task).where(Task.id == second).values(position="a0"))
+        session.commit()
+
+    rebalances = []
+    # A rebalance that loses a race with a concurrent move leaves the keys equal
+    monkeypatch.setattr(TaskService, "rebalance_task_positions", staticmethod(lambda session, user_id: rebalances.append(user_id)))
+
+    with Session(engine) as session, pytest.raises(HTTPException) as error:
+        TaskService.move_task(session, USER_ID, fourth, after_id=first, before_id=second)
+
+    assert error.value.status_code == 409
+    assert rebalances == [USER_ID]
@@ -0,0 +1,138 @@
+"""
+Tail sampling of traces and the JSON-lines span exporter
+"""
+import json
+
+import pytest
+
+pytest.importorskip("opentelemetry.sdk")
+
+from opentelemetry.sdk.trace import SpanProcessor, TracerProvider  # noqa: E402
+from opentelemetry.trace import Status, StatusCode, set_span_in_context  # noqa: E402
+
+from src.utils import trace_export  # noqa: E402
+from src.utils.trace_export import JsonLinesSpanExporter, TailSamplingSpanProcessor  # noqa: E402
+
+MS = 1_000_000
+
+
+class Collector(SpanProcessor):
+    def __init__(self):
+        self.spans = []
+
+    def on_end(self, span):
+        self.spans.append(span.name)
+
+
+def sampled_tracer(ratio=0.0, slow_ms=500, max_pending_traces=100):
+    collector = Collector()
+    sampler = TailSamplingSpanProcessor(collector, ratio=ratio, slow_ms=slow_ms, max_pending_traces=max_pending_traces)
+    provider = TracerProvider()
+    provider.add_span_processor(sampler)
+    return provider.get_tracer("test"), sampler, collector
+
+
+def request_trace(tracer, duration_ms=1, error=False):
+    root = tracer.start_span("request", start_time=0)
+    with tracer.start_as_current_span("sql", context=set_span_in_context(root)):
+        pass
+    if error:
+        root.set_status(Status(StatusCode.ERROR))
+    root.end(end_time=duration_ms * MS)
+
+
+def test_sampled_trace_is_forwarded_whole():
+    tracer, sampler, collector = sampled_tracer(ratio=1.0)
+
+    request_trace(tracer)
+
+    assert collector.spans == ["sql", "request"]
+    assert sampler.stats() == {"kept": 1, "dropped": 0, "pending": 0}
+
+
+def test_unsampled_fast_trace_is_dropped_whole():
+    tracer, sampler, collector = sampled_tracer(ratio=0.0)
+
+    request_trace(tracer)
+
+    assert collector.spans == []
+    assert sampler.stats() == {"kept": 0, "dropped": 1, "pending": 0}
+
+
+@pytest.mark.parametrize("duration_ms, error", [(500, False), (2000, False), (1, True)])
+def test_slow_or_failed_requests_are_always_kept(duration_ms, error):
+    tracer, sampler, collector = sampled_tracer(ratio=0.0, slow_ms=500)
+
+    request_trace(tracer, duration_ms=duration_ms, error=error)
+
+    assert collector.spans == ["sql", "request"]
+    assert sampler.stats()["kept"] == 1
+
+
+@pytest.mark.parametrize("ratio, forwarded", [(1.0, ["request", "background"]), (0.0, [])])
+def test_spans_ending_after_their_root_follow_its_decision(ratio, forwarded):
+    tracer, sampler, collector = sampled_tracer(ratio=ratio)
+
+    root = tracer.start_span("request")
+    late = tracer.start_span("background", context=set_span_in_context(root))
+    root.end()
+    late.end()
+
+    assert collector.spans == forwarded
+    stats = sampler.stats()
+    assert stats["pending"] == 0
+    assert stats["kept"] + stats["dropped"] == 1
+
+
+def test_pending_traces_are_capped():
+    tracer, sampler, collector = sampled_tracer(ratio=1.0, max_pending_traces=2)
+
+    roots = [tracer.start_span(f"request {index}") for index in range(3)]
+    for root in roots:
+        tracer.start_span("sql", context=set_span_in_context(root)).end()
+
+    assert sampler.stats() == {"kept": 0, "dropped": 1, "pending": 2}
+    for root in roots:
+        root.end()
+    # The oldest trace lost its buffered child; the root itself is still decided and kept
+    assert collector.spans == ["request 0", "sql", "request 1", "sql", "request 2"]
+    assert sampler.stats()["pending"] == 0
+
+
+def finished_spans(count):
+    collector = []
+
+    class Keep(SpanProcessor):
+        def on_end(self, span):
+            collector.append(span)
+
+    provider = TracerProvider()
+    provider.add_span_processor(Keep())
+    tracer = provider.get_tracer("test")
+    for index in range(count):
+        tracer.start_span(f"span {index}").end()
+    return collector
+
+
+def test_exporter_without_the_otlp_encoder_writes_a_span_per_line(tmp_path, monkeypatch):
+    monkeypatch.setattr(trace_export, "encode_spans", None)
+    exporter = JsonLinesSpanExporter(str(tmp_path / "traces.jsonl"))
+
+    exporter.export(finished_spans(2))
+    exporter.shutdown()
+
+    lines = (tmp_path / "traces.jsonl").read_text().splitlines()
+    assert [json.loads(line)["name"] for line in lines] == ["span 0", "span 1"]
+
+
+def test_exporter_writes_otlp_json(tmp_path):
+    pytest.importorskip("opentelemetry.exporter.otlp.proto.common")
+    exporter = JsonLinesSpanExporter(str(tmp_path / "traces.jsonl"))
+
+    exporter.export(finished_spans(2))
+    exporter.shutdown()
+
+    lines = (tmp_path / "traces.jsonl").read_text().splitlines()
+    assert len(lines) == 1
+    scope_spans = json.loads(lines[0])["resourceSpans"][0]["scopeSpans"]
+    assert [span["name"] for scope in scope_spans for span in scope["spans"]] == ["span 0", "span 1"]
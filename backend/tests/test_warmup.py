@@ -0,0 +1,61 @@
+"""
+Startup warm-up (database/warmup.py)
+"""
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event, func
+from sqlmodel import select
+
+from src.database import warmup
+from src.database.database import RoutingSession, get_engines
+from src.models.task import Task, TaskUpdate
+from src.services.task_service import TaskService
+
+
+@pytest.fixture
+def warmed_up(engine, monkeypatch):
+    monkeypatch.setattr(warmup, "_state", dict(warmup._state))
+    warmup.warm_up_database()
+    return warmup._state
+
+
+def test_warm_up_opens_both_pools_and_writes_nothing(warmed_up):
+    assert warmed_up["warmed_up"] and warmed_up["error"] is None
+
+    read_engine, write_engine = get_engines()
+    assert read_engine is not write_engine
+    assert write_engine.pool.checkedin() == 1
+    with RoutingSession() as session:
+        assert session.exec(select(func.count()).select_from(Task)).one() == 0
+
+
+def test_endpoint_statements_are_compiled_before_the_first_request(warmed_up):
+    misses = []
+
+    def record_miss(connection, cursor, statement, parameters, context, executemany):
+        if context.compiled is not None and context.cache_hit != context.dialect.CACHE_HIT:
+            misses.append(statement)
+
+    engines = set(get_engines())
+    for built_engine in engines:
+        event.listen(built_engine, "before_cursor_execute", record_miss)
+    try:
+        with RoutingSession() as session:
+            TaskService.get_all_task_rows(session, 1, limit=50, offset=100)
+            TaskService.get_all_task_rows(session, 1, ordered=True, limit=50)
+            TaskService.count_task_rows(session, 1)
+            TaskService.get_task_rows_by_ids(session, 1, [1, 2])
+            for call in (
+                lambda: TaskService.get_task_row_by_id(session, 1, 1, include_archived=True),
+                lambda: TaskService.update_task(session, 1, 1, TaskUpdate(title="t", description="d")),
+                lambda: TaskService.toggle_task_completion(session, 1, 1, True),
+                lambda: TaskService.delete_task(session, 1, 1),
+            ):
+                with pytest.raises(HTTPException):
+                    call()
+                session.rollback()
+    finally:
+        for built_engine in engines:
+            event.remove(built_engine, "before_cursor_execute", record_miss)
+
+    assert misses == []